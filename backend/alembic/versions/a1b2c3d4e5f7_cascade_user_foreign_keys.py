@@ -0,0 +1,179 @@
+"""Cascade user / trainer / trainee foreign keys for set-based erasure
+
+Every foreign key that points at users, trainers, trainees or workouts gets
+an explicit ON DELETE rule (CASCADE for owned rows, SET NULL for references
+such as approvals or an assigned trainer), so deleting users is a single
+DELETE. Referencing columns get an index where none leads with them, so
+the cascades do not scan whole tables.
+
+Some of these columns had no constraint before, so they may hold orphans.
+The upgrade therefore runs in three steps:
+
+1. in the migration transaction, replace the constraints with NOT VALID
+   ones (no table scan, so the locks on users / trainers are short);
+   from here on new rows are checked and the ON DELETE rules apply
+2. outside it, one statement per column, delete the orphan rows of CASCADE
+   columns and null those of SET NULL columns
+3. VALIDATE each new constraint, again one per statement (this takes no
+   lock that blocks reads or writes)
+
+Revision ID: a1b2c3d4e5f7
+Revises: f0a1b2c3d4e5
+Create Date: 2026-02-16 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a1b2c3d4e5f7'
+down_revision = 'f0a1b2c3d4e5'
+branch_labels = None
+depends_on = None
+
+# (table, column, referenced table, ON DELETE) - keep in step with app/models.py
+FOREIGN_KEYS = [
+    ('admin_otp', 'admin_id', 'users', 'CASCADE'),
+    ('admin_sessions', 'user_id', 'users', 'CASCADE'),
+    ('admin_settings', 'user_id', 'users', 'CASCADE'),
+    ('attendance', 'trainee_id', 'users', 'CASCADE'),
+    ('diet_plans', 'trainee_id', 'users', 'CASCADE'),
+    ('measurements', 'trainee_id', 'users', 'CASCADE'),
+    ('memberships', 'trainee_id', 'users', 'CASCADE'),
+    ('messages', 'sender_id', 'users', 'CASCADE'),
+    ('messages', 'receiver_id', 'users', 'CASCADE'),
+    ('notifications', 'user_id', 'users', 'CASCADE'),
+    ('nutrition_goals', 'trainee_id', 'users', 'CASCADE'),
+    ('nutrition_logs', 'trainee_id', 'users', 'CASCADE'),
+    ('payment_idempotency_keys', 'user_id', 'users', 'CASCADE'),
+    ('payments', 'trainee_id', 'users', 'CASCADE'),
+    ('progress_measurements', 'trainee_id', 'users', 'CASCADE'),
+    ('progress_photos', 'trainee_id', 'users', 'CASCADE'),
+    ('pt_sessions', 'trainee_id', 'users', 'CASCADE'),
+    ('trainee_activity_stats', 'trainee_id', 'users', 'CASCADE'),
+    ('trainees', 'user_id', 'users', 'CASCADE'),
+    ('trainer_attendance', 'approved_by', 'users', 'SET NULL'),
+    ('trainer_documents', 'verified_by', 'users', 'SET NULL'),
+    ('trainer_leaves', 'approved_by', 'users', 'SET NULL'),
+    ('trainer_messages', 'sender_id', 'users', 'CASCADE'),
+    ('trainer_messages', 'receiver_id', 'users', 'CASCADE'),
+    ('trainers', 'user_id', 'users', 'CASCADE'),
+    ('workout_plans', 'trainee_id', 'users', 'CASCADE'),
+    ('workouts', 'trainee_id', 'users', 'CASCADE'),
+    ('gym_schedule_slots', 'trainer_id', 'trainers', 'SET NULL'),
+    ('pt_sessions', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainees', 'trainer_id', 'trainers', 'SET NULL'),
+    ('trainer_attendance', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_documents', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_leaves', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_messages', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_revenue', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_salaries', 'trainer_id', 'trainers', 'CASCADE'),
+    ('trainer_schedules', 'trainer_id', 'trainers', 'CASCADE'),
+    ('workout_plans', 'trainer_id', 'trainers', 'CASCADE'),
+    ('ai_reports', 'trainee_id', 'trainees', 'CASCADE'),
+    ('trainer_messages', 'trainee_id', 'trainees', 'CASCADE'),
+    ('trainer_schedules', 'trainee_id', 'trainees', 'SET NULL'),
+    ('ai_reports', 'workout_id', 'workouts', 'CASCADE'),
+]
+
+
+def _set_foreign_key(table, column, referenced, ondelete, index=True, valid=True):
+    """Replace whatever FK the column has with one named <table>_<column>_fkey."""
+    create_index = f"""
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_index i
+        JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+        WHERE i.indrelid = '{table}'::regclass AND a.attname = '{column}' AND i.indpred IS NULL
+    ) THEN
+        CREATE INDEX ix_{table}_{column} ON {table} ({column});
+    END IF;""" if index else ""
+    # Tables created outside migrations may be missing or typed differently; leave those alone
+    op.execute(f"""
+DO $$
+DECLARE con text;
+BEGIN
+    IF to_regclass('{table}') IS NULL THEN
+        RAISE NOTICE 'skipping %.% (no table)', '{table}', '{column}';
+        RETURN;
+    END IF;
+    IF (
+        SELECT a.atttypid FROM pg_attribute a
+        WHERE a.attrelid = to_regclass('{table}') AND a.attname = '{column}'
+    ) IS DISTINCT FROM (
+        SELECT a.atttypid FROM pg_attribute a
+        WHERE a.attrelid = '{referenced}'::regclass AND a.attname = 'id'
+    ) THEN
+        RAISE NOTICE 'skipping %.% (type differs from %.id)', '{table}', '{column}', '{referenced}';
+        RETURN;
+    END IF;
+    FOR con IN
+        SELECT c.conname FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f' AND c.conrelid = '{table}'::regclass
+          AND c.confrelid = '{referenced}'::regclass AND a.attname = '{column}'
+    LOOP
+        EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', con);
+    END LOOP;
+    ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey
+        FOREIGN KEY ({column}) REFERENCES {referenced} (id) ON DELETE {ondelete}{"" if valid else " NOT VALID"};{create_index}
+END $$;
+""")
+
+
+def _unvalidated(table, column):
+    return f"""
+    EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = to_regclass('{table}') AND conname = '{table}_{column}_fkey' AND NOT convalidated
+    )"""
+
+
+def _remove_orphans(table, column, referenced, ondelete):
+    """Apply the column's ON DELETE rule to rows whose referenced row is already gone."""
+    if ondelete == "CASCADE":
+        action = f"DELETE FROM {table} t"
+    else:
+        action = f"UPDATE {table} t SET {column} = NULL"
+    op.execute(f"""
+DO $$
+DECLARE orphans bigint;
+BEGIN
+    IF {_unvalidated(table, column)} THEN
+        {action}
+        WHERE t.{column} IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM {referenced} r WHERE r.id = t.{column});
+        GET DIAGNOSTICS orphans = ROW_COUNT;
+        IF orphans > 0 THEN
+            RAISE NOTICE '%.%: % orphan row(s) handled as ON DELETE %', '{table}', '{column}', orphans, '{ondelete}';
+        END IF;
+    END IF;
+END $$;
+""")
+
+
+def _validate_foreign_key(table, column):
+    op.execute(f"""
+DO $$
+BEGIN
+    IF {_unvalidated(table, column)} THEN
+        ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey;
+    END IF;
+END $$;
+""")
+
+
+def upgrade() -> None:
+    for table, column, referenced, ondelete in FOREIGN_KEYS:
+        _set_foreign_key(table, column, referenced, ondelete, valid=False)
+
+    with op.get_context().autocommit_block():
+        for table, column, referenced, ondelete in FOREIGN_KEYS:
+            _remove_orphans(table, column, referenced, ondelete)
+        for table, column, _, _ in FOREIGN_KEYS:
+            _validate_foreign_key(table, column)
+
+
+def downgrade() -> None:
+    # Back to plain references; indexes are kept (they only help)
+    for table, column, referenced, _ in FOREIGN_KEYS:
+        _set_foreign_key(table, column, referenced, "NO ACTION", index=False)
@@ -0,0 +1,24 @@
+"""Add composite indexes used by the trainee dashboard query
+
+Revision ID: a5b6c7d8e9f0
+Revises: f4a5b6c7d8e9
+Create Date: 2026-02-07 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'a5b6c7d8e9f0'
+down_revision = 'f4a5b6c7d8e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_workouts_trainee_start', 'workouts', ['trainee_id', 'start_time'], unique=False)
+    op.create_index('ix_measurements_trainee_date', 'measurements', ['trainee_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_measurements_trainee_date', table_name='measurements')
+    op.drop_index('ix_workouts_trainee_start', table_name='workouts')
@@ -0,0 +1,29 @@
+"""Add payments.plan_id (the plan an order was created for)
+
+Revision ID: b2c3d4e5f6a8
+Revises: a1b2c3d4e5f7
+Create Date: 2026-03-02 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b2c3d4e5f6a8'
+down_revision = 'a1b2c3d4e5f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('payments', sa.Column('plan_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'payments_plan_id_fkey', 'payments', 'membership_plans', ['plan_id'], ['id'], ondelete='SET NULL'
+    )
+    op.create_index('ix_payments_plan_id', 'payments', ['plan_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_payments_plan_id', table_name='payments')
+    op.drop_constraint('payments_plan_id_fkey', 'payments', type_='foreignkey')
+    op.drop_column('payments', 'plan_id')
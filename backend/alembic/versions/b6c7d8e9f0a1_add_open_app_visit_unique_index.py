@@ -0,0 +1,42 @@
+"""Close stale/duplicate open attendance and add one-open-app-visit unique index
+
+Revision ID: b6c7d8e9f0a1
+Revises: a5b6c7d8e9f0
+Create Date: 2026-02-08 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'b6c7d8e9f0a1'
+down_revision = 'a5b6c7d8e9f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep only the latest open app visit per trainee; older ones are closed
+    # the same way the sweeper closes stale visits
+    op.execute("""
+        UPDATE attendance a
+        SET check_out_time = date_trunc('day', a.check_in_time) + interval '23:59:59',
+            duration_minutes = 60
+        WHERE a.check_out_time IS NULL
+          AND a.check_in_method = 'app'
+          AND EXISTS (
+              SELECT 1 FROM attendance b
+              WHERE b.trainee_id = a.trainee_id
+                AND b.check_out_time IS NULL
+                AND b.check_in_method = 'app'
+                AND (b.check_in_time, b.id) > (a.check_in_time, a.id)
+          )
+    """)
+    op.create_index(
+        'uq_attendance_open_app_visit', 'attendance', ['trainee_id'], unique=True,
+        postgresql_where=sa.text("check_out_time IS NULL AND check_in_method = 'app'")
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_attendance_open_app_visit', table_name='attendance')
@@ -0,0 +1,27 @@
+"""Add nutrition_goals.user_set_fields (inputs the trainee set explicitly)
+
+Revision ID: c3d4e5f6a7b9
+Revises: b2c3d4e5f6a8
+Create Date: 2026-03-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c3d4e5f6a7b9'
+down_revision = 'b2c3d4e5f6a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows cannot tell explicit inputs from derived ones; start empty
+    op.add_column(
+        'nutrition_goals',
+        sa.Column('user_set_fields', sa.JSON(), server_default=sa.text("'[]'"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('nutrition_goals', 'user_set_fields')
@@ -0,0 +1,23 @@
+"""Add notes to trainer_revenue (payout notes shown in the payments ledger)
+
+Revision ID: c7d8e9f0a1b2
+Revises: b6c7d8e9f0a1
+Create Date: 2026-02-09 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c7d8e9f0a1b2'
+down_revision = 'b6c7d8e9f0a1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('trainer_revenue', sa.Column('notes', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('trainer_revenue', 'notes')
@@ -0,0 +1,42 @@
+"""Add typed macro columns to nutrition_logs table
+
+Revision ID: d2e3f4a5b6c7
+Revises: 9e8f7c1d2a3b
+Create Date: 2026-02-02 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd2e3f4a5b6c7'
+down_revision = '9e8f7c1d2a3b'
+branch_labels = None
+depends_on = None
+
+MACRO_FIELDS = ('protein', 'carbs', 'fats', 'fiber')
+
+
+def upgrade() -> None:
+    # Add numeric macro columns so summaries can be aggregated in SQL
+    for field in MACRO_FIELDS:
+        op.add_column('nutrition_logs', sa.Column(field, sa.Float(), nullable=False, server_default='0'))
+
+    # Backfill from macros_json, skipping values that aren't plain numbers
+    numeric = r"'^\s*-?[0-9]+(\.[0-9]+)?\s*$'"
+    assignments = ', '.join(
+        f"{field} = CASE WHEN (macros_json->>'{field}') ~ {numeric} "
+        f"THEN (macros_json->>'{field}')::float ELSE 0 END"
+        for field in MACRO_FIELDS
+    )
+    op.execute(f"UPDATE nutrition_logs SET {assignments} WHERE macros_json IS NOT NULL")
+
+    # Composite index for per-trainee date range queries
+    op.create_index('ix_nutrition_logs_trainee_date', 'nutrition_logs', ['trainee_id', 'date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_nutrition_logs_trainee_date', table_name='nutrition_logs')
+
+    for field in MACRO_FIELDS:
+        op.drop_column('nutrition_logs', field)
@@ -0,0 +1,41 @@
+"""Add payment_idempotency_keys and payments.transaction_id index for idempotent verification
+
+Revision ID: d8e9f0a1b2c3
+Revises: c7d8e9f0a1b2
+Create Date: 2026-02-10 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd8e9f0a1b2c3'
+down_revision = 'c7d8e9f0a1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'payment_idempotency_keys',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.String(length=200), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('payment_id', sa.Integer(), nullable=True),
+        sa.Column('response_json', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key'),
+    )
+    op.create_index(op.f('ix_payment_idempotency_keys_id'), 'payment_idempotency_keys', ['id'], unique=False)
+    # Verification looks payments up by gateway order / payment id
+    op.create_index(op.f('ix_payments_transaction_id'), 'payments', ['transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_payments_transaction_id'), table_name='payments')
+    op.drop_index(op.f('ix_payment_idempotency_keys_id'), table_name='payment_idempotency_keys')
+    op.drop_table('payment_idempotency_keys')
@@ -0,0 +1,48 @@
+"""Add nutrition_goals table
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-02-04 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e3f4a5b6c7d8'
+down_revision = 'd2e3f4a5b6c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Persisted per-trainee goals; rows are created lazily on first read
+    op.create_table(
+        'nutrition_goals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trainee_id', sa.Integer(), nullable=False),
+        sa.Column('weight', sa.Float(), nullable=False),
+        sa.Column('height', sa.Float(), nullable=False),
+        sa.Column('age', sa.Integer(), nullable=False),
+        sa.Column('gender', sa.String(length=20), nullable=False),
+        sa.Column('activity_level', sa.String(length=20), nullable=False),
+        sa.Column('fitness_goal', sa.String(length=20), nullable=False),
+        sa.Column('calories', sa.Float(), nullable=False),
+        sa.Column('protein', sa.Float(), nullable=False),
+        sa.Column('carbs', sa.Float(), nullable=False),
+        sa.Column('fats', sa.Float(), nullable=False),
+        sa.Column('fiber', sa.Float(), nullable=False),
+        sa.Column('water_liters', sa.Float(), nullable=False),
+        sa.Column('tdee', sa.Float(), nullable=False),
+        sa.Column('bmr', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['trainee_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('trainee_id')
+    )
+    op.create_index(op.f('ix_nutrition_goals_id'), 'nutrition_goals', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_nutrition_goals_id'), table_name='nutrition_goals')
+    op.drop_table('nutrition_goals')
@@ -0,0 +1,52 @@
+"""Add finance_daily_totals running ledger, backfilled from payments
+
+Revision ID: e9f0a1b2c3d4
+Revises: d8e9f0a1b2c3
+Create Date: 2026-02-12 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e9f0a1b2c3d4'
+down_revision = 'd8e9f0a1b2c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'finance_daily_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('payment_mode', sa.String(length=50), nullable=False),
+        sa.Column('provider', sa.String(length=50), nullable=False),
+        sa.Column('payment_count', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('refund_count', sa.Integer(), nullable=False),
+        sa.Column('refund_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_finance_daily_totals_key', 'finance_daily_totals',
+        ['day', 'status', 'payment_mode', 'provider'], unique=True,
+    )
+    # Same grouping as services/finance_ledger.reconcile_finance_ledger
+    op.execute("""
+        INSERT INTO finance_daily_totals
+            (day, status, payment_mode, provider, payment_count, amount, refund_count, refund_amount)
+        SELECT (created_at AT TIME ZONE 'UTC')::date,
+               COALESCE(status, ''), COALESCE(payment_mode, ''), COALESCE(provider, ''),
+               COUNT(*), COALESCE(SUM(amount), 0),
+               COUNT(*) FILTER (WHERE refund_amount <> 0), COALESCE(SUM(refund_amount), 0)
+        FROM payments
+        WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_finance_daily_totals_key', table_name='finance_daily_totals')
+    op.drop_table('finance_daily_totals')
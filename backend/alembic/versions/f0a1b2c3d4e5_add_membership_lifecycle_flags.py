@@ -0,0 +1,32 @@
+"""Add membership expiring_soon / reminder flags and lifecycle indexes
+
+Revision ID: f0a1b2c3d4e5
+Revises: e9f0a1b2c3d4
+Create Date: 2026-02-14 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f0a1b2c3d4e5'
+down_revision = 'e9f0a1b2c3d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('memberships', sa.Column('expiring_soon', sa.Boolean(), server_default=sa.text('false'), nullable=False))
+    op.add_column('memberships', sa.Column('expiry_reminder_sent_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_memberships_trainee_status', 'memberships', ['trainee_id', 'status'], unique=False)
+    op.create_index(
+        'ix_memberships_active_end_date', 'memberships', ['end_date'], unique=False,
+        postgresql_where=sa.text("status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_memberships_active_end_date', table_name='memberships')
+    op.drop_index('ix_memberships_trainee_status', table_name='memberships')
+    op.drop_column('memberships', 'expiry_reminder_sent_at')
+    op.drop_column('memberships', 'expiring_soon')
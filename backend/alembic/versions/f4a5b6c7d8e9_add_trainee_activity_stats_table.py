@@ -0,0 +1,39 @@
+"""Add trainee_activity_stats table
+
+Revision ID: f4a5b6c7d8e9
+Revises: e3f4a5b6c7d8
+Create Date: 2026-02-06 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f4a5b6c7d8e9'
+down_revision = 'e3f4a5b6c7d8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Streaks/totals per trainee; backfill with `python rebuild_activity_stats.py`
+    op.create_table(
+        'trainee_activity_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('trainee_id', sa.Integer(), nullable=False),
+        sa.Column('current_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('best_streak', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_active_date', sa.Date(), nullable=True),
+        sa.Column('total_workouts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_active_days', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['trainee_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('trainee_id')
+    )
+    op.create_index(op.f('ix_trainee_activity_stats_id'), 'trainee_activity_stats', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_trainee_activity_stats_id'), table_name='trainee_activity_stats')
+    op.drop_table('trainee_activity_stats')
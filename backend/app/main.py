@@ -41,8 +41,16 @@ from app.routers.payments import router as payments_router
 from app.routers.payouts import router as payouts_router
 from app.routers.progress import router as progress_router
 from app.routers.nutrition_tracker_enhanced import router as nutrition_router_enhanced
+from app.routers.attendance import router as attendance_router
 from app.routers import profile
 from app.routers import feedback
+from app.services.food_recognizer import load_food_recognizer
+from app.services.occupancy import start_occupancy_tracking
+from app.services.attendance_sweeper import start_attendance_sweeper
+# Also registers the Session hook that keeps finance_daily_totals in step with payments
+from app.services.finance_ledger import start_finance_reconciler
+from app.services.membership_lifecycle import start_membership_lifecycle
+from app.services.scheduler import stop_all_jobs
 
 
 app = FastAPI(
@@ -106,6 +114,7 @@ app.include_router(chat_router, prefix="/api/chat", tags=["Chat"])
 app.include_router(billing_router, prefix="/api/admin", tags=["Billing & Finance"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
 app.include_router(feedback.router, prefix="/api/feedback", tags=["feedback"])
+app.include_router(attendance_router, prefix="/api/attendance", tags=["Attendance"])
 
 # Payments router for gateway integration
 app.include_router(payments_router)
@@ -115,6 +124,29 @@ app.include_router(payouts_router)
 app.include_router(chat_socket_router)
 
 
+@app.on_event("startup")
+def load_models():
+    # Load the food recognizer once so the first meal upload doesn't pay for it
+    load_food_recognizer()
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    # Close previous days' open visits, then seed the live occupancy counter;
+    # both keep running periodically (see services/scheduler.py)
+    start_attendance_sweeper()
+    start_occupancy_tracking()
+    # Verify (and backfill) the finance ledger against payments
+    start_finance_reconciler()
+    # Expire memberships, flag those expiring soon and send reminders
+    start_membership_lifecycle()
+
+
+@app.on_event("shutdown")
+def stop_background_jobs():
+    stop_all_jobs()
+
+
 @app.get("/")
 async def root():
     return {
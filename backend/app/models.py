@@ -10,10 +10,10 @@ import enum
 
 from sqlalchemy import (
     Column, Integer, String, Boolean, Float,
-    Date, DateTime, ForeignKey, Text, JSON
+    Date, DateTime, ForeignKey, Text, JSON, Index
 )
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.types import Enum as SQLEnum
 
 # ==========================
@@ -81,7 +81,7 @@ class AdminSettings(Base):
     __tablename__ = "admin_settings"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
     
     # Gym Information
     gym_name = Column(String(255), default="FitMate Pro Gym")
@@ -129,7 +129,7 @@ class Trainer(Base):
     __tablename__ = "trainers"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
 
     # Basic info
     specialization = Column(String(200))
@@ -182,7 +182,7 @@ class TrainerAttendance(Base):
     __tablename__ = "trainer_attendance"
 
     id = Column(Integer, primary_key=True)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=False)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     date = Column(Date, default=date.today)
     check_in = Column(DateTime, nullable=True)
@@ -194,7 +194,7 @@ class TrainerAttendance(Base):
     notes = Column(Text, nullable=True)
     leave_reason = Column(String(200), nullable=True)
 
-    approved_by = Column(Integer, ForeignKey("users.id"))
+    approved_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True)
     approved_at = Column(DateTime)
 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -208,8 +208,8 @@ class TrainerSchedule(Base):
     __tablename__ = "trainer_schedules"
 
     id = Column(Integer, primary_key=True)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=False)
-    trainee_id = Column(Integer, ForeignKey("trainees.id"), nullable=True)  # Assigned trainee
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
+    trainee_id = Column(Integer, ForeignKey("trainees.id", ondelete="SET NULL"), nullable=True, index=True)  # Assigned trainee
 
     day_of_week = Column(Integer, nullable=False)
     start_time = Column(Time, nullable=False)
@@ -232,7 +232,7 @@ class TrainerSalary(Base):
     __tablename__ = "trainer_salaries"
 
     id = Column(Integer, primary_key=True)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=False)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     salary_model = Column(String(20), default="fixed")
 
@@ -275,8 +275,8 @@ class PTSession(Base):
 
     id = Column(Integer, primary_key=True)
 
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=False)
-    trainee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     package_id = Column(Integer, ForeignKey("pt_packages.id"))
 
     session_date = Column(DateTime, nullable=False)
@@ -299,7 +299,7 @@ class TrainerDocument(Base):
     __tablename__ = "trainer_documents"
 
     id = Column(Integer, primary_key=True)
-    trainer_id = Column(String(36), ForeignKey("trainers.id"), nullable=False)
+    trainer_id = Column(String(36), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     document_type = Column(String(50), nullable=False)
     document_name = Column(String(200), nullable=False)
@@ -312,7 +312,7 @@ class TrainerDocument(Base):
     expiry_date = Column(Date)
 
     is_verified = Column(Boolean, default=False)
-    verified_by = Column(Integer, ForeignKey("users.id"))
+    verified_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), index=True)
     verified_at = Column(DateTime)
 
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -326,7 +326,7 @@ class TrainerLeave(Base):
     __tablename__ = "trainer_leaves"
 
     id = Column(Integer, primary_key=True)
-    trainer_id = Column(String(36), ForeignKey("trainers.id"), nullable=False)
+    trainer_id = Column(String(36), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=False, index=True)
 
     leave_type = Column(String(50), nullable=False)
     start_date = Column(Date, nullable=False)
@@ -335,7 +335,7 @@ class TrainerLeave(Base):
     reason = Column(Text, nullable=False)
     status = Column(String(20), default="pending")
 
-    approved_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    approved_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, index=True)
     approved_at = Column(DateTime, nullable=True)
     rejection_reason = Column(Text, nullable=True)
 
@@ -355,10 +355,10 @@ class Trainee(Base):
     __tablename__ = "trainees"
 
     id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
 
     # trainer_id must match Trainer.id (UUID)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"))
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="SET NULL"), index=True)
 
     # Fitness info
     goal = Column(String(100))
@@ -395,7 +395,7 @@ class AdminSession(Base):
     __tablename__ = "admin_sessions"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     ip_address = Column(String(50), nullable=False)
     user_agent = Column(String(500), nullable=True)
 
@@ -420,7 +420,7 @@ class Workout(Base):
     __tablename__ = "workouts"
 
     id = Column(Integer, primary_key=True)
-    trainee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
 
     exercise_type = Column(String(100))
     start_time = Column(DateTime(timezone=True), server_default=func.now())
@@ -435,10 +435,37 @@ class Workout(Base):
     trainee = relationship("User", back_populates="workouts")
     ai_reports = relationship("AIReport", back_populates="workout")
 
+    __table_args__ = (
+        Index("ix_workouts_trainee_start", "trainee_id", "start_time"),
+    )
+
     def __repr__(self):
         return f"<Workout {self.id}>"
 
 
+# ==========================
+# TRAINEE ACTIVITY STATS
+# ==========================
+
+class TraineeActivityStats(Base):
+    """Per-trainee workout streaks and totals, updated as workouts are added or removed."""
+    __tablename__ = "trainee_activity_stats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
+
+    current_streak = Column(Integer, nullable=False, default=0)  # run of days ending at last_active_date
+    best_streak = Column(Integer, nullable=False, default=0)
+    last_active_date = Column(Date, nullable=True)
+    total_workouts = Column(Integer, nullable=False, default=0)
+    total_active_days = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<TraineeActivityStats trainee={self.trainee_id} streak={self.current_streak}>"
+
+
 # ==========================
 # AI REPORT
 # ==========================
@@ -452,8 +479,8 @@ class AIReport(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    trainee_id = Column(Integer, ForeignKey("trainees.id"), nullable=False)
-    workout_id = Column(Integer, ForeignKey("workouts.id"), nullable=True)
+    trainee_id = Column(Integer, ForeignKey("trainees.id", ondelete="CASCADE"), nullable=False, index=True)
+    workout_id = Column(Integer, ForeignKey("workouts.id", ondelete="CASCADE"), nullable=True, index=True)
 
     report_type = Column(String(50), nullable=False)
     report_json = Column(JSON, nullable=False)
@@ -491,6 +518,10 @@ class Measurement(Base):
 
     trainee = relationship("User", back_populates="measurements")
 
+    __table_args__ = (
+        Index("ix_measurements_trainee_date", "trainee_id", "date"),
+    )
+
     def __repr__(self):
         return f"<Measurement {self.id}>"
 
@@ -503,7 +534,7 @@ class DietPlan(Base):
     __tablename__ = "diet_plans"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     plan_json = Column(JSON, nullable=False)
     start_date = Column(DateTime(timezone=True), server_default=func.now())
     end_date = Column(DateTime(timezone=True))
@@ -527,6 +558,11 @@ class NutritionLog(Base):
     date = Column(DateTime(timezone=True), server_default=func.now())
     item = Column(String(200), nullable=False)
     calories = Column(Float, nullable=False)
+    # Typed macros for SQL aggregation (macros_json keeps the full payload)
+    protein = Column(Float, nullable=False, default=0, server_default="0")
+    carbs = Column(Float, nullable=False, default=0, server_default="0")
+    fats = Column(Float, nullable=False, default=0, server_default="0")
+    fiber = Column(Float, nullable=False, default=0, server_default="0")
     macros_json = Column(JSON)
     image_url = Column(String(500))
     confidence = Column(Float, default=0.0)
@@ -536,10 +572,52 @@ class NutritionLog(Base):
 
     trainee = relationship("User", back_populates="nutrition_logs")
 
+    __table_args__ = (
+        Index("ix_nutrition_logs_trainee_date", "trainee_id", "date"),
+    )
+
     def __repr__(self):
         return f"<NutritionLog {self.id}>"
 
 
+# ==========================
+# NUTRITION GOALS
+# ==========================
+
+class NutritionGoal(Base):
+    """Computed daily nutrition goals per trainee, refreshed when the inputs change."""
+    __tablename__ = "nutrition_goals"
+
+    id = Column(Integer, primary_key=True, index=True)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
+
+    # Inputs
+    weight = Column(Float, nullable=False)
+    height = Column(Float, nullable=False)
+    age = Column(Integer, nullable=False)
+    gender = Column(String(20), nullable=False)
+    activity_level = Column(String(20), nullable=False, default="moderate")  # low, moderate, high
+    fitness_goal = Column(String(20), nullable=False, default="maintain")  # lose, maintain, gain
+
+    # Computed goals
+    calories = Column(Float, nullable=False)
+    protein = Column(Float, nullable=False)
+    carbs = Column(Float, nullable=False)
+    fats = Column(Float, nullable=False)
+    fiber = Column(Float, nullable=False)
+    water_liters = Column(Float, nullable=False)
+    tdee = Column(Float, nullable=False)
+    bmr = Column(Float, nullable=False)
+
+    # Inputs the trainee set explicitly; profile-derived values never replace them
+    user_set_fields = Column(JSON, nullable=False, default=list, server_default="[]")
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<NutritionGoal trainee={self.trainee_id} calories={self.calories}>"
+
+
 # ==========================
 # PAYMENT
 # ==========================
@@ -548,12 +626,14 @@ class Payment(Base):
     __tablename__ = "payments"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     amount = Column(Float, nullable=False)
     provider = Column(String(50), nullable=False)
     status = Column(String(20), default="pending", index=True)
-    transaction_id = Column(String(200))
+    transaction_id = Column(String(200), index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Plan the order was created for; finalization applies this plan, not the client's
+    plan_id = Column(Integer, ForeignKey("membership_plans.id", ondelete="SET NULL"), nullable=True, index=True)
 
     trainee = relationship("User", back_populates="payments")
     receipt_number = Column(String, unique=True, index=True, nullable=True)
@@ -568,6 +648,48 @@ class Payment(Base):
         return f"<Payment {self.id}>"
 
 
+class PaymentIdempotencyKey(Base):
+    """One row per payment finalization attempt key; replays return the stored response."""
+    __tablename__ = "payment_idempotency_keys"
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(200), unique=True, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    payment_id = Column(Integer, ForeignKey("payments.id", ondelete="SET NULL"), nullable=True)
+    response_json = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<PaymentIdempotencyKey {self.key}>"
+
+
+class FinanceDailyTotal(Base):
+    """
+    Running per-day payment totals by status / mode / provider, kept in step
+    with `payments` on every flush (see services/finance_ledger.py).
+    Day is the UTC date of Payment.created_at.
+    """
+    __tablename__ = "finance_daily_totals"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    status = Column(String(20), nullable=False, default="")
+    payment_mode = Column(String(50), nullable=False, default="")
+    provider = Column(String(50), nullable=False, default="")
+    payment_count = Column(Integer, nullable=False, default=0)
+    amount = Column(Float, nullable=False, default=0)
+    refund_count = Column(Integer, nullable=False, default=0)
+    refund_amount = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("uq_finance_daily_totals_key", "day", "status", "payment_mode", "provider", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<FinanceDailyTotal {self.day} {self.status}>"
+
+
 # ==========================
 # MEMBERSHIP
 # ==========================
@@ -584,9 +706,17 @@ class Membership(Base):
     price = Column(Float, nullable=False)
     auto_renew = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Maintained by services/membership_lifecycle.py: active and ending within the notice window
+    expiring_soon = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    expiry_reminder_sent_at = Column(DateTime(timezone=True), nullable=True)
 
     trainee = relationship("User", back_populates="memberships")
 
+    __table_args__ = (
+        Index("ix_memberships_trainee_status", "trainee_id", "status"),
+        Index("ix_memberships_active_end_date", "end_date", postgresql_where=text("status = 'active'")),
+    )
+
     def __repr__(self):
         return f"<Membership {self.id}>"
 
@@ -599,8 +729,8 @@ class WorkoutPlan(Base):
     __tablename__ = "workout_plans"
 
     id = Column(Integer, primary_key=True)
-    trainee_id = Column(Integer, ForeignKey("users.id"))
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"))
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), index=True)
 
     plan_name = Column(String(200))
     plan_json = Column(JSON)
@@ -624,7 +754,7 @@ class Attendance(Base):
     __tablename__ = "attendance"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     check_in_time = Column(DateTime(timezone=True), server_default=func.now())
     check_out_time = Column(DateTime(timezone=True))
     duration_minutes = Column(Integer)
@@ -633,6 +763,14 @@ class Attendance(Base):
 
     trainee = relationship("User", back_populates="attendance_records")
 
+    __table_args__ = (
+        # At most one open app check-in per trainee; check-in inserts ON CONFLICT against it
+        Index(
+            "uq_attendance_open_app_visit", "trainee_id", unique=True,
+            postgresql_where=text("check_out_time IS NULL AND check_in_method = 'app'")
+        ),
+    )
+
     def __repr__(self):
         return f"<Attendance {self.id}>"
 
@@ -677,7 +815,7 @@ class GymScheduleSlot(Base):
     slot_type = Column(String(50), default="general")  # general, class, personal_training
     title = Column(String(200))                        # e.g., "Morning Session", "Yoga Class"
     description = Column(Text)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=True)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="SET NULL"), nullable=True, index=True)
     max_capacity = Column(Integer, default=0)          # 0 = unlimited
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -717,7 +855,7 @@ class ProgressPhoto(Base):
     __tablename__ = "progress_photos"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     photo_type = Column(String(50), nullable=False)
     image_url = Column(String(500), nullable=False)
     date_taken = Column(DateTime(timezone=True), server_default=func.now())
@@ -743,11 +881,11 @@ class TrainerMessage(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    trainee_id = Column(Integer, ForeignKey("trainees.id"), nullable=False)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"), nullable=True)
+    trainee_id = Column(Integer, ForeignKey("trainees.id", ondelete="CASCADE"), nullable=False, index=True)
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), nullable=True, index=True)
 
-    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
 
     message = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -770,11 +908,12 @@ class TrainerRevenue(Base):
     __tablename__ = "trainer_revenue"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id"))
+    trainer_id = Column(UUID(as_uuid=True), ForeignKey("trainers.id", ondelete="CASCADE"), index=True)
     amount = Column(Float)
     source = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     paid_at = Column(DateTime, default=datetime.utcnow)  # Added field for payout date
+    notes = Column(String, nullable=True)
 
     trainer = relationship("Trainer", back_populates="revenue_records")
 
@@ -790,7 +929,7 @@ class ProgressMeasurement(Base):
     __tablename__ = "progress_measurements"
 
     id = Column(Integer, primary_key=True, index=True)
-    trainee_id = Column(Integer, ForeignKey("users.id"))
+    trainee_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     date = Column(Date, default=date.today)
 
     weight = Column(Float)
@@ -818,7 +957,7 @@ class AdminOTP(Base):
     __tablename__ = "admin_otp"
 
     id = Column(Integer, primary_key=True)
-    admin_id = Column(Integer, ForeignKey("users.id"))
+    admin_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
     otp = Column(String(6))
     expires_at = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -834,8 +973,8 @@ class Message(Base):
     __tablename__ = "messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    receiver_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    sender_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    receiver_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False, index=True)
     read_at = Column(DateTime(timezone=True), nullable=True)  # Timestamp when message was marked as read
@@ -855,7 +994,7 @@ class Notification(Base):
     __tablename__ = "notifications"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     
     title = Column(String(200), nullable=False)
     message = Column(Text, nullable=False)
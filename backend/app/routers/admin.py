@@ -1,11 +1,12 @@
 
 # ====================== IMPORTS ======================
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Body
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Body, Request, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from datetime import datetime, timedelta, date
+from datetime import datetime, timedelta
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from uuid import UUID
@@ -30,25 +31,23 @@ from app.models import (
     TrainerSalary,       # ✅ Import TrainerSalary for trainer creation
     Message,             # ✅ Import Message for deletion
     Notification,        # ✅ Import Notification for admin notifications
-    # Models for deletion
-    AIReport,
-    Measurement,
-    ProgressMeasurement,
-    NutritionLog,
-    DietPlan,
     WorkoutPlan,
-    Attendance,
-    ProgressPhoto,
     AdminSession,
-    TrainerSchedule,
     TrainerAttendance,
-    # TrainerDocument,     # ❌ Removed - schema mismatch, using raw SQL instead
-    # TrainerLeave,        # ❌ Removed - schema mismatch, using raw SQL instead
-    TrainerMessage,      # ✅ Import TrainerMessage for deletion
-    PTSession,           # ✅ Import PTSession for deletion
-    GymScheduleSlot,     # ✅ Import GymScheduleSlot for deletion
+    PTSession,
+    GymScheduleSlot,
 )
 from app.auth_util import get_admin_user, get_password_hash
+from app.services.erasure import erase_users, get_erasure_job, start_erasure_job
+from app.services.finance_ledger import (
+    completed_revenue,
+    finance_summary as ledger_finance_summary,
+    reconcile_days,
+    reconcile_finance_ledger as reconcile_ledger,
+)
+from app.services.payment_ledger import ledger_page
+from app.services.plan_analytics import cached_plan_analytics, clear_plan_analytics_cache
+from app.services.receipts import ensure_receipt, receipt_response, render_completed_receipt, render_receipts_for_month
 
 # ====================== SCHEMAS ======================
 
@@ -423,7 +422,6 @@ async def get_live_dashboard(
     now = datetime.utcnow()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
     thirty_days_ago = now - timedelta(days=30)
-    seven_days_from_now = now + timedelta(days=7)
     
     # Standard metrics
     total_members = db.query(User).filter(User.role == UserRole.TRAINEE).count()
@@ -482,12 +480,12 @@ async def get_live_dashboard(
         .scalar() or 0
     )
     
-    # NEW: Expiring memberships (next 7 days)
+    # NEW: Expiring memberships (next 7 days), flagged by services/membership_lifecycle.py
     expiring_memberships = (
         db.query(Membership)
         .filter(
-            Membership.end_date.between(now, seven_days_from_now),
-            Membership.status == "active"
+            Membership.status == "active",
+            Membership.expiring_soon == True
         )
         .count()
     )
@@ -534,23 +532,12 @@ async def get_live_dashboard(
     
 @router.get("/dashboard/top-plans")
 async def get_top_plans(
+    refresh: bool = Query(False, description="Bypass the short-lived plan analytics cache"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    plans = db.query(MembershipPlan).all()
-    result = []
-    for plan in plans:
-        purchase_count = db.query(Membership).filter(Membership.membership_type == plan.membership_type).count()
-        revenue = db.query(func.sum(Payment.amount)).filter(Payment.status == "completed", Payment.provider == plan.name).scalar() or 0
-        renewals = db.query(Membership).filter(Membership.membership_type == plan.membership_type, Membership.status == "active").count()
-        renewal_rate = (renewals / purchase_count) if purchase_count else 0
-        result.append({
-            "name": plan.name,
-            "purchase_count": purchase_count,
-            "revenue": revenue,
-            "renewal_rate": renewal_rate,
-        })
-    return {"top_plans": result}
+    # Grouped queries for all plans at once (services/plan_analytics.py)
+    return {"top_plans": cached_plan_analytics(db, refresh=refresh)}
 
 
 @router.get("/dashboard/ai-suggestions")
@@ -727,44 +714,8 @@ async def get_complete_dashboard(
         )
         
         # ===== TOP PLANS - OPTIMIZED =====
-        # Get all membership type counts in one query
-        membership_counts = dict(
-            db.query(Membership.membership_type, func.count(Membership.id))
-            .group_by(Membership.membership_type)
-            .all()
-        )
-        
-        active_counts = dict(
-            db.query(Membership.membership_type, func.count(Membership.id))
-            .filter(Membership.status == "active")
-            .group_by(Membership.membership_type)
-            .all()
-        )
-        
-        # Get revenue by plan name in one query
-        plan_revenues = dict(
-            db.query(Payment.provider, func.sum(Payment.amount))
-            .filter(Payment.status == "completed")
-            .group_by(Payment.provider)
-            .all()
-        )
-        
-        plans = db.query(MembershipPlan).all()
-        top_plans = []
-        for plan in plans:
-            try:
-                purchase_count = membership_counts.get(plan.membership_type, 0)
-                revenue = plan_revenues.get(plan.name, 0) or 0
-                renewals = active_counts.get(plan.membership_type, 0)
-                renewal_rate = (renewals / purchase_count) if purchase_count else 0
-                top_plans.append({
-                    "name": plan.name,
-                    "purchase_count": purchase_count,
-                    "revenue": float(revenue),
-                    "renewal_rate": float(renewal_rate),
-                })
-            except Exception as e:
-                print(f"Error processing plan {plan.name}: {e}")
+        # Shared with /dashboard/top-plans: grouped queries, cached briefly
+        top_plans = cached_plan_analytics(db)
         
         
         # ===== NOTIFICATIONS =====
@@ -910,8 +861,8 @@ async def get_complete_dashboard(
 # Summary endpoint for payouts and payments
 @router.get("/billing/summary")
 async def get_billing_summary(current_user: User = Depends(get_admin_user), db: Session = Depends(get_db)):
-    total_trainee_payments = db.query(func.sum(Payment.amount)).filter(Payment.status == "completed").scalar() or 0
-    total_trainer_payouts = db.query(func.sum(TrainerRevenue.amount)).scalar() or 0
+    total_trainee_payments, _ = completed_revenue(db)
+    total_trainer_payouts = float(db.query(func.sum(TrainerRevenue.amount)).scalar() or 0)
     outstanding_balance = total_trainee_payments - total_trainer_payouts
     return {
         "total_trainee_payments": total_trainee_payments,
@@ -931,27 +882,9 @@ async def get_billing_summary(
     - monthly_revenue (last 30 days)
     - trainer_payouts (sum of TrainerRevenue)
     - outstanding_balance (revenue - payouts)
+    Revenue comes from the per-day finance ledger.
     """
-
-    now = datetime.utcnow()
-    thirty_days_ago = now - timedelta(days=30)
-
-    total_revenue = (
-        db.query(func.sum(Payment.amount))
-        .filter(Payment.status == "completed")
-        .scalar()
-        or 0
-    )
-
-    monthly_revenue = (
-        db.query(func.sum(Payment.amount))
-        .filter(
-            Payment.status == "completed",
-            Payment.created_at >= thirty_days_ago,
-        )
-        .scalar()
-        or 0
-    )
+    total_revenue, monthly_revenue = completed_revenue(db, days=30)
 
     trainer_payouts = (
         db.query(func.sum(TrainerRevenue.amount))
@@ -971,81 +904,26 @@ async def get_billing_summary(
 
 @router.get("/billing/payments")
 async def list_payments(
-    mode: Optional[str] = Query(None, description="cash / upi / card"),
-    status: Optional[str] = Query(None, description="pending / completed / failed"),
-    search: Optional[str] = Query(None, description="search by email or receipt"),
+    mode: Optional[str] = Query(None, description="cash / upi / card / bank_transfer"),
+    status: Optional[str] = Query(None, description="pending / completed / failed / paid"),
+    search: Optional[str] = Query(None, description="search by email, receipt or trainer name"),
+    type: Optional[str] = Query(None, description="trainee_payment / trainer_payout"),
     limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """
-    Admin: List payments with filters
-    - mode: payment_mode (cash / upi / card)
-    - status: pending / completed / failed
-    - search: trainee email OR receipt number (contains)
+    Admin: Unified ledger of trainee payments and trainer payouts, newest first
+    - mode: payment_mode (payouts are bank_transfer)
+    - status: payment status (payouts are paid)
+    - search: trainee email / receipt number, or trainer name / email (contains)
+    - cursor: pass next_cursor from the previous page to continue
     """
-
-    q = db.query(Payment).join(User, User.id == Payment.trainee_id)
-
-    if mode:
-        q = q.filter(Payment.payment_mode == mode.lower())
-
-    if status:
-        q = q.filter(Payment.status == status)
-
-    if search:
-        search_like = f"%{search.lower()}%"
-        q = q.filter(
-            func.lower(User.email).like(search_like)
-            | func.lower(Payment.receipt_number).like(search_like)
-        )
-
-    payments = (
-        q.order_by(Payment.created_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    # Get trainer payouts
-    trainer_payouts = db.query(TrainerRevenue).order_by(TrainerRevenue.paid_at.desc()).limit(limit).all()
-
-    result = []
-    for p in payments:
-        trainee = p.trainee  # relationship to User
-        result.append({
-            "id": p.id,
-            "type": "trainee_payment",
-            "amount": float(p.amount or 0),
-            "status": p.status,
-            "payment_mode": p.payment_mode,
-            "provider": p.provider,
-            "trainee_email": trainee.email if trainee else None,
-            "user_email": trainee.email if trainee else None,
-            "receipt_number": p.receipt_number,
-            "receipt_pdf_url": p.receipt_pdf_url,
-            "is_refund": p.is_refund,
-            "refund_amount": float(p.refund_amount or 0) if p.refund_amount is not None else None,
-            "created_at": p.created_at.isoformat() if p.created_at else None,
-        })
-
-    for payout in trainer_payouts:
-        trainer = db.query(Trainer).filter(Trainer.id == payout.trainer_id).first()
-        result.append({
-            "id": payout.id,
-            "type": "trainer_payout",
-            "amount": float(payout.amount or 0),
-            "status": "paid",
-            "payment_mode": "bank_transfer",
-            "provider": "admin",
-            "trainer_id": payout.trainer_id,
-            "trainer_name": trainer.user.name if trainer and trainer.user else None,
-            "notes": payout.notes,
-            "paid_at": payout.paid_at.isoformat() if payout.paid_at else None,
-        })
-
-    # Sort all by date descending
-    result.sort(key=lambda x: x.get("created_at") or x.get("paid_at"), reverse=True)
-    return {"payments": result}
+    try:
+        return ledger_page(db, limit, cursor, mode=mode, status=status, search=search, entry_type=type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/billing/refund")
 async def refund_payment(
@@ -1103,6 +981,9 @@ async def create_manual_payment(
         if not trainee:
             raise HTTPException(status_code=404, detail="Trainee profile not found for this user")
         
+        # Attribute the payment to the plan it pays for (plan analytics revenue)
+        plan = db.query(MembershipPlan).filter(MembershipPlan.id == membership_plan_id).first() if membership_plan_id else None
+        
         # Generate receipt number if not provided
         if not transaction_id:
             transaction_id = f"REC-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000, 9999)}"
@@ -1116,12 +997,14 @@ async def create_manual_payment(
             transaction_id=transaction_id,
             provider=f"Manual by {current_user.name}",
             notes=notes,
-            receipt_number=transaction_id
+            receipt_number=transaction_id,
+            plan_id=plan.id if plan else None,
         )
         
         db.add(payment)
         db.commit()
         db.refresh(payment)
+        await run_in_threadpool(render_completed_receipt, db, payment)
         
         return {
             "success": True,
@@ -1138,188 +1021,37 @@ async def create_manual_payment(
 @router.get("/billing/receipt/{payment_id}")
 async def get_receipt(
     payment_id: int,
+    request: Request,
+    regenerate: bool = Query(False, description="Re-render even if a stored receipt exists"),
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     """
-    Admin: Generate and download receipt PDF for manual billing
-    This generates a clean, professional PDF receipt on-the-fly
+    Admin: Download the receipt PDF for a payment
+    Receipts are rendered once and stored content-addressed (see app.services.receipts);
+    supports ETag revalidation and byte ranges
     """
-    from reportlab.lib.pagesizes import letter, A4
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import inch
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib import colors
-    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
-    from reportlab.pdfbase import pdfmetrics
-    from reportlab.pdfbase.ttfonts import TTFont
-    
     payment = db.query(Payment).filter(Payment.id == payment_id).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
+    if payment.status != "completed":
+        raise HTTPException(status_code=409, detail="Receipts are only issued for completed payments")
     
-    # Get trainee details
-    trainee_name = "N/A"
-    trainee_email = ""
-    trainee_phone = ""
-    if payment.trainee_id:
-        trainee = db.query(User).filter(User.id == payment.trainee_id).first()
-        if trainee:
-            trainee_name = trainee.name
-            trainee_email = trainee.email
-            trainee_phone = trainee.phone or ""
-    
-    # Create PDF in memory
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, 
-                           rightMargin=72, leftMargin=72,
-                           topMargin=72, bottomMargin=18)
-    
-    # Container for PDF elements
-    elements = []
-    styles = getSampleStyleSheet()
-    
-    # Use Rs. instead of ₹ symbol for better PDF compatibility
-    def format_currency(amount):
-        return f"Rs. {amount:,.2f}"
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#374151'),
-        spaceAfter=12
-    )
-    
-    # Title - Updated to Omkar Fitness Gym
-    title = Paragraph("<b>OMKAR FITNESS GYM</b>", title_style)
-    elements.append(title)
-    
-    subtitle = Paragraph("Payment Receipt", styles['Heading2'])
-    elements.append(subtitle)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Receipt Info Table
-    receipt_data = [
-        ['Receipt No:', payment.receipt_number or f'REC-{payment.id}'],
-        ['Date:', payment.created_at.strftime('%d %b %Y, %I:%M %p') if payment.created_at else 'N/A'],
-        ['Status:', payment.status.upper()],
-    ]
-    
-    receipt_table = Table(receipt_data, colWidths=[2*inch, 4*inch])
-    receipt_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-    ]))
-    
-    elements.append(receipt_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Customer Details
-    elements.append(Paragraph("<b>Customer Details</b>", heading_style))
-    customer_data = [
-        ['Name:', trainee_name],
-        ['Email:', trainee_email],
-        ['Phone:', trainee_phone],
-    ]
-    
-    customer_table = Table(customer_data, colWidths=[2*inch, 4*inch])
-    customer_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-    ]))
-    
-    elements.append(customer_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Payment Details
-    elements.append(Paragraph("<b>Payment Details</b>", heading_style))
-    payment_details_data = [
-        ['Description', 'Amount'],
-        [payment.provider or 'Manual by Admin', format_currency(payment.amount)],
-        ['Payment Mode', payment.payment_mode or 'cash'],
-        ['Transaction ID', payment.receipt_number or f'MAN-{payment.id}'],
-    ]
-    
-    payment_details_table = Table(payment_details_data, colWidths=[4*inch, 2*inch])
-    payment_details_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
-    ]))
-    
-    elements.append(payment_details_table)
-    elements.append(Spacer(1, 0.3*inch))
-    
-    # Total Amount
-    total_data = [['TOTAL AMOUNT', format_currency(payment.amount)]]
-    total_table = Table(total_data, colWidths=[4*inch, 2*inch])
-    total_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#10b981')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 14),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-    ]))
-    
-    elements.append(total_table)
-    elements.append(Spacer(1, 0.5*inch))
-    
-    # Footer
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=9,
-        textColor=colors.HexColor('#6b7280'),
-        alignment=TA_CENTER
-    )
-    
-    footer_text = """
-    <br/><br/>
-    <b>Thank you for choosing Omkar Fitness Gym!</b><br/>
-    This is a computer-generated receipt and does not require a signature.<br/>
-    For queries, contact: support@omkarfitness.com | +91-XXXX-XXXXXX
-    """
-    elements.append(Paragraph(footer_text, footer_style))
-    
-    # Build PDF
-    doc.build(elements)
-    buffer.seek(0)
-    
-    # Return PDF as downloadable file
+    path = await run_in_threadpool(ensure_receipt, db, payment, regenerate)
     filename = f"Omkar_Fitness_Receipt_{payment.receipt_number or payment.id}.pdf"
-    return StreamingResponse(
-        buffer,
-        media_type="application/pdf",
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
-    )
+    return receipt_response(request, path, filename)
+
+
+@router.post("/billing/receipts/render")
+async def render_monthly_receipts(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    regenerate: bool = Query(False, description="Re-render receipts that are already stored"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Admin: Pre-render all completed payments' receipts for a month on a process pool"""
+    return await run_in_threadpool(render_receipts_for_month, db, year, month, regenerate)
 
 
 # ====================== ADMIN SESSIONS ======================
@@ -1577,98 +1309,8 @@ async def delete_user(
         if user.role == UserRole.ADMIN:
             raise HTTPException(status_code=403, detail="Cannot delete admin users")
         
-        # Permanently delete user and all related data
-        # IMPORTANT: Delete in correct order to avoid foreign key constraint errors
-        
-        # 1. Get trainee profile first (needed for AIReport and TrainerMessage)
-        trainee = db.query(Trainee).filter(Trainee.user_id == user_id).first()
-        
-        # 2. Delete trainer messages (references trainee.id and trainer.id)
-        if trainee:
-            db.query(TrainerMessage).filter(
-                (TrainerMessage.trainee_id == trainee.id) | 
-                (TrainerMessage.sender_id == user_id) | 
-                (TrainerMessage.receiver_id == user_id)
-            ).delete(synchronize_session=False)
-        
-        # 3. Delete AI reports (references trainee.id, not user.id)
-        if trainee:
-            db.query(AIReport).filter(AIReport.trainee_id == trainee.id).delete(synchronize_session=False)
-        
-        # 4. Delete workouts (references user.id)
-        db.query(Workout).filter(Workout.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 5. Delete measurements
-        db.query(Measurement).filter(Measurement.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 6. Delete progress measurements
-        db.query(ProgressMeasurement).filter(ProgressMeasurement.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 7. Delete nutrition logs
-        db.query(NutritionLog).filter(NutritionLog.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 8. Delete diet plans
-        db.query(DietPlan).filter(DietPlan.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 9. Delete workout plans
-        db.query(WorkoutPlan).filter(WorkoutPlan.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 10. Delete payments
-        db.query(Payment).filter(Payment.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 11. Delete memberships
-        db.query(Membership).filter(Membership.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 12. Delete attendance records
-        db.query(Attendance).filter(Attendance.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 13. Delete progress photos
-        db.query(ProgressPhoto).filter(ProgressPhoto.trainee_id == user_id).delete(synchronize_session=False)
-        
-        # 14. Delete messages (sent and received)
-        db.query(Message).filter(
-            (Message.sender_id == user_id) | (Message.receiver_id == user_id)
-        ).delete(synchronize_session=False)
-        
-        # 15. Delete admin sessions
-        db.query(AdminSession).filter(AdminSession.user_id == user_id).delete(synchronize_session=False)
-        
-        # 16. Delete trainer profile if exists (must be before user)
-        trainer = db.query(Trainer).filter(Trainer.user_id == user_id).first()
-        if trainer:
-            # Delete trainer-related data
-            db.query(TrainerRevenue).filter(TrainerRevenue.trainer_id == trainer.id).delete(synchronize_session=False)
-            db.query(TrainerSalary).filter(TrainerSalary.trainer_id == trainer.id).delete(synchronize_session=False)
-            db.query(TrainerSchedule).filter(TrainerSchedule.trainer_id == trainer.id).delete(synchronize_session=False)
-            db.query(TrainerAttendance).filter(TrainerAttendance.trainer_id == trainer.id).delete(synchronize_session=False)
-            
-            # Use raw SQL for tables with schema mismatches
-            from sqlalchemy import text
-            trainer_id_str = str(trainer.id)
-            try:
-                db.execute(text("DELETE FROM trainer_documents WHERE trainer_id = :tid"), {"tid": trainer_id_str})
-            except Exception:
-                pass  # Table may not exist or have schema mismatch
-            try:
-                db.execute(text("DELETE FROM trainer_leaves WHERE trainer_id = :tid"), {"tid": trainer_id_str})
-            except Exception:
-                pass  # Table may not exist or have schema mismatch
-            
-            # Update trainees assigned to this trainer (set trainer_id to NULL)
-            db.query(Trainee).filter(Trainee.trainer_id == trainer.id).update(
-                {Trainee.trainer_id: None},
-                synchronize_session=False
-            )
-            
-            # Delete trainer profile
-            db.delete(trainer)
-        
-        # 17. Delete trainee profile (must be before user)
-        if trainee:
-            db.delete(trainee)
-        
-        # 18. Finally, delete the user
-        db.delete(user)
+        # Profiles and all related rows go with the user (ON DELETE CASCADE)
+        erase_users(db, [user.id])
         
         db.commit()
         return {"message": "User and all related data deleted permanently"}
@@ -1683,6 +1325,60 @@ async def delete_user(
         raise HTTPException(status_code=500, detail=f"Error deleting user: {str(e)}")
 
 
+class BulkDeleteUsersRequest(BaseModel):
+    user_ids: List[int]
+    background: bool = False
+
+
+@router.post("/users/bulk-delete")
+def bulk_delete_users(
+    request: BulkDeleteUsersRequest,
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Permanently delete many users and all related data in one transaction.
+    With background=true the deletion runs as a job; poll
+    /users/erasure-jobs/{job_id} for progress.
+    """
+    if not request.user_ids:
+        raise HTTPException(status_code=400, detail="No user ids given")
+    if current_user.id in request.user_ids:
+        raise HTTPException(status_code=403, detail="Cannot delete your own account")
+    admins = db.query(User.id).filter(User.id.in_(request.user_ids), User.role == UserRole.ADMIN).all()
+    if admins:
+        raise HTTPException(
+            status_code=403,
+            detail=f"Cannot delete admin users: {', '.join(str(admin_id) for (admin_id,) in admins)}",
+        )
+
+    if request.background:
+        return start_erasure_job(request.user_ids).to_dict()
+
+    try:
+        result = erase_users(db, request.user_ids)
+        db.commit()
+        return {"message": f"{len(result['deleted'])} user(s) and all related data deleted permanently", **result}
+    except Exception as e:
+        db.rollback()
+        print(f"ERROR in bulk_delete_users: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error deleting users: {str(e)}")
+
+
+@router.get("/users/erasure-jobs/{job_id}")
+def get_user_erasure_job(
+    job_id: str,
+    current_user: User = Depends(get_admin_user),
+):
+    """Status and progress of a background bulk delete"""
+    job = get_erasure_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Erasure job not found")
+    return job.to_dict()
+
+
 # ====================== MEMBER (TRAINEE) MANAGEMENT ======================
 
 class CreateTraineeRequest(BaseModel):
@@ -1806,6 +1502,43 @@ async def create_member(
         raise HTTPException(status_code=500, detail=f"Error creating trainee: {str(e)}")
 
 
+@router.post("/members/import")
+async def import_members(
+    file: UploadFile = File(..., description="CSV with a header row: name, email and optionally phone, password, trainer_id, membership_plan_id, date_of_birth, ..."),
+    dry_run: bool = Query(False, description="validate only, create nothing"),
+    format: str = Query("json", description="report format: json / csv"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Bulk-create trainees from a CSV (services/member_import.py).
+    Returns a per-row report: created members with their temporary
+    passwords, and failed rows with their errors.
+    """
+    from app.services.member_import import import_members as run_import, report_csv
+
+    if format not in ("json", "csv"):
+        raise HTTPException(status_code=400, detail="format must be json or csv")
+
+    csv_file = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = await run_in_threadpool(run_import, db, csv_file, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    finally:
+        csv_file.detach()
+
+    if format == "csv":
+        return Response(
+            content=report_csv(report),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="member_import_report.csv"'},
+        )
+    return report
+
+
 @router.get("/members")
 async def get_members(
     current_user: User = Depends(get_admin_user),
@@ -2005,54 +1738,8 @@ def delete_member(
         if user.role == UserRole.ADMIN:
             raise HTTPException(status_code=403, detail="Cannot delete admin users")
         
-        # Get trainee profile first (needed for foreign key references)
-        trainee = db.query(Trainee).filter(Trainee.user_id == member_id).first()
-        trainee_id = trainee.id if trainee else None
-        
-        # Batch delete all related data in optimal order
-        # Using synchronize_session=False for better performance
-        
-        # Delete records referencing trainee.id
-        if trainee_id:
-            db.query(TrainerMessage).filter(
-                TrainerMessage.trainee_id == trainee_id
-            ).delete(synchronize_session=False)
-            
-            db.query(AIReport).filter(
-                AIReport.trainee_id == trainee_id
-            ).delete(synchronize_session=False)
-        
-        # Delete records referencing user_id as trainee_id
-        db.query(Workout).filter(Workout.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(Measurement).filter(Measurement.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(ProgressMeasurement).filter(ProgressMeasurement.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(NutritionLog).filter(NutritionLog.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(DietPlan).filter(DietPlan.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(WorkoutPlan).filter(WorkoutPlan.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(Payment).filter(Payment.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(Membership).filter(Membership.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(Attendance).filter(Attendance.trainee_id == member_id).delete(synchronize_session=False)
-        db.query(ProgressPhoto).filter(ProgressPhoto.trainee_id == member_id).delete(synchronize_session=False)
-        
-        # Delete messages (sender or receiver)
-        db.query(Message).filter(
-            (Message.sender_id == member_id) | (Message.receiver_id == member_id)
-        ).delete(synchronize_session=False)
-        
-        # Delete trainer messages by user_id
-        db.query(TrainerMessage).filter(
-            (TrainerMessage.sender_id == member_id) | (TrainerMessage.receiver_id == member_id)
-        ).delete(synchronize_session=False)
-        
-        # Delete admin sessions
-        db.query(AdminSession).filter(AdminSession.user_id == member_id).delete(synchronize_session=False)
-        
-        # Delete trainee profile
-        if trainee:
-            db.delete(trainee)
-        
-        # Finally delete the user
-        db.delete(user)
+        # Trainee profile and all related rows go with the user (ON DELETE CASCADE)
+        erase_users(db, [user.id])
         
         # Commit all changes at once
         db.commit()
@@ -2160,6 +1847,8 @@ async def update_trainee_membership(
             extend_days = data.get("extend_days", 30)
             from datetime import timedelta
             current_membership.end_date = current_membership.end_date + timedelta(days=extend_days)
+            from app.services.membership_lifecycle import clear_expiry_flags
+            clear_expiry_flags(current_membership)
             db.commit()
             return {"message": f"Membership extended by {extend_days} days"}
         
@@ -2384,6 +2073,7 @@ async def create_membership_plan(
     db.add(plan)
     db.commit()
     db.refresh(plan)
+    clear_plan_analytics_cache()
     return {"message": "Membership plan created", "plan_id": plan.id}
 
 
@@ -2428,6 +2118,7 @@ async def update_membership_plan(
     
     db.commit()
     db.refresh(plan)
+    clear_plan_analytics_cache()
     return {"message": "Membership plan updated", "plan_id": plan.id}
 
 
@@ -2456,6 +2147,7 @@ async def delete_membership_plan(
     
     db.delete(plan)
     db.commit()
+    clear_plan_analytics_cache()
     return {"message": "Membership plan deleted successfully"}
 
 
@@ -2821,7 +2513,7 @@ def delete_trainer(
     current_user: User = Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    """Permanently delete a trainer and all related data using raw SQL to avoid schema mismatches"""
+    """Permanently delete a trainer and all related data"""
     from sqlalchemy import text
     
     try:
@@ -2843,99 +2535,9 @@ def delete_trainer(
         
         user_id = result[1]
         
-        # Use raw SQL for ALL deletions to avoid schema mismatch issues
-        # Delete in correct order to avoid foreign key constraints
-        
-        # 1. Delete trainer messages
-        try:
-            db.execute(text("DELETE FROM trainer_messages WHERE trainer_id = :tid OR sender_id = :uid OR receiver_id = :uid"), 
-                      {"tid": trainer_id, "uid": user_id})
-        except Exception as e:
-            print(f"Note: trainer_messages deletion: {e}")
-        
-        # 2. Delete trainer revenue
-        try:
-            db.execute(text("DELETE FROM trainer_revenue WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_revenue deletion: {e}")
-        
-        # 3. Delete trainer salary
-        try:
-            db.execute(text("DELETE FROM trainer_salaries WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_salaries deletion: {e}")
-        
-        # 4. Delete trainer schedules
-        try:
-            db.execute(text("DELETE FROM trainer_schedules WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_schedules deletion: {e}")
-        
-        # 5. Delete trainer attendance
-        try:
-            db.execute(text("DELETE FROM trainer_attendance WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_attendance deletion: {e}")
-        
-        # 6. Delete PT sessions
-        try:
-            db.execute(text("DELETE FROM pt_sessions WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: pt_sessions deletion: {e}")
-        
-        # 7. Update gym schedule slots (set trainer_id to NULL)
-        try:
-            db.execute(text("UPDATE gym_schedule_slots SET trainer_id = NULL WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: gym_schedule_slots update: {e}")
-        
-        # 8. Delete trainer documents
-        try:
-            db.execute(text("DELETE FROM trainer_documents WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_documents deletion: {e}")
-        
-        # 9. Delete trainer leaves
-        try:
-            db.execute(text("DELETE FROM trainer_leaves WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainer_leaves deletion: {e}")
-        
-        # 10. Update trainees (set trainer_id to NULL)
-        try:
-            db.execute(text("UPDATE trainees SET trainer_id = NULL WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: trainees update: {e}")
-        
-        # 11. Delete workout plans
-        try:
-            db.execute(text("DELETE FROM workout_plans WHERE trainer_id = :tid"), {"tid": trainer_id})
-        except Exception as e:
-            print(f"Note: workout_plans deletion: {e}")
-        
-        # 12. Delete messages
-        try:
-            db.execute(text("DELETE FROM messages WHERE sender_id = :uid OR receiver_id = :uid"), {"uid": user_id})
-        except Exception as e:
-            print(f"Note: messages deletion: {e}")
-        
-        # 13. Delete admin sessions
-        try:
-            db.execute(text("DELETE FROM admin_sessions WHERE user_id = :uid"), {"uid": user_id})
-        except Exception as e:
-            print(f"Note: admin_sessions deletion: {e}")
-        
-        # 14. Delete notifications
-        try:
-            db.execute(text("DELETE FROM notifications WHERE user_id = :uid"), {"uid": user_id})
-        except Exception as e:
-            print(f"Note: notifications deletion: {e}")
-        
-        # 15. Delete trainer profile
-        db.execute(text("DELETE FROM trainers WHERE id = :tid"), {"tid": trainer_id})
-        
-        # 16. Delete user
-        db.execute(text("DELETE FROM users WHERE id = :uid"), {"uid": user_id})
+        # Trainer profile, sessions, schedules, ... go with the user (ON DELETE CASCADE);
+        # assigned trainees and schedule slots are kept with trainer_id set to NULL
+        erase_users(db, [user_id])
         
         # Commit all changes
         db.commit()
@@ -3538,21 +3140,30 @@ async def refund_payment(data: RefundPaymentRequest, db: Session = Depends(get_d
     return {"message": "Refund processed successfully"}
 
 @router.get("/finance/summary")
-async def finance_summary(db: Session = Depends(get_db)):
-
-    total_revenue = db.query(func.sum(Payment.amount)).scalar() or 0
-    total_refunds = db.query(func.sum(Payment.refund_amount)).scalar() or 0
+async def finance_summary(current_user: User = Depends(get_admin_user), db: Session = Depends(get_db)):
+    # Sums per-day ledger rows, not the payments table (services/finance_ledger.py)
+    return ledger_finance_summary(db)
 
-    payments_today = db.query(func.sum(Payment.amount)).filter(
-        func.date(Payment.created_at) == date.today()
-    ).scalar() or 0
 
-    return {
-        "total_revenue": total_revenue,
-        "total_refunds": total_refunds,
-        "net_revenue": total_revenue - total_refunds,
-        "today_revenue": payments_today,
-    }
+@router.post("/finance/ledger/reconcile")
+async def reconcile_finance_ledger(
+    repair: bool = Query(True, description="overwrite drifted ledger rows with the recomputed totals"),
+    days: Optional[int] = Query(None, ge=1, description="days to check (default FINANCE_RECONCILE_DAYS)"),
+    full: bool = Query(False, description="check all history; payment writes wait until it finishes"),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Verify the finance ledger against the payments table (and repair it)."""
+    try:
+        result = reconcile_ledger(db, repair=repair, days=None if full else days or reconcile_days())
+        db.commit()
+        return result
+    except Exception as e:
+        db.rollback()
+        print(f"Error reconciling finance ledger: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to reconcile finance ledger: {str(e)}")
 
 @router.get("/health")
 async def health_check(db: Session = Depends(get_db)):
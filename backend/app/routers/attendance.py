@@ -0,0 +1,77 @@
+# ======================= IMPORTS =======================
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.auth_util import get_admin_user, get_current_user, verify_token
+from app.database import get_db
+from app.models import User
+from app.services.occupancy import occupancy_snapshot, reconcile_occupancy
+
+# ======================= ROUTER INIT =======================
+router = APIRouter()
+
+SSE_POLL_SECONDS = 1.0
+SSE_HEARTBEAT_SECONDS = 15.0
+
+
+# ======================= OCCUPANCY =======================
+
+@router.get("/occupancy")
+async def get_occupancy(
+    current_user: User = Depends(get_current_user),
+):
+    """How many members are in the gym right now (served from the live counter)"""
+    return await run_in_threadpool(occupancy_snapshot)
+
+
+@router.get("/occupancy/stream")
+async def stream_occupancy(
+    request: Request,
+    token: Optional[str] = Query(None, description="Access token (EventSource cannot send headers)"),
+):
+    """
+    Server-Sent Events feed of the occupancy counter. Sends an `occupancy`
+    event on connect and whenever the count changes, plus keep-alive comments.
+    """
+    authorization = request.headers.get("authorization", "")
+    token = token or (authorization[7:] if authorization.lower().startswith("bearer ") else None)
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    verify_token(token, token_type="access")
+
+    async def events():
+        last = None
+        idle = 0.0
+        while not await request.is_disconnected():
+            snapshot = await run_in_threadpool(occupancy_snapshot)
+            if snapshot["occupancy"] != last:
+                last = snapshot["occupancy"]
+                idle = 0.0
+                yield f"event: occupancy\ndata: {json.dumps(snapshot)}\n\n"
+            elif idle >= SSE_HEARTBEAT_SECONDS:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_SECONDS)
+            idle += SSE_POLL_SECONDS
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/occupancy/reconcile")
+async def reconcile_occupancy_now(
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db),
+):
+    """Reset the live counter from the attendance table (normally done periodically)"""
+    count = reconcile_occupancy(db)
+    return {"message": "Occupancy reconciled", "occupancy": count}
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
+from datetime import date, datetime
 import os
 import random
 from typing import Optional
@@ -11,6 +11,9 @@ from app.database import get_db
 from app.models import Payment, Expense
 from app.auth_util import get_admin_user
 from app.schemas import RefundPaymentRequest, ExpenseCreate
+from app.services.payment_ledger import ledger_page
+from app.services.receipts import ensure_receipt, receipt_response
+from app.services.finance_export import export_query, export_totals, iter_csv, iter_pdf, iter_xlsx, pdf_max_rows
 
 router = APIRouter()
 
@@ -27,46 +30,17 @@ async def list_payments(
     mode: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    type: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
     current_user=Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    q = db.query(Payment)
-
-    if mode:
-        q = q.filter(Payment.payment_mode == mode.lower())
-
-    if status:
-        q = q.filter(Payment.status == status)
-
-    if search:
-        search_like = f"%{search.lower()}%"
-        # assumes you maybe store trainee_email / user_email in payment table
-        q = q.filter(
-            func.lower(Payment.receipt_number).like(search_like)
-        )
-
-    payments = q.order_by(Payment.created_at.desc()).all()
-
-    return {
-        "payments": [
-            {
-                "id": p.id,
-                "amount": float(p.amount or 0),
-                "status": p.status,
-                "payment_mode": p.payment_mode,
-                "provider": p.provider,
-                "trainee_email": getattr(p, "trainee_email", None),
-                "user_email": getattr(p, "user_email", None),
-                "receipt_number": p.receipt_number,
-                "receipt_pdf_url": p.receipt_pdf_url,
-                "is_refund": p.is_refund,
-                "created_at": p.created_at.isoformat()
-                if p.created_at
-                else None,
-            }
-            for p in payments
-        ]
-    }
+    # Same ledger as the admin router (see app.services.payment_ledger)
+    try:
+        return ledger_page(db, limit, cursor, mode=mode, status=status, search=search, entry_type=type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # ---------------- REFUND PAYMENT ---------------- #
 
@@ -98,24 +72,19 @@ async def refund_payment(
 @router.get("/billing/receipt/{payment_id}")
 async def get_receipt(
     payment_id: int,
+    request: Request,
     current_user=Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
     payment = db.query(Payment).filter(Payment.id == payment_id).first()
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
+    if payment.status != "completed":
+        raise HTTPException(status_code=409, detail="Receipts are only issued for completed payments")
 
-    # If you already have a generated PDF path, just return it
-    if payment.receipt_pdf_url and os.path.exists(payment.receipt_pdf_url):
-        filename = os.path.basename(payment.receipt_pdf_url)
-        return FileResponse(
-            payment.receipt_pdf_url,
-            media_type="application/pdf",
-            filename=filename,
-        )
-
-    # fallback: simple placeholder text PDF not implemented
-    raise HTTPException(status_code=404, detail="Receipt PDF not available yet")
+    # Rendered once and stored content-addressed; see app.services.receipts
+    path = await run_in_threadpool(ensure_receipt, db, payment)
+    return receipt_response(request, path, os.path.basename(path))
 
 # ---------------- EXPENSES ---------------- #
 
@@ -135,32 +104,32 @@ async def create_expense(
 
 @router.get("/finance/export")
 async def export_finance(
-    format: str = Query("pdf", regex="^(pdf|excel)$"),
+    format: str = Query("pdf", regex="^(pdf|excel|xlsx|csv)$"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    status: Optional[str] = Query(None),
     current_user=Depends(get_admin_user),
     db: Session = Depends(get_db),
 ):
-    # For now we just return a simple CSV/TSV-style text, front-end will still download
-    payments = db.query(Payment).all()
-
-    lines = ["id,amount,status,mode,created_at"]
-    for p in payments:
-        lines.append(
-            f"{p.id},{float(p.amount or 0)},{p.status},{p.payment_mode},{p.created_at or ''}"
-        )
-
-    content = "\n".join(lines).encode("utf-8")
-
-    if format == "pdf":
-        # simple "fake pdf" as text; for real pdf use ReportLab later
-        return FileResponse(
-            path_or_file=bytes(content),
-            media_type="application/pdf",
-            filename="finance-report.pdf",
-        )
-
-    # excel -> just send CSV with xlsx mimetype
-    return FileResponse(
-        path_or_file=bytes(content),
-        media_type="application/vnd.ms-excel",
-        filename="finance-report.csv",
+    # Streamed from a server-side cursor; see app.services.finance_export
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    query = export_query(db, start_date, end_date, status)
+    suffix = f"{start_date or 'all'}_{end_date or datetime.utcnow().date()}"
+
+    if format == "csv":
+        body, media_type, ext = iter_csv(query), "text/csv", "csv"
+    elif format in ("excel", "xlsx"):
+        body = iter_xlsx(query)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        ext = "xlsx"
+    else:
+        totals = export_totals(db, start_date, end_date, status)
+        body, media_type, ext = iter_pdf(query, totals, pdf_max_rows()), "application/pdf", "pdf"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="finance-report_{suffix}.{ext}"'}
     )
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from app.database import get_db
 from app.models import NutritionLog, DietPlan, User
 from app.auth_util import require_role
+from app.services.nutrition_stats import macro_columns, nutrition_totals, daily_nutrition_totals
 
 router = APIRouter()
 
@@ -57,7 +58,8 @@ async def log_nutrition(
             item=log_data.item,
             calories=log_data.calories,
             macros_json=log_data.macros_json,
-            image_url=log_data.image_url
+            image_url=log_data.image_url,
+            **macro_columns(log_data.macros_json)
         )
         db.add(nutrition_log)
         db.commit()
@@ -230,15 +232,11 @@ async def get_daily_summary(
     else:
         target_date = datetime.utcnow().date()
 
-    logs = db.query(NutritionLog).filter(
-        NutritionLog.trainee_id == current_user.id,
-        NutritionLog.date == target_date
-    ).all()
-
-    total_calories = sum(log.calories or 0 for log in logs)
-    total_protein = sum((log.macros_json or {}).get('protein', 0) for log in logs)
-    total_carbs = sum((log.macros_json or {}).get('carbs', 0) for log in logs)
-    total_fats = sum((log.macros_json or {}).get('fats', 0) for log in logs)
+    totals = nutrition_totals(db, current_user.id, target_date)
+    total_calories = totals["calories"]
+    total_protein = totals["protein"]
+    total_carbs = totals["carbs"]
+    total_fats = totals["fats"]
 
     # Static example goals – you can later store these per-user
     goals = {
@@ -265,7 +263,7 @@ async def get_daily_summary(
         },
         "goals": goals,
         "remaining": remaining,
-        "logs_count": len(logs),
+        "logs_count": totals["meals_count"],
     }
 
 
@@ -291,21 +289,11 @@ async def get_weekly_summary(
     today = datetime.utcnow().date()
     start_date = today - timedelta(days=days - 1)
 
-    logs = db.query(NutritionLog).filter(
-        NutritionLog.trainee_id == current_user.id,
-        NutritionLog.date >= start_date
-    ).order_by(NutritionLog.date.asc()).all()
-
-    # Aggregate per date
-    daily_map: Dict[str, Dict[str, float]] = {}
-    for log in logs:
-        d_str = (log.date or today).isoformat()
-        if d_str not in daily_map:
-            daily_map[d_str] = {"calories": 0, "protein": 0, "carbs": 0, "fats": 0}
-        daily_map[d_str]["calories"] += log.calories or 0
-        daily_map[d_str]["protein"] += (log.macros_json or {}).get("protein", 0)
-        daily_map[d_str]["carbs"] += (log.macros_json or {}).get("carbs", 0)
-        daily_map[d_str]["fats"] += (log.macros_json or {}).get("fats", 0)
+    # Aggregate per date in SQL
+    daily_map: Dict[str, Dict[str, float]] = {
+        d_str: {k: v[k] for k in ("calories", "protein", "carbs", "fats")}
+        for d_str, v in daily_nutrition_totals(db, current_user.id, start_date, today).items()
+    }
 
     # Ensure we return all days even if 0
     days_list: List[Dict[str, Any]] = []
@@ -17,6 +17,7 @@ from app.services.nutrition_ai import (
     find_best_match,
     NUTRITION_DATABASE
 )
+from app.services.nutrition_stats import macro_columns, nutrition_totals
 
 router = APIRouter()
 
@@ -103,7 +104,8 @@ async def log_food(
             trainee_id=current_user.id,
             item=request.food_name,
             calories=int(nutrition["calories"]),
-            macros_json=macros_data
+            macros_json=macros_data,
+            **macro_columns(macros_data)
         )
         
         db.add(nutrition_log)
@@ -153,11 +155,12 @@ async def get_daily_nutrition(
         NutritionLog.date < query_date + timedelta(days=1)
     ).all()
     
-    # Calculate totals
-    total_calories = sum(log.calories or 0 for log in logs)
-    total_protein = sum(log.macros_json.get("protein", 0) if log.macros_json else 0 for log in logs)
-    total_carbs = sum(log.macros_json.get("carbs", 0) if log.macros_json else 0 for log in logs)
-    total_fats = sum(log.macros_json.get("fats", 0) if log.macros_json else 0 for log in logs)
+    # Calculate totals in SQL
+    totals = nutrition_totals(db, current_user.id, query_date)
+    total_calories = totals["calories"]
+    total_protein = totals["protein"]
+    total_carbs = totals["carbs"]
+    total_fats = totals["fats"]
     
     # Get trainee profile for daily goal
     trainee_profile = current_user.trainee_profile
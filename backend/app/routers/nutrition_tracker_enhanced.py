@@ -10,6 +10,7 @@ Features:
 """
 
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Query
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
@@ -22,11 +23,17 @@ from app.services.nutrition_enhanced import (
     analyze_meal_from_image,
     calculate_nutrition_for_portion,
     get_nutrition_per_100g,
-    calculate_daily_nutrition_goals,
     get_nutrition_recommendations,
     suggest_meals_for_macros,
     get_meal_prep_plan,
 )
+from app.services.nutrition_goals import (
+    get_trainee_goals,
+    refresh_nutrition_goals,
+    goals_to_dict,
+    inputs_to_dict,
+)
+from app.services.nutrition_stats import macro_columns, nutrition_totals, daily_nutrition_totals
 
 router = APIRouter()
 
@@ -80,8 +87,8 @@ async def analyze_meal_image(
         if not image_data:
             raise HTTPException(status_code=400, detail="Empty file uploaded")
         
-        # AI Analysis
-        result = analyze_meal_from_image(image_data, file.filename or "meal.jpg")
+        # AI Analysis - in a worker thread so concurrent uploads share a recognizer batch
+        result = await run_in_threadpool(analyze_meal_from_image, image_data, file.filename or "meal.jpg")
         
         if result.get("status") == "success":
             return {
@@ -143,7 +150,8 @@ async def log_food(
             trainee_id=current_user.id,
             item=request.food_name,
             calories=int(nutrition["calories"]),
-            macros_json=macros_data
+            macros_json=macros_data,
+            **macro_columns(macros_data)
         )
         
         db.add(nutrition_log)
@@ -237,24 +245,12 @@ async def get_daily_nutrition(
             NutritionLog.date < query_date + timedelta(days=1)
         ).all()
         
-        # Calculate totals
-        totals = {
-            "calories": 0,
-            "protein": 0,
-            "carbs": 0,
-            "fats": 0,
-            "fiber": 0,
-        }
+        # Calculate totals in SQL
+        totals = nutrition_totals(db, current_user.id, query_date)
+        totals.pop("meals_count")
         
         meals = []
         for log in logs:
-            totals["calories"] += log.calories or 0
-            if log.macros_json:
-                totals["protein"] += log.macros_json.get("protein", 0)
-                totals["carbs"] += log.macros_json.get("carbs", 0)
-                totals["fats"] += log.macros_json.get("fats", 0)
-                totals["fiber"] += log.macros_json.get("fiber", 0)
-      
             meals.append({
                 "id": log.id,
                 "food": log.item,
@@ -262,26 +258,16 @@ async def get_daily_nutrition(
                 "meal_type": log.macros_json.get("meal_type", "snack") if log.macros_json else "snack",
                 "calories": log.calories,
                 "nutrition": {
-                    "protein": log.macros_json.get("protein", 0) if log.macros_json else 0,
-                    "carbs": log.macros_json.get("carbs", 0) if log.macros_json else 0,
-                    "fats": log.macros_json.get("fats", 0) if log.macros_json else 0,
-                    "fiber": log.macros_json.get("fiber", 0) if log.macros_json else 0,
+                    "protein": log.protein,
+                    "carbs": log.carbs,
+                    "fats": log.fats,
+                    "fiber": log.fiber,
                 },
                 "logged_at": log.created_at.isoformat() if log.created_at else None
             })
         
-        # Get personalized goals
-        trainee_profile = current_user.trainee_profile
-        user_profile = {
-            "weight": trainee_profile.weight if trainee_profile and trainee_profile.weight else 70,
-            "height": trainee_profile.height if trainee_profile and trainee_profile.height else 170,
-            "age": 30,  # Default age if not available
-            "gender": trainee_profile.gender if trainee_profile and trainee_profile.gender else "M",
-            "activity_level": "moderate",
-            "fitness_goal": "maintain",
-        }
-        
-        goals = calculate_daily_nutrition_goals(user_profile)
+        # Get personalized goals (stored per trainee, refreshed on profile changes)
+        goals = goals_to_dict(get_trainee_goals(db, current_user.id))
         
         # Calculate remaining
         remaining = {
@@ -324,45 +310,20 @@ async def get_daily_nutrition(
 
 @router.get("/weekly-summary")
 async def get_weekly_nutrition(
-    days: int = Query(7, ge=1, le=30),
+    days: int = Query(7, ge=1, le=366),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
     """
     Get weekly nutrition summary for charts and analytics
     
-    Returns: Last N days with daily aggregates
+    Returns: Last N days (up to a year) with daily aggregates
     """
     today = datetime.utcnow().date()
     start_date = today - timedelta(days=days - 1)
     
-    logs = db.query(NutritionLog).filter(
-        NutritionLog.trainee_id == current_user.id,
-        NutritionLog.date >= start_date
-    ).all()
-    
-    # Aggregate by day
-    daily_data = {}
-    for log in logs:
-        day_key = (log.date or today).isoformat()
-        
-        if day_key not in daily_data:
-            daily_data[day_key] = {
-                "calories": 0,
-                "protein": 0,
-                "carbs": 0,
-                "fats": 0,
-                "fiber": 0,
-                "meals_count": 0
-            }
-        
-        daily_data[day_key]["calories"] += log.calories or 0
-        if log.macros_json:
-            daily_data[day_key]["protein"] += log.macros_json.get("protein", 0)
-            daily_data[day_key]["carbs"] += log.macros_json.get("carbs", 0)
-            daily_data[day_key]["fats"] += log.macros_json.get("fats", 0)
-            daily_data[day_key]["fiber"] += log.macros_json.get("fiber", 0)
-        daily_data[day_key]["meals_count"] += 1
+    # Aggregate by day (GROUP BY date in SQL)
+    daily_data = daily_nutrition_totals(db, current_user.id, start_date, today)
     
     # Build response for all days (including empty ones)
     daily_array = []
@@ -436,19 +397,11 @@ async def get_nutrition_goals(
     db: Session = Depends(get_db)
 ):
     """Get personalized nutrition goals for user"""
-    user_profile = {
-        "weight": current_user.trainee_profile.weight if current_user.trainee_profile else 70,
-        "height": current_user.trainee_profile.height if current_user.trainee_profile else 170,
-        "age": current_user.age or 30,
-        "gender": current_user.gender or "M",
-        "activity_level": current_user.trainee_profile.activity_level if current_user.trainee_profile else "moderate",
-        "fitness_goal": current_user.trainee_profile.fitness_goal if current_user.trainee_profile else "maintain",
-    }
-    
-    goals = calculate_daily_nutrition_goals(user_profile)
+    stored = get_trainee_goals(db, current_user.id)
+    goals = goals_to_dict(stored)
     
     return {
-        "user_profile": user_profile,
+        "user_profile": inputs_to_dict(stored),
         "daily_goals": {k: round(v, 1) if isinstance(v, (int, float)) else v for k, v in goals.items()}
     }
 
@@ -460,27 +413,27 @@ async def update_nutrition_goals(
     db: Session = Depends(get_db)
 ):
     """Update user profile and recalculate nutrition goals"""
-    if current_user.trainee_profile:
-        current_user.trainee_profile.weight = request.weight
-        current_user.trainee_profile.height = request.height
-        current_user.trainee_profile.activity_level = request.activity_level
-        current_user.trainee_profile.fitness_goal = request.fitness_goal
-        
-        if request.age:
-            current_user.age = request.age
+    trainee_profile = current_user.trainee_profile
+    if trainee_profile:
+        trainee_profile.weight = request.weight
+        trainee_profile.height = request.height
         if request.gender:
-            current_user.gender = request.gender
-        
-        db.commit()
+            trainee_profile.gender = request.gender
     
-    goals = calculate_daily_nutrition_goals({
-        "weight": request.weight,
-        "height": request.height,
-        "age": request.age or current_user.age or 30,
-        "gender": request.gender or current_user.gender or "M",
-        "activity_level": request.activity_level,
-        "fitness_goal": request.fitness_goal,
-    })
+    # Activity level, goal and age are kept on the stored goals row
+    stored = refresh_nutrition_goals(
+        db,
+        current_user.id,
+        trainee_profile,
+        weight=request.weight,
+        height=request.height,
+        age=request.age,
+        gender=request.gender,
+        activity_level=request.activity_level,
+        fitness_goal=request.fitness_goal,
+    )
+    db.commit()
+    goals = goals_to_dict(stored)
     
     return {
         "status": "success",
@@ -493,13 +446,26 @@ async def update_nutrition_goals(
 
 @router.get("/suggest-meals")
 async def get_meal_suggestions(
-    target_protein: float = Query(100),
-    target_carbs: float = Query(250),
-    target_fats: float = Query(70),
-    current_user: User = Depends(require_role(["trainee"]))
+    target_protein: Optional[float] = Query(None),
+    target_carbs: Optional[float] = Query(None),
+    target_fats: Optional[float] = Query(None),
+    meals_per_day: int = Query(3, ge=1, le=6),
+    diet: Optional[str] = Query(None, description="vegan, vegetarian, pescatarian or omnivore"),
+    exclude: Optional[List[str]] = Query(None, description="Foods to leave out (e.g. allergies)"),
+    current_user: User = Depends(require_role(["trainee"])),
+    db: Session = Depends(get_db)
 ):
-    """Get meal suggestions to hit specific macro targets"""
-    suggestions = suggest_meals_for_macros(target_protein, target_carbs, target_fats)
+    """Get meal suggestions to hit specific macro targets (defaults to the trainee's goals)"""
+    if target_protein is None or target_carbs is None or target_fats is None:
+        goals = get_trainee_goals(db, current_user.id)
+        target_protein = goals.protein if target_protein is None else target_protein
+        target_carbs = goals.carbs if target_carbs is None else target_carbs
+        target_fats = goals.fats if target_fats is None else target_fats
+    
+    try:
+        suggestions = suggest_meals_for_macros(target_protein, target_carbs, target_fats, meals_per_day, diet, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "target_macros": {
@@ -514,22 +480,18 @@ async def get_meal_suggestions(
 @router.get("/meal-prep-plan")
 async def get_meal_plan(
     days: int = Query(7, ge=1, le=30),
+    diet: Optional[str] = Query(None, description="vegan, vegetarian, pescatarian or omnivore"),
+    exclude: Optional[List[str]] = Query(None, description="Foods to leave out (e.g. allergies)"),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
     """Get personalized meal prep plan for specified days"""
     # Get user goals
-    user_profile = {
-        "weight": current_user.trainee_profile.weight if current_user.trainee_profile else 70,
-        "height": current_user.trainee_profile.height if current_user.trainee_profile else 170,
-        "age": current_user.age or 30,
-        "gender": current_user.gender or "M",
-        "activity_level": current_user.trainee_profile.activity_level if current_user.trainee_profile else "moderate",
-        "fitness_goal": current_user.trainee_profile.fitness_goal if current_user.trainee_profile else "maintain",
-    }
-    
-    goals = calculate_daily_nutrition_goals(user_profile)
-    plan = get_meal_prep_plan(goals, days)
+    goals = goals_to_dict(get_trainee_goals(db, current_user.id))
+    try:
+        plan = get_meal_prep_plan(goals, days, diet, exclude)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
         "daily_goals": goals,
@@ -1,21 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from decouple import config
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import razorpay
+from razorpay.errors import SignatureVerificationError
 import time
 from app.database import get_db
 from app.models import Payment, User, MembershipPlan, Membership
 from app.auth_util import require_role, get_current_user
+from app.services.receipts import render_completed_receipt
+from app.services.payment_finalization import PaymentMismatchError, finalize_payment
+from app.services.fake_razorpay import DEFAULT_KEY_ID, DEFAULT_KEY_SECRET, FakeRazorpayClient
 
 router = APIRouter(prefix="/api/payments", tags=["Payments"])
 
 RAZORPAY_KEY_ID = config("RAZORPAY_KEY_ID", default=None)
 RAZORPAY_KEY_SECRET = config("RAZORPAY_KEY_SECRET", default=None)
-
-if RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET:
+RAZORPAY_FAKE = config("RAZORPAY_FAKE", default=False, cast=bool)
+
+if RAZORPAY_FAKE:
+    # Local in-memory gateway for development / load tests (see app.services.fake_razorpay)
+    RAZORPAY_KEY_ID = RAZORPAY_KEY_ID or DEFAULT_KEY_ID
+    razorpay_client = FakeRazorpayClient(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET or DEFAULT_KEY_SECRET))
+    print("⚠️  RAZORPAY_FAKE is enabled - payments are not real")
+elif RAZORPAY_KEY_ID and RAZORPAY_KEY_SECRET:
     razorpay_client = razorpay.Client(auth=(RAZORPAY_KEY_ID, RAZORPAY_KEY_SECRET))
 else:
     razorpay_client = None
@@ -82,7 +93,7 @@ async def create_razorpay_order(
     
     amount_paise = int(amount * 100)
     
-    order = razorpay_client.order.create({
+    order = await run_in_threadpool(razorpay_client.order.create, {
         "amount": amount_paise,
         "currency": "INR",
         "receipt": f"receipt_{current_user.id}_{int(time.time())}",
@@ -99,6 +110,7 @@ async def create_razorpay_order(
         provider="razorpay",
         status="pending",
         transaction_id=order["id"],
+        plan_id=plan.id if plan else None,
         notes=f"Plan: {plan.name}" if plan else None
     )
     db.add(payment)
@@ -125,7 +137,11 @@ async def verify_razorpay_payment(
     current_user: User = Depends(require_role(["trainee", "trainer", "admin"])),
     db: Session = Depends(get_db)
 ):
-    """Verify Razorpay payment and activate membership"""
+    """
+    Verify Razorpay payment and activate membership.
+    Idempotent per order: retries get the original response back (replayed=true)
+    and never extend the membership twice.
+    """
     if not razorpay_client:
         raise HTTPException(status_code=500, detail="Razorpay not configured")
     
@@ -136,54 +152,37 @@ async def verify_razorpay_payment(
     }
     
     try:
-        razorpay_client.utility.verify_payment_signature(params_dict)
-        
-        # Update payment record
-        payment = db.query(Payment).filter(Payment.transaction_id == data.razorpay_order_id).first()
-        if payment:
-            payment.status = "completed"
-            payment.transaction_id = data.razorpay_payment_id
-            db.commit()
-        
-        # If plan_id provided, create/update membership
-        if data.plan_id:
-            plan = db.query(MembershipPlan).filter(MembershipPlan.id == data.plan_id).first()
-            if plan:
-                start_date = datetime.utcnow()
-                end_date = start_date + timedelta(days=plan.duration_months * 30)
-                
-                # Check for existing active membership
-                existing = db.query(Membership).filter(
-                    Membership.trainee_id == current_user.id,
-                    Membership.status == "active"
-                ).first()
-                
-                if existing:
-                    # Extend existing membership
-                    existing.end_date = existing.end_date + timedelta(days=plan.duration_months * 30)
-                    existing.membership_type = plan.membership_type
-                    existing.price = plan.price
-                else:
-                    # Create new membership
-                    membership = Membership(
-                        trainee_id=current_user.id,
-                        membership_type=plan.membership_type,
-                        start_date=start_date,
-                        end_date=end_date,
-                        status="active",
-                        price=plan.price,
-                    )
-                    db.add(membership)
-                
-                db.commit()
-        
-        return {
-            "status": "success",
-            "message": "Payment verified and membership activated!",
-            "payment_id": data.razorpay_payment_id
-        }
-    except Exception as e:
+        await run_in_threadpool(razorpay_client.utility.verify_payment_signature, params_dict)
+    except SignatureVerificationError as e:
         raise HTTPException(status_code=400, detail=f"Invalid payment signature: {str(e)}")
+    
+    try:
+        response, replayed = await run_in_threadpool(
+            finalize_payment,
+            db,
+            current_user.id,
+            data.razorpay_order_id,
+            data.razorpay_payment_id,
+            data.plan_id,
+        )
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except PaymentMismatchError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        import traceback
+        print(f"Payment verification error: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail="Could not finalize payment, please retry")
+    
+    if not replayed:
+        payment = db.query(Payment).filter(Payment.transaction_id == data.razorpay_payment_id).first()
+        if payment:
+            await run_in_threadpool(render_completed_receipt, db, payment)
+    
+    return {**response, "replayed": replayed}
 
 
 # ====================== GET MY PAYMENTS ======================
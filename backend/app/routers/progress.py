@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta, date
@@ -7,6 +8,22 @@ from typing import Optional, List, Dict, Any
 from app.database import get_db
 from app.models import ProgressMeasurement, User, Trainer, Trainee, Workout
 from app.auth_util import require_role
+from app.services.progress_analytics import DEFAULT_POINTS, analyze_measurements, downsample_rows
+from app.services.progress_correlation import correlate_progress
+from app.services.workout_history import (
+    CSV_DEFAULT_FIELDS,
+    history_page,
+    history_query,
+    iter_csv,
+    iter_ndjson,
+    parse_fields,
+)
+from app.services.workout_stats import (
+    recent_workouts,
+    weekly_workout_counts,
+    workout_totals,
+    workouts_by_type,
+)
 
 router = APIRouter()
 
@@ -50,6 +67,7 @@ async def add_measurement(
 # ─────────────────────────────────────────────
 @router.get("/progress")
 async def get_progress(
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to at most this many measurements"),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
@@ -59,8 +77,12 @@ async def get_progress(
         .order_by(ProgressMeasurement.date.asc())
         .all()
     )
+    total = len(measurements)
+    if points:
+        measurements = downsample_rows(measurements, "weight", points)
 
     return {
+        "total": total,
         "measurements": [
             {
                 "id": m.id,
@@ -85,6 +107,8 @@ async def get_progress(
 @router.get("/progress/analytics")
 async def get_progress_analytics(
     days: int = 30,
+    points: int = Query(DEFAULT_POINTS, ge=3, le=2000, description="Max chart points per series"),
+    window: int = Query(7, ge=1, le=90, description="Rolling average window in days"),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
@@ -100,6 +124,11 @@ async def get_progress_analytics(
         .all()
     )
 
+    # Smoothing/downsampling happens here so long histories stay small on the wire
+    series = analyze_measurements(
+        measurements, ("weight", "body_fat", "muscle_mass"), points=points, window_days=window
+    )
+
     return {
         "days": days,
         "count": len(measurements),
@@ -110,8 +139,9 @@ async def get_progress_analytics(
                 "body_fat": m.body_fat,
                 "muscle_mass": m.muscle_mass
             }
-            for m in measurements
-        ]
+            for m in downsample_rows(measurements, "weight", points)
+        ],
+        "series": series
     }
 
 
@@ -121,6 +151,7 @@ async def get_progress_analytics(
 @router.get("/trainer/{trainee_id}/progress")
 async def trainer_view_progress(
     trainee_id: int,
+    points: Optional[int] = Query(None, ge=3, le=5000, description="Downsample to at most this many measurements"),
     current_user: User = Depends(require_role(["trainer"])),
     db: Session = Depends(get_db)
 ):
@@ -136,6 +167,8 @@ async def trainer_view_progress(
         .order_by(ProgressMeasurement.date.asc())
         .all()
     )
+    if points:
+        measurements = downsample_rows(measurements, "weight", points)
 
     return {
         "trainee_id": trainee_id,
@@ -204,16 +237,9 @@ async def get_workout_stats(
     """Get workout statistics for the last N days"""
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    workouts = (
-        db.query(Workout)
-        .filter(
-            Workout.trainee_id == current_user.id,
-            Workout.start_time >= start_date
-        )
-        .all()
-    )
+    totals = workout_totals(db, current_user.id, start_date)
     
-    if not workouts:
+    if not totals["count"]:
         return {
             "total_workouts": 0,
             "total_duration": 0,
@@ -224,33 +250,18 @@ async def get_workout_stats(
             "recent_workouts": []
         }
     
-    # Calculate stats
-    total_duration = sum(w.duration_minutes or 0 for w in workouts)
-    total_calories = sum(w.calories_burned or 0 for w in workouts)
-    
-    # Group by exercise type
-    workout_types = {}
-    for w in workouts:
-        if w.exercise_type:
-            workout_types[w.exercise_type] = workout_types.get(w.exercise_type, 0) + 1
-    
-    # Group by week
-    workouts_by_week = {}
-    for w in workouts:
-        if w.start_time:
-            week = w.start_time.strftime("%Y-W%W")
-            workouts_by_week[week] = workouts_by_week.get(week, 0) + 1
-    
-    # Recent workouts
-    recent_workouts = sorted(workouts, key=lambda x: x.start_time or datetime.min, reverse=True)[:10]
+    # Grouped in SQL: per exercise type, per "%Y-W%W" week, and the 10 most recent
+    workout_types = workouts_by_type(db, current_user.id, start_date)
+    workouts_by_week = weekly_workout_counts(db, current_user.id, start_date)
+    recent = recent_workouts(db, current_user.id, start_date)
     
     return {
-        "total_workouts": len(workouts),
-        "total_duration": total_duration,
-        "total_calories": round(total_calories, 2),
-        "avg_duration": round(total_duration / len(workouts), 1) if workouts else 0,
+        "total_workouts": totals["count"],
+        "total_duration": totals["duration"],
+        "total_calories": round(totals["calories"], 2),
+        "avg_duration": round(totals["duration"] / totals["count"], 1),
         "workout_types": workout_types,
-        "workouts_by_week": [{"week": k, "count": v} for k, v in sorted(workouts_by_week.items())],
+        "workouts_by_week": workouts_by_week,
         "recent_workouts": [
             {
                 "id": w.id,
@@ -260,7 +271,7 @@ async def get_workout_stats(
                 "calories_burned": w.calories_burned,
                 "total_reps": w.total_reps
             }
-            for w in recent_workouts
+            for w in recent
         ]
     }
 
@@ -271,46 +282,43 @@ async def get_workout_stats(
 @router.get("/workouts/history")
 async def get_workout_history(
     days: Optional[int] = 30,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,start_time,total_reps"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
-    """Get detailed workout history"""
+    """
+    Get detailed workout history, newest first.
+    json: keyset-paginated pages ({workouts, next_cursor}).
+    ndjson/csv: the whole window streamed as a download (limit/cursor ignored).
+    """
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    workouts = (
-        db.query(Workout)
-        .filter(
-            Workout.trainee_id == current_user.id,
-            Workout.start_time >= start_date
-        )
-        .order_by(Workout.start_time.desc())
-        .all()
-    )
+    try:
+        selected = parse_fields(fields, CSV_DEFAULT_FIELDS if format == "csv" else None)
+        if format == "json":
+            return history_page(db, current_user.id, start_date, selected, limit, cursor)
+        query = history_query(db, current_user.id, start_date, selected)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {
-        "workouts": [
-            {
-                "id": w.id,
-                "exercise_type": w.exercise_type,
-                "start_time": w.start_time.isoformat() if w.start_time else None,
-                "end_time": w.end_time.isoformat() if w.end_time else None,
-                "duration_minutes": w.duration_minutes,
-                "calories_burned": w.calories_burned,
-                "total_reps": w.total_reps,
-                "avg_accuracy": w.avg_accuracy,
-                "summary": w.summary_json
-            }
-            for w in workouts
-        ]
-    }
-
+    if format == "ndjson":
+        return StreamingResponse(iter_ndjson(query, selected), media_type="application/x-ndjson")
+    
+    return StreamingResponse(
+        iter_csv(query, selected),
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="workout_history_{days}d.csv"'}
+    )
 
 # ─────────────────────────────────────────────
 # ✅ GET PROGRESS WITH WORKOUT CORRELATION
 # ─────────────────────────────────────────────
 @router.get("/analytics/correlation")
 async def get_progress_workout_correlation(
-    days: Optional[int] = 30,
+    days: Optional[int] = Query(30, ge=1, le=3650),
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db)
 ):
@@ -328,9 +336,9 @@ async def get_progress_workout_correlation(
         .all()
     )
     
-    # Get workouts
+    # Get workouts (only the columns the grid needs)
     workouts = (
-        db.query(Workout)
+        db.query(Workout.start_time, Workout.duration_minutes)
         .filter(
             Workout.trainee_id == current_user.id,
             Workout.start_time >= start_date
@@ -353,6 +361,9 @@ async def get_progress_workout_correlation(
     body_fat_change = (last_measurement.body_fat - first_measurement.body_fat) if (first_measurement.body_fat and last_measurement.body_fat) else 0
     muscle_change = (last_measurement.muscle_mass - first_measurement.muscle_mass) if (first_measurement.muscle_mass and last_measurement.muscle_mass) else 0
     
+    # Daily-grid correlation engine (lagged/weekly correlations, slopes, timeline counts)
+    analysis = correlate_progress(measurements, workouts, start_date.date(), datetime.utcnow().date())
+
     # Workout intensity (workouts per week)
     total_weeks = days / 7
     workouts_per_week = len(workouts) / total_weeks if total_weeks > 0 else 0
@@ -377,17 +388,16 @@ async def get_progress_workout_correlation(
         "body_fat_change": round(body_fat_change, 2),
         "muscle_change": round(muscle_change, 2),
         "insight": insight,
+        "correlations": analysis["metrics"],
+        "weekly": analysis["weekly"],
         "timeline": [
             {
                 "date": m.date.isoformat(),
                 "weight": m.weight,
                 "body_fat": m.body_fat,
                 "muscle_mass": m.muscle_mass,
-                "workouts_count": len([
-                    w for w in workouts 
-                    if w.start_time and w.start_time.date() == m.date
-                ])
+                "workouts_count": count
             }
-            for m in measurements
+            for m, count in zip(measurements, analysis["timeline_workouts"])
         ]
     }
@@ -2,6 +2,7 @@
 # ======================= IMPORTS =======================
 from typing import Any, Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, date
 from pydantic import BaseModel
@@ -10,6 +11,12 @@ from app.schemas import PaymentCreate, WorkoutCreate, WorkoutUpdate, Measurement
 from app.database import get_db
 from app.models import User, Workout, Measurement, NutritionLog, ProgressPhoto, Message, Trainee, MembershipPlan, Payment, Membership, Attendance, Notification, TrainerSchedule, Trainer
 from app.auth_util import get_current_user, require_role
+from app.services.nutrition_stats import macro_columns, nutrition_totals
+from app.services.nutrition_goals import refresh_nutrition_goals
+from app.services.activity_stats import record_workout, remove_workout
+from app.services.dashboard import dashboard_snapshot
+from app.services.occupancy import get_occupancy_counter, gym_capacity, is_live_visit
+from app.services.attendance_sweeper import close_stale_attendance, insert_open_visit, open_app_visit
 
 # ======================= ROUTER INIT =======================
 router = APIRouter()
@@ -147,6 +154,19 @@ async def update_trainee_profile(
     if data.health_conditions is not None:
         trainee_profile.health_conditions = data.health_conditions
     
+    # Nutrition goals depend on these fields - recompute the stored goals.
+    # Edited body measurements are explicit inputs; the goal text and date of
+    # birth only fill in a fitness goal / age the trainee has not set.
+    if any(v is not None for v in (data.weight, data.height, data.goal, data.gender, data.date_of_birth)):
+        refresh_nutrition_goals(
+            db,
+            current_user.id,
+            trainee_profile,
+            weight=data.weight,
+            height=data.height,
+            gender=data.gender,
+        )
+    
     db.commit()
     
     return {"message": "Profile updated successfully"}
@@ -169,101 +189,22 @@ async def get_dashboard(
     current_user: User = Depends(require_role(["trainee"])),
     db: Session = Depends(get_db),
 ):
-    week_ago = datetime.utcnow() - timedelta(days=7)
-
-    # Workouts
-
-    this_week_workouts = db.query(Workout).filter(
-        Workout.trainee_id == current_user.id,
-        Workout.start_time >= week_ago
-    ).count()
-
-    total_workouts = db.query(Workout).filter(
-        Workout.trainee_id == current_user.id
-    ).count()
-
-    # Calories (sum for today)
-    today = datetime.utcnow().date()
-    calories = db.query(NutritionLog).filter(
-        NutritionLog.trainee_id == current_user.id,
-        NutritionLog.date == today
-    ).with_entities(NutritionLog.calories).all()
-    calories = sum([c[0] for c in calories if c[0] is not None]) if calories else 0
-
-    # Calories burned (sum for today)
-    workouts_today = db.query(Workout).filter(
-        Workout.trainee_id == current_user.id,
-        Workout.start_time >= datetime.combine(today, datetime.min.time()),
-        Workout.start_time <= datetime.combine(today, datetime.max.time())
-    ).all()
-    calories_burned = sum([w.calories_burned or 0 for w in workouts_today])
-
-    # Water intake (not tracked, set to 0 or dummy value)
-    water_intake = 0
-
-    # Water goal (default 8 glasses)
-    water_goal = 8
-
-    # Streak (days with at least 1 workout)
-    streak = 0
-    for i in range(0, 100):
-        day = today - timedelta(days=i)
-        count = db.query(Workout).filter(
-            Workout.trainee_id == current_user.id,
-            Workout.start_time >= datetime.combine(day, datetime.min.time()),
-            Workout.start_time <= datetime.combine(day, datetime.max.time())
-        ).count()
-        if count > 0:
-            streak += 1
-        else:
-            break
-
-    # Achievements (dummy for now)
-    achievements = 5
-
-    # Average form score (last 10 workouts)
-    last10 = db.query(Workout).filter(
-        Workout.trainee_id == current_user.id
-    ).order_by(Workout.start_time.desc()).limit(10).all()
-    avg_form_score = round(sum([w.avg_accuracy or 0 for w in last10]) / len(last10), 1) if last10 else 0
-
-    # Best streak (max consecutive days with workout)
-    all_workouts = db.query(Workout).filter(
-        Workout.trainee_id == current_user.id
-    ).order_by(Workout.start_time.asc()).all()
-    best_streak = 0
-    current_streak = 0
-    last_date = None
-    for w in all_workouts:
-        d = w.start_time.date()
-        if last_date is None or (d - last_date).days == 1:
-            current_streak += 1
-        elif (d - last_date).days > 1:
-            current_streak = 1
-        last_date = d
-        if current_streak > best_streak:
-            best_streak = current_streak
-
-    # Calories budget (dummy, could be personalized)
-    calories_budget = 2200
-
-    latest_measurement = db.query(Measurement).filter(
-        Measurement.trainee_id == current_user.id
-    ).order_by(Measurement.date.desc()).first()
+    # All figures come from one composed query (see services/dashboard.py)
+    snapshot = dashboard_snapshot(db, current_user.id)
 
     return {
-        "weeklyWorkouts": this_week_workouts,
-        "totalWorkouts": total_workouts,
-        "calories": calories,
-        "caloriesBudget": calories_budget,
-        "caloriesBurned": calories_burned,
-        "waterIntake": water_intake,
-        "waterGoal": water_goal,
-        "streak": streak,
-        "achievements": achievements,
-        "avgFormScore": avg_form_score,
-        "bestStreak": best_streak,
-        "currentWeight": latest_measurement.weight if latest_measurement else None
+        "weeklyWorkouts": snapshot["weekly_workouts"],
+        "totalWorkouts": snapshot["total_workouts"],
+        "calories": snapshot["calories"],
+        "caloriesBudget": 2200,  # dummy, could be personalized
+        "caloriesBurned": snapshot["calories_burned"],
+        "waterIntake": 0,  # not tracked yet
+        "waterGoal": 8,  # default 8 glasses
+        "streak": snapshot["streak"],
+        "achievements": 5,  # dummy for now
+        "avgFormScore": snapshot["avg_form_score"],
+        "bestStreak": snapshot["best_streak"],
+        "currentWeight": snapshot["current_weight"]
     }
 
 
@@ -281,6 +222,7 @@ async def start_workout(
         start_time=datetime.utcnow()
     )
     db.add(workout)
+    record_workout(db, current_user.id, workout.start_time)
     db.commit()
     db.refresh(workout)
     return workout
@@ -351,6 +293,7 @@ async def delete_workout(
         raise HTTPException(status_code=404, detail="Workout not found")
 
     db.delete(workout)
+    remove_workout(db, current_user.id, workout)
     db.commit()
     return {"message": "Workout deleted successfully"}
 
@@ -379,6 +322,7 @@ async def log_manual_workout(
     )
 
     db.add(workout)
+    record_workout(db, current_user.id, workout.start_time)
     db.commit()
     db.refresh(workout)
 
@@ -455,7 +399,8 @@ async def log_nutrition(
         item=nutrition_data.item,
         calories=nutrition_data.calories,
         macros_json=nutrition_data.macros_json or {},
-        image_url=nutrition_data.image_url
+        image_url=nutrition_data.image_url,
+        **macro_columns(nutrition_data.macros_json)
     )
     db.add(nutrition_log)
     db.commit()
@@ -470,22 +415,19 @@ async def daily_nutrition_summary(
 ):
     today = date.today()
 
-    logs = db.query(NutritionLog).filter(
-        NutritionLog.trainee_id == current_user.id,
-        NutritionLog.date >= today
-    ).all()
+    totals = nutrition_totals(db, current_user.id, today)
 
     summary = {
-        "calories": sum(log.calories for log in logs),
-        "protein": sum((log.macros_json or {}).get("protein", 0) for log in logs),
-        "carbs": sum((log.macros_json or {}).get("carbs", 0) for log in logs),
-        "fats": sum((log.macros_json or {}).get("fats", 0) for log in logs),
+        "calories": totals["calories"],
+        "protein": totals["protein"],
+        "carbs": totals["carbs"],
+        "fats": totals["fats"],
     }
 
     return {
         "date": today.isoformat(),
         "summary": summary,
-        "logs_count": len(logs)
+        "logs_count": totals["meals_count"]
     }
 
 
@@ -621,12 +563,9 @@ async def create_payment(data: PaymentCreate, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(payment)
 
-    # Generate receipt PDF
-    from app.utils.pdf_generator import generate_receipt_pdf
-    pdf_path = generate_receipt_pdf(payment)
-    payment.receipt_pdf_url = pdf_path
-
-    db.commit()
+    # Render and store the receipt PDF
+    from app.services.receipts import render_completed_receipt
+    await run_in_threadpool(render_completed_receipt, db, payment)
 
     return {
         "message": "Payment completed",
@@ -645,59 +584,45 @@ async def check_in_attendance(
     db: Session = Depends(get_db),
 ):
     """Check in to the gym"""
+    def already_checked_in(visit):
+        return {
+            "status": "already_checked_in",
+            "attendance_id": visit.id,
+            "check_in_time": visit.check_in_time.isoformat() if visit.check_in_time else None
+        }
+    
     try:
-        today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        today_end = datetime.combine(today, datetime.max.time())
-        
-        # Auto-close any old unclosed attendance records (from previous days)
-        old_unclosed = db.query(Attendance).filter(
-            Attendance.trainee_id == current_user.id,
-            Attendance.check_out_time == None,
-            Attendance.check_in_time < today_start
-        ).all()
-        
-        for record in old_unclosed:
-            # Set check_out to end of that day and estimate duration
-            if record.check_in_time:
-                record.check_out_time = datetime.combine(record.check_in_time.date(), datetime.max.time().replace(microsecond=0))
-                # Estimate 1 hour duration for unclosed sessions
-                record.duration_minutes = 60
-        
-        if old_unclosed:
+        # Reserve a place before writing so concurrent check-ins can't overshoot capacity
+        occupancy = get_occupancy_counter()
+        if not occupancy.try_enter(gym_capacity()):
+            existing = open_app_visit(db, current_user.id)
+            if existing and existing.check_in_time.date() == datetime.utcnow().date():
+                return already_checked_in(existing)
+            raise HTTPException(status_code=409, detail="The gym is at full capacity right now. Please try again shortly.")
+        
+        # Fast path: a single INSERT; stale visits are closed by the background sweeper
+        try:
+            row = insert_open_visit(db, current_user.id, datetime.utcnow())
+            if row is None:
+                existing = open_app_visit(db, current_user.id)
+                if existing and existing.check_in_time.date() == datetime.utcnow().date():
+                    occupancy.leave()
+                    return already_checked_in(existing)
+                # Open visit from a previous day the sweeper hasn't reached yet
+                close_stale_attendance(db, trainee_id=current_user.id)
+                row = insert_open_visit(db, current_user.id, datetime.utcnow())
             db.commit()
-        
-        # Check if already checked in TODAY (only today's records)
-        existing_today = db.query(Attendance).filter(
-            Attendance.trainee_id == current_user.id,
-            Attendance.check_in_time >= today_start,
-            Attendance.check_in_time <= today_end,
-            Attendance.check_out_time == None
-        ).first()
-        
-        if existing_today:
-            return {
-                "status": "already_checked_in",
-                "attendance_id": existing_today.id,
-                "check_in_time": existing_today.check_in_time.isoformat() if existing_today.check_in_time else None
-            }
-        
-        # Create new attendance record for today
-        checkin_time = datetime.utcnow()
-        attendance = Attendance(
-            trainee_id=current_user.id,
-            check_in_time=checkin_time,
-            check_in_method="app"
-        )
-        db.add(attendance)
-        db.commit()
-        db.refresh(attendance)
+        except Exception:
+            occupancy.leave()
+            raise
         
         return {
             "status": "checked_in",
-            "attendance_id": attendance.id,
-            "check_in_time": attendance.check_in_time.isoformat() if attendance.check_in_time else None
+            "attendance_id": row.id,
+            "check_in_time": row.check_in_time.isoformat() if row.check_in_time else None
         }
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         import traceback
@@ -740,6 +665,8 @@ async def check_out_attendance(
             attendance.duration_minutes = int(duration_delta.total_seconds() / 60)
         
         db.commit()
+        if is_live_visit(attendance):
+            get_occupancy_counter().leave()
         db.refresh(attendance)
         
         return {
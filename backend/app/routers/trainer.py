@@ -9,7 +9,7 @@ from fastapi import (
 )
 from sqlalchemy.orm import Session
 from typing import Dict, List
-from datetime import datetime
+from datetime import datetime, date
 
 from app.database import get_db
 from app.auth_util import get_admin_user
@@ -35,6 +35,7 @@ from app.models import (
     TrainerAttendance,
     TrainerSchedule,
     PTPackage,
+    PTSession,
     Notification,      # ✅ Added for trainer notifications
     # 👇 adjust these two names to your real models if different
     AIReport,          # model with (id, trainee_id, workout_id, report_type, report_json, created_at)
@@ -43,6 +44,7 @@ from app.models import (
 from sqlalchemy import func
 import secrets
 from app.auth_util import get_current_user, verify_token, get_password_hash
+from app.services.payroll import SESSION_MODELS, TRAINEE_MODELS, earnings_breakdown, month_bounds, run_payroll
 
 router = APIRouter(
     tags=["Trainer"]
@@ -1002,6 +1004,31 @@ async def get_trainer_earnings(
     return earnings
 
 
+@router.get("/trainers/payroll")
+async def preview_payroll(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Month-end payroll for all trainers without recording anything"""
+    now = datetime.now()
+    return run_payroll(db, year or now.year, month or now.month, dry_run=True)
+
+
+@router.post("/trainers/payroll/run")
+async def run_trainer_payroll(
+    month: Optional[int] = Query(None, ge=1, le=12),
+    year: Optional[int] = Query(None, ge=2000, le=2100),
+    dry_run: bool = Query(False),
+    current_user: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Run month-end payroll: one payout per trainer, trainers already paid for the month are skipped"""
+    now = datetime.now()
+    return run_payroll(db, year or now.year, month or now.month, dry_run=dry_run)
+
+
 # ==================== HELPER FUNCTIONS ====================
 
 def calculate_trainer_earnings(
@@ -1011,7 +1038,7 @@ def calculate_trainer_earnings(
     month: Optional[int] = None,
     year: Optional[int] = None
 ):
-    """Calculate total trainer earnings"""
+    """Calculate total trainer earnings (same rule as the bulk payroll in app.services.payroll)"""
     
     if not month:
         month = datetime.now().month
@@ -1019,48 +1046,24 @@ def calculate_trainer_earnings(
         year = datetime.now().year
     
     if not salary_config:
-        return {
-            "total": 0,
-            "base_salary": 0,
-            "trainee_commission": 0,
-            "session_commission": 0
-        }
+        return earnings_breakdown(None, 0, 0)
     
-    base_salary = float(salary_config.base_salary or 0)
-    trainee_commission = 0
-    session_commission = 0
+    trainee_count = 0
+    session_count = 0
     
-    # Calculate trainee commission
-    if salary_config.salary_model in ['per_trainee', 'hybrid']:
+    if salary_config.salary_model in TRAINEE_MODELS:
         trainee_count = db.query(Trainee).filter(Trainee.trainer_id == trainer_id).count()
-        trainee_commission = trainee_count * float(salary_config.commission_per_trainee or 0)
     
-    # Calculate session commission
-    if salary_config.salary_model in ['per_session', 'hybrid']:
-        start_date = datetime(year, month, 1)
-        if month == 12:
-            end_date = datetime(year + 1, 1, 1)
-        else:
-            end_date = datetime(year, month + 1, 1)
-        
+    if salary_config.salary_model in SESSION_MODELS:
+        start_date, end_date = month_bounds(year, month)
         session_count = db.query(PTSession).filter(
             PTSession.trainer_id == trainer_id,
             PTSession.session_date >= start_date,
             PTSession.session_date < end_date,
             PTSession.status == 'completed'
         ).count()
-        
-        session_commission = session_count * float(salary_config.commission_per_session or 0)
-    
-    total = base_salary + trainee_commission + session_commission
     
-    return {
-        "total": round(total, 2),
-        "base_salary": round(base_salary, 2),
-        "trainee_commission": round(trainee_commission, 2),
-        "session_commission": round(session_commission, 2),
-        "salary_model": salary_config.salary_model
-    }
+    return earnings_breakdown(salary_config, trainee_count, session_count)
 
 
 # ==================== PT PACKAGE MANAGEMENT ====================
@@ -1138,6 +1141,8 @@ async def get_pt_packages(
 
 @router.get("/attendance/summary")
 def get_trainer_attendance_summary(
+    start_date: Optional[date] = Query(None, description="Only count check-ins on or after this date"),
+    end_date: Optional[date] = Query(None, description="Only count check-ins on or before this date"),
     current_user: User = Depends(require_trainer_or_admin),
     db: Session = Depends(get_db)
 ):
@@ -1146,36 +1151,11 @@ def get_trainer_attendance_summary(
     if not trainer and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not a trainer")
 
-    if current_user.role == UserRole.TRAINER:
-        trainees = db.query(Trainee).filter(Trainee.trainer_id == trainer.id).all()
-    else:
-        trainees = db.query(Trainee).all()
-
-    summary = {}
-    for t in trainees:
-        # Get attendance records for this trainee (by user_id since Attendance uses users.id)
-        records = db.query(Attendance).filter(Attendance.trainee_id == t.user_id).all()
-        total = len(records)
-        
-        # Count "present" as having a check_in_time (successful check-in)
-        # The Attendance model tracks check-ins, so any record = present
-        present = len([r for r in records if r.check_in_time is not None])
-        
-        # Calculate attendance percentage based on expected days
-        # For now, we use total records as base (each record = 1 day attempted)
-        summary[str(t.id)] = {
-            "total_days": total,
-            "present": present,
-            "absent": 0,  # With check-in model, absence = no record for that day
-            "percentage": round((present / max(total, 1) * 100), 1) if total > 0 else 0,
-            "last_check_in": max((r.check_in_time for r in records if r.check_in_time), default=None)
-        }
-        
-        # Convert last_check_in to string for JSON serialization
-        if summary[str(t.id)]["last_check_in"]:
-            summary[str(t.id)]["last_check_in"] = summary[str(t.id)]["last_check_in"].isoformat()
+    from app.services.attendance_stats import trainee_attendance_summary
 
-    return summary
+    # One grouped query over trainees LEFT JOIN attendance
+    trainer_id = trainer.id if current_user.role == UserRole.TRAINER else None
+    return trainee_attendance_summary(db, trainer_id, start_date, end_date)
 
 
 @router.post("/trainees/{trainee_id}/attendance/mark")
@@ -1716,6 +1696,7 @@ async def get_trainer_schedule(
 @router.get("/trainee/{trainee_id}/progress-summary")
 def get_trainee_progress_summary(
     trainee_id: int,
+    points: int = Query(30, ge=3, le=500, description="Chart points per series"),
     current_user: User = Depends(require_trainer_or_admin),
     db: Session = Depends(get_db)
 ):
@@ -1731,11 +1712,11 @@ def get_trainee_progress_summary(
         Measurement.trainee_id == user_id
     ).order_by(Measurement.created_at).all()
     
-    # Weight progress
-    weight_data = [{"date": m.created_at.isoformat() if m.created_at else None, "weight": m.weight} for m in measurements if m.weight]
-    
-    # Body fat progress
-    bodyfat_data = [{"date": m.created_at.isoformat() if m.created_at else None, "body_fat": m.body_fat} for m in measurements if m.body_fat]
+    # Weight / body fat series over the whole history, downsampled to `points`
+    from app.services.progress_analytics import analyze_measurements
+    series = analyze_measurements(measurements, ("weight", "body_fat"), date_attr="created_at", points=points)
+    weight_data = [{"date": p["date"], "weight": p["value"], "rolling_avg": p["rolling_avg"]} for p in series["weight"]["points"]]
+    bodyfat_data = [{"date": p["date"], "body_fat": p["value"], "rolling_avg": p["rolling_avg"]} for p in series["body_fat"]["points"]]
     
     # Workouts
     workouts = db.query(Workout).filter(
@@ -1743,12 +1724,12 @@ def get_trainee_progress_summary(
     ).all()
     
     # Calculate stats
-    initial_weight = weight_data[0]['weight'] if weight_data else 0
-    current_weight = weight_data[-1]['weight'] if weight_data else 0
+    initial_weight = series["weight"]["first"] or 0
+    current_weight = series["weight"]["last"] or 0
     weight_change = current_weight - initial_weight if initial_weight else 0
     
-    initial_bodyfat = bodyfat_data[0]['body_fat'] if bodyfat_data else 0
-    current_bodyfat = bodyfat_data[-1]['body_fat'] if bodyfat_data else 0
+    initial_bodyfat = series["body_fat"]["first"] or 0
+    current_bodyfat = series["body_fat"]["last"] or 0
     bodyfat_change = current_bodyfat - initial_bodyfat if initial_bodyfat else 0
     
     return {
@@ -1758,13 +1739,15 @@ def get_trainee_progress_summary(
             "initial": initial_weight,
             "current": current_weight,
             "change": weight_change,
-            "data": weight_data[-30:]  # Last 30 measurements
+            "trend_per_week": series["weight"]["slope_per_week"],
+            "data": weight_data
         },
         "bodyfat_progress": {
             "initial": initial_bodyfat,
             "current": current_bodyfat,
             "change": bodyfat_change,
-            "data": bodyfat_data[-30:]
+            "trend_per_week": series["body_fat"]["slope_per_week"],
+            "data": bodyfat_data
         },
         "workouts": {
             "total": len(workouts),
@@ -1865,58 +1848,19 @@ def get_trainee_milestones(
 
 @router.get("/compliance-overview")
 def get_compliance_overview(
+    refresh: bool = Query(False, description="Bypass the short-lived per-trainer cache"),
     current_user: User = Depends(require_trainer_or_admin),
     db: Session = Depends(get_db)
 ):
     """Get trainee compliance for all assigned trainees"""
-    if current_user.role == UserRole.TRAINER:
-        trainer = get_trainer_profile(db, current_user)
-        trainees = db.query(Trainee).filter(Trainee.trainer_id == trainer.id).all()
-    else:
-        trainees = db.query(Trainee).all()
+    from app.services.compliance import cached_compliance_overview
     
-    from app.models import Measurement
-    
-    compliance_data = []
-    for trainee in trainees:
-        # Use user_id for Measurement and Workout tables (they reference users.id, not trainees.id)
-        user_id = trainee.user_id
-        
-        measurements = db.query(Measurement).filter(
-            Measurement.trainee_id == user_id
-        ).count()
-        
-        workouts = db.query(Workout).filter(
-            Workout.trainee_id == user_id
-        ).count()
-        
-        last_measurement = db.query(Measurement).filter(
-            Measurement.trainee_id == user_id
-        ).order_by(Measurement.created_at.desc()).first()
-        
-        # Calculate adherence (measurements per expected frequency)
-        from datetime import timedelta
-        if last_measurement and trainee.user.created_at:
-            days_since_join = (datetime.now() - trainee.user.created_at).days or 1
-            expected_measurements = max(1, days_since_join // 7)  # Weekly expected
-            adherence = min(100, (measurements / expected_measurements) * 100)
-        else:
-            adherence = 0
-        
-        compliance_data.append({
-            "trainee_id": trainee.id,
-            "trainee_name": trainee.user.name,
-            "measurements_logged": measurements,
-            "workouts_completed": workouts,
-            "adherence_rate": round(adherence),
-            "last_measurement": last_measurement.created_at.isoformat() if last_measurement else None,
-            "status": "Active" if adherence >= 70 else ("At Risk" if adherence >= 40 else "Inactive")
-        })
+    trainer_id = None
+    if current_user.role == UserRole.TRAINER:
+        trainer_id = get_trainer_profile(db, current_user).id
     
-    return {
-        "compliance_data": sorted(compliance_data, key=lambda x: x['adherence_rate'], reverse=True),
-        "average_adherence": round(sum(c['adherence_rate'] for c in compliance_data) / max(1, len(compliance_data)))
-    }
+    # Grouped COUNT/MAX queries - fixed query count regardless of trainee count
+    return cached_compliance_overview(db, trainer_id, refresh=refresh)
 
 
 # =========================================================
@@ -0,0 +1,167 @@
+"""
+Activity Stats Service
+======================
+Maintains TraineeActivityStats (current/best streak, last active day,
+totals) so the dashboard reads one row instead of scanning workouts.
+
+- record_workout: called when a workout is started or logged manually
+- remove_workout: called when a workout is deleted
+- rebuild_activity_stats / rebuild_all_activity_stats: full recompute
+  from the workouts table (backfill, or when history changes out of order)
+
+A trainee's row is created with INSERT ... ON CONFLICT DO NOTHING and then
+locked, so two first workouts at once do not collide on the unique
+trainee_id; whichever request created it fills it from history.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import TraineeActivityStats, Workout
+
+
+def _workout_day(start_time: Optional[datetime]) -> date:
+    return (start_time or datetime.utcnow()).date()
+
+
+def compute_streaks(days: Iterable[date]) -> Tuple[int, int]:
+    """(current, best) streaks for sorted distinct days; current is the run ending at the last day."""
+    current = best = 0
+    previous = None
+    for day in days:
+        current = current + 1 if previous and (day - previous).days == 1 else 1
+        best = max(best, current)
+        previous = day
+    return current, best
+
+
+def _lock_stats(db: Session, trainee_id: int) -> Tuple[TraineeActivityStats, bool]:
+    """Lock the trainee's stats row, inserting an empty one if missing; (row, created)."""
+    query = db.query(TraineeActivityStats).filter(
+        TraineeActivityStats.trainee_id == trainee_id
+    ).with_for_update()
+    stats = query.first()
+    if stats is not None:
+        return stats, False
+    created = db.execute(
+        insert(TraineeActivityStats)
+        .values(trainee_id=trainee_id)
+        .on_conflict_do_nothing(index_elements=[TraineeActivityStats.trainee_id])
+        .returning(TraineeActivityStats.id)
+    ).first() is not None
+    # Ours, or the row a concurrent request inserted first
+    return query.one(), created
+
+
+def _apply(stats: TraineeActivityStats, days: List[date], total_workouts: int):
+    stats.current_streak, stats.best_streak = compute_streaks(days)
+    stats.last_active_date = days[-1] if days else None
+    stats.total_active_days = len(days)
+    stats.total_workouts = total_workouts
+
+
+def rebuild_activity_stats(db: Session, trainee_id: int) -> TraineeActivityStats:
+    """Recompute one trainee's stats from their workouts (two small queries). Does not commit."""
+    day = func.date(Workout.start_time)
+    days = [row[0] for row in db.query(day).filter(
+        Workout.trainee_id == trainee_id,
+        Workout.start_time.isnot(None)
+    ).distinct().order_by(day).all()]
+    total = db.query(func.count(Workout.id)).filter(Workout.trainee_id == trainee_id).scalar() or 0
+
+    stats, _ = _lock_stats(db, trainee_id)
+    _apply(stats, days, total)
+    return stats
+
+
+def rebuild_all_activity_stats(db: Session) -> int:
+    """Recompute stats for every trainee with workouts in one pass. Commits; returns rows written."""
+    day = func.date(Workout.start_time)
+    rows = db.query(Workout.trainee_id, day, func.count(Workout.id)).filter(
+        Workout.start_time.isnot(None)
+    ).group_by(Workout.trainee_id, day).order_by(Workout.trainee_id, day).all()
+
+    per_trainee: Dict[int, Tuple[List[date], int]] = {}
+    for trainee_id, workout_day, count in rows:
+        days, total = per_trainee.get(trainee_id, ([], 0))
+        days.append(workout_day)
+        per_trainee[trainee_id] = (days, total + count)
+
+    existing = {s.trainee_id: s for s in db.query(TraineeActivityStats).all()}
+    for trainee_id, stats in existing.items():
+        if trainee_id not in per_trainee:
+            _apply(stats, [], 0)
+    for trainee_id, (days, total) in per_trainee.items():
+        stats = existing.get(trainee_id)
+        if stats is None:
+            stats = TraineeActivityStats(trainee_id=trainee_id)
+            db.add(stats)
+        _apply(stats, days, total)
+
+    db.commit()
+    return len(per_trainee)
+
+
+def record_workout(db: Session, trainee_id: int, start_time: Optional[datetime]) -> TraineeActivityStats:
+    """Account for a newly added workout. Call before committing the workout."""
+    stats, created = _lock_stats(db, trainee_id)
+    if created:
+        db.flush()
+        return rebuild_activity_stats(db, trainee_id)
+
+    day = _workout_day(start_time)
+    last = stats.last_active_date
+
+    if last is not None and day < last:
+        # Backdated workout can join or split runs - recompute from history
+        db.flush()
+        return rebuild_activity_stats(db, trainee_id)
+
+    stats.total_workouts += 1
+    if last != day:
+        stats.total_active_days += 1
+        stats.current_streak = stats.current_streak + 1 if last == day - timedelta(days=1) else 1
+        stats.best_streak = max(stats.best_streak, stats.current_streak)
+        stats.last_active_date = day
+    return stats
+
+
+def remove_workout(db: Session, trainee_id: int, workout: Workout) -> TraineeActivityStats:
+    """Account for a deleted workout. Call after db.delete(workout), before committing."""
+    stats, created = _lock_stats(db, trainee_id)
+    db.flush()
+    if created:
+        return rebuild_activity_stats(db, trainee_id)
+
+    day = _workout_day(workout.start_time)
+    same_day_left = db.query(Workout.id).filter(
+        Workout.trainee_id == trainee_id,
+        func.date(Workout.start_time) == day
+    ).first()
+
+    if same_day_left:
+        stats.total_workouts = max(stats.total_workouts - 1, 0)
+        return stats
+
+    # The day itself disappears, which can shorten or split streaks
+    return rebuild_activity_stats(db, trainee_id)
+
+
+def get_activity_stats(db: Session, trainee_id: int) -> TraineeActivityStats:
+    """Stats row for a trainee, built from history on first access."""
+    stats = db.query(TraineeActivityStats).filter(
+        TraineeActivityStats.trainee_id == trainee_id
+    ).first()
+    if stats is None:
+        stats = rebuild_activity_stats(db, trainee_id)
+        db.commit()
+    return stats
+
+
+def current_streak_on(stats: TraineeActivityStats, today: date) -> int:
+    """Dashboard streak: consecutive workout days ending today (0 if no workout today)."""
+    return stats.current_streak if stats.last_active_date == today else 0
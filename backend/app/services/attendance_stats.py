@@ -0,0 +1,54 @@
+"""
+Attendance Aggregation Service
+==============================
+Per-trainee attendance figures in one grouped query: trainees LEFT JOIN
+attendance, COUNT / COUNT FILTER / MAX(check_in_time) grouped by trainee.
+The optional date window is applied in the join condition so trainees
+without check-ins in the window still appear with zero counts.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models import Attendance, Trainee
+
+
+def trainee_attendance_summary(
+    db: Session,
+    trainer_id=None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, Dict]:
+    """
+    Summary keyed by str(Trainee.id) for the trainer's trainees (all trainees
+    when trainer_id is None). start_date/end_date are inclusive.
+    """
+    # Attendance references users.id, so join on Trainee.user_id
+    join_on = [Attendance.trainee_id == Trainee.user_id]
+    if start_date:
+        join_on.append(Attendance.check_in_time >= datetime.combine(start_date, time.min))
+    if end_date:
+        join_on.append(Attendance.check_in_time < datetime.combine(end_date + timedelta(days=1), time.min))
+
+    query = db.query(
+        Trainee.id,
+        func.count(Attendance.id).label("total"),
+        func.count(Attendance.id).filter(Attendance.check_in_time.isnot(None)).label("present"),
+        func.max(Attendance.check_in_time).label("last_check_in"),
+    ).outerjoin(Attendance, and_(*join_on))
+    if trainer_id is not None:
+        query = query.filter(Trainee.trainer_id == trainer_id)
+
+    summary = {}
+    for row in query.group_by(Trainee.id).all():
+        summary[str(row.id)] = {
+            "total_days": row.total,
+            "present": row.present,
+            "absent": 0,  # With check-in model, absence = no record for that day
+            "percentage": round(row.present / row.total * 100, 1) if row.total > 0 else 0,
+            "last_check_in": row.last_check_in.isoformat() if row.last_check_in else None,
+        }
+    return summary
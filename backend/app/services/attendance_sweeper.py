@@ -0,0 +1,101 @@
+"""
+Attendance Sweeper
+==================
+Closes visits left open on previous days with one set-based UPDATE
+(check-out at the end of the check-in day, duration estimated at 60
+minutes), on a schedule instead of inside the check-in request.
+
+Check-in itself is a single INSERT ... ON CONFLICT DO NOTHING against the
+partial unique index uq_attendance_open_app_visit (one open app visit per
+trainee); only a conflict falls back to looking at the existing row.
+
+Environment:
+    ATTENDANCE_SWEEP_SECONDS   sweep interval (default: 900)
+"""
+
+import os
+from datetime import datetime, time
+from typing import Optional
+
+from sqlalchemy import and_, func, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Attendance
+from app.services.scheduler import schedule_job
+
+SWEEP_JOB = "attendance-sweep"
+APP_METHOD = "app"
+ESTIMATED_DURATION_MINUTES = 60
+OPEN_APP_VISIT = and_(Attendance.check_out_time.is_(None), Attendance.check_in_method == APP_METHOD)
+
+
+def _today_start(now: Optional[datetime] = None) -> datetime:
+    return datetime.combine((now or datetime.utcnow()).date(), time.min)
+
+
+def close_stale_attendance(db: Session, trainee_id: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    Close every visit still open from before today (optionally for one trainee).
+    Does not commit; returns the number of rows closed.
+    """
+    conditions = [
+        Attendance.check_out_time.is_(None),
+        Attendance.check_in_time < _today_start(now),
+    ]
+    if trainee_id is not None:
+        conditions.append(Attendance.trainee_id == trainee_id)
+
+    result = db.execute(
+        update(Attendance)
+        .where(*conditions)
+        .values(
+            check_out_time=func.date_trunc("day", Attendance.check_in_time) + text("interval '23:59:59'"),
+            duration_minutes=ESTIMATED_DURATION_MINUTES,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def sweep_stale_attendance() -> int:
+    """Scheduled job: close stale visits in its own session."""
+    db = SessionLocal()
+    try:
+        closed = close_stale_attendance(db)
+        db.commit()
+        if closed:
+            print(f"Attendance sweep: closed {closed} stale visit(s)")
+        return closed
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_attendance_sweeper():
+    schedule_job(
+        SWEEP_JOB,
+        float(os.getenv("ATTENDANCE_SWEEP_SECONDS", "900")),
+        sweep_stale_attendance,
+        run_immediately=True,
+    )
+
+
+def insert_open_visit(db: Session, trainee_id: int, check_in_time: datetime):
+    """
+    INSERT an app check-in unless the trainee already has an open app visit.
+    Returns (id, check_in_time) of the new row, or None on conflict. Does not commit.
+    """
+    return db.execute(
+        insert(Attendance)
+        .values(trainee_id=trainee_id, check_in_time=check_in_time, check_in_method=APP_METHOD)
+        .on_conflict_do_nothing(index_elements=[Attendance.trainee_id], index_where=OPEN_APP_VISIT)
+        .returning(Attendance.id, Attendance.check_in_time)
+    ).first()
+
+
+def open_app_visit(db: Session, trainee_id: int) -> Optional[Attendance]:
+    return db.query(Attendance).filter(Attendance.trainee_id == trainee_id, OPEN_APP_VISIT).first()
@@ -0,0 +1,107 @@
+"""
+Trainee Compliance Service
+==========================
+Compliance overview (measurements logged, workouts completed, adherence)
+for a trainer's trainees - or every trainee for admins - computed with
+three grouped queries regardless of how many trainees there are.
+
+Results are cached per trainer for COMPLIANCE_CACHE_SECONDS; pass
+refresh=True to recompute.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Measurement, Trainee, User, Workout
+
+COMPLIANCE_CACHE_SECONDS = 60
+
+_cache: Dict[Optional[str], Tuple[float, Dict]] = {}
+_cache_lock = threading.Lock()
+
+
+def _status(adherence: int) -> str:
+    return "Active" if adherence >= 70 else ("At Risk" if adherence >= 40 else "Inactive")
+
+
+def _adherence(measurements: int, joined_at: Optional[datetime], now: datetime) -> float:
+    """Measurements logged vs one expected per week since joining."""
+    if not measurements or not joined_at:
+        return 0
+    if joined_at.tzinfo is None:
+        joined_at = joined_at.replace(tzinfo=timezone.utc)
+    days_since_join = (now - joined_at).days or 1
+    expected_measurements = max(1, days_since_join // 7)
+    return min(100, (measurements / expected_measurements) * 100)
+
+
+def build_compliance_overview(db: Session, trainer_id=None) -> Dict:
+    """Overview for trainees of `trainer_id` (all trainees when None)."""
+    trainees_query = db.query(Trainee.id, Trainee.user_id, User.name, User.created_at).join(
+        User, User.id == Trainee.user_id
+    )
+    user_ids = db.query(Trainee.user_id)
+    if trainer_id is not None:
+        trainees_query = trainees_query.filter(Trainee.trainer_id == trainer_id)
+        user_ids = user_ids.filter(Trainee.trainer_id == trainer_id)
+    user_ids = user_ids.scalar_subquery()
+
+    # Measurement and Workout reference users.id, so group by that
+    measurement_stats = {
+        row.trainee_id: row for row in db.query(
+            Measurement.trainee_id,
+            func.count(Measurement.id).label("count"),
+            func.max(Measurement.created_at).label("last"),
+        ).filter(Measurement.trainee_id.in_(user_ids)).group_by(Measurement.trainee_id).all()
+    }
+    workout_counts = dict(
+        db.query(Workout.trainee_id, func.count(Workout.id)).filter(
+            Workout.trainee_id.in_(user_ids)
+        ).group_by(Workout.trainee_id).all()
+    )
+
+    now = datetime.now(timezone.utc)
+    compliance_data = []
+    for trainee in trainees_query.all():
+        stats = measurement_stats.get(trainee.user_id)
+        measurements = stats.count if stats else 0
+        adherence = round(_adherence(measurements, trainee.created_at, now))
+        compliance_data.append({
+            "trainee_id": trainee.id,
+            "trainee_name": trainee.name,
+            "measurements_logged": measurements,
+            "workouts_completed": workout_counts.get(trainee.user_id, 0),
+            "adherence_rate": adherence,
+            "last_measurement": stats.last.isoformat() if stats and stats.last else None,
+            "status": _status(adherence)
+        })
+
+    return {
+        "compliance_data": sorted(compliance_data, key=lambda x: x['adherence_rate'], reverse=True),
+        "average_adherence": round(sum(c['adherence_rate'] for c in compliance_data) / max(1, len(compliance_data)))
+    }
+
+
+def cached_compliance_overview(db: Session, trainer_id=None, refresh: bool = False) -> Dict:
+    key = str(trainer_id) if trainer_id is not None else None
+    now = time.monotonic()
+    if not refresh:
+        with _cache_lock:
+            hit = _cache.get(key)
+        if hit and now - hit[0] < COMPLIANCE_CACHE_SECONDS:
+            return hit[1]
+
+    overview = build_compliance_overview(db, trainer_id)
+    with _cache_lock:
+        _cache[key] = (now, overview)
+    return overview
+
+
+def clear_compliance_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,85 @@
+"""
+Trainee Dashboard Service
+=========================
+Everything the trainee dashboard shows, fetched in a single SELECT made
+of scalar subqueries (one round trip). Each subquery is an index lookup:
+workouts/measurements by (trainee_id, time), nutrition logs by
+(trainee_id, date) and the trainee_activity_stats row.
+
+Benchmark: python -m benchmarks.bench_dashboard
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import Measurement, NutritionLog, TraineeActivityStats, Workout
+from app.services.activity_stats import current_streak_on, get_activity_stats
+
+
+def _scalar(query, label: str):
+    return query.scalar_subquery().label(label)
+
+
+def dashboard_snapshot(db: Session, trainee_id: int, now: Optional[datetime] = None) -> Dict:
+    """Dashboard figures for a trainee as a flat dict (one query; two if stats need building)."""
+    now = now or datetime.utcnow()
+    today = now.date()
+    day_start = datetime.combine(today, time.min)
+    day_end = day_start + timedelta(days=1)
+
+    last10 = select(func.coalesce(Workout.avg_accuracy, 0).label("accuracy")).where(
+        Workout.trainee_id == trainee_id
+    ).order_by(Workout.start_time.desc()).limit(10).subquery()
+
+    def stats_column(column):
+        return select(column).where(TraineeActivityStats.trainee_id == trainee_id)
+
+    row = db.query(
+        _scalar(select(func.count(Workout.id)).where(
+            Workout.trainee_id == trainee_id,
+            Workout.start_time >= now - timedelta(days=7)
+        ), "weekly_workouts"),
+        _scalar(select(func.coalesce(func.sum(NutritionLog.calories), 0)).where(
+            NutritionLog.trainee_id == trainee_id,
+            NutritionLog.date >= day_start,
+            NutritionLog.date < day_end
+        ), "calories"),
+        _scalar(select(func.coalesce(func.sum(Workout.calories_burned), 0)).where(
+            Workout.trainee_id == trainee_id,
+            Workout.start_time >= day_start,
+            Workout.start_time < day_end
+        ), "calories_burned"),
+        _scalar(select(func.avg(last10.c.accuracy)), "avg_form_score"),
+        _scalar(select(Measurement.weight).where(
+            Measurement.trainee_id == trainee_id
+        ).order_by(Measurement.date.desc()).limit(1), "current_weight"),
+        _scalar(stats_column(TraineeActivityStats.id), "stats_id"),
+        _scalar(stats_column(TraineeActivityStats.current_streak), "current_streak"),
+        _scalar(stats_column(TraineeActivityStats.best_streak), "best_streak"),
+        _scalar(stats_column(TraineeActivityStats.last_active_date), "last_active_date"),
+        _scalar(stats_column(TraineeActivityStats.total_workouts), "total_workouts"),
+    ).one()
+
+    if row.stats_id is None:
+        # First visit since the stats table was added - build the row once
+        stats = get_activity_stats(db, trainee_id)
+        streak, best_streak, total_workouts = (
+            current_streak_on(stats, today), stats.best_streak, stats.total_workouts
+        )
+    else:
+        streak = row.current_streak if row.last_active_date == today else 0
+        best_streak, total_workouts = row.best_streak, row.total_workouts
+
+    return {
+        "weekly_workouts": int(row.weekly_workouts),
+        "total_workouts": total_workouts,
+        "calories": float(row.calories),
+        "calories_burned": float(row.calories_burned),
+        "avg_form_score": round(float(row.avg_form_score), 1) if row.avg_form_score is not None else 0,
+        "current_weight": row.current_weight,
+        "streak": streak,
+        "best_streak": best_streak,
+    }
@@ -0,0 +1,214 @@
+"""
+User Erasure Service
+====================
+Permanently deletes users and everything they own with one
+DELETE FROM users ... RETURNING, instead of a DELETE per child table.
+
+Every foreign key to users, trainers, trainees and workouts is declared
+ON DELETE CASCADE (or SET NULL for audit columns such as approved_by and
+for trainees.trainer_id), so PostgreSQL removes the trainee and trainer
+profiles, workouts, payments, memberships, messages, ... in the same
+statement, using the indexes on the referencing columns. Admin accounts are
+never erased.
+
+Payments removed by the cascade are invisible to the finance ledger's flush
+hook, so erase_users subtracts them from finance_daily_totals first, in the
+same transaction. trainer_documents and trainer_leaves keep String(36)
+trainer ids that cannot reference the UUID trainers.id, so no cascade
+reaches them; erase_users deletes their rows by the erased trainers' ids
+before the users go (erasure jobs end with erase_users and do the same).
+
+For accounts with very large histories, start_erasure_job runs the erasure
+on a background thread: the high-volume child tables (ERASURE_CHUNKED_TABLES)
+are emptied in chunks of ERASURE_CHUNK_SIZE rows with a commit per chunk, so
+no single transaction holds locks for long, and the job reports progress
+as it goes. The users themselves are then erased with erase_users. Jobs are
+kept in memory in the process that started them.
+"""
+
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import String, cast, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import (
+    Attendance, Measurement, Message, Notification, NutritionLog, Payment,
+    ProgressMeasurement, Trainer, TrainerDocument, TrainerLeave, TrainerMessage, User, UserRole, Workout,
+)
+from app.services.finance_ledger import remove_payments_from_ledger
+
+ERASURE_CHUNK_SIZE = 5000
+MAX_FINISHED_JOBS = 100
+
+# (model, user id column) pairs emptied chunk by chunk by erasure jobs
+ERASURE_CHUNKED_TABLES = (
+    (Attendance, Attendance.trainee_id),
+    (Workout, Workout.trainee_id),
+    (Measurement, Measurement.trainee_id),
+    (ProgressMeasurement, ProgressMeasurement.trainee_id),
+    (NutritionLog, NutritionLog.trainee_id),
+    (Notification, Notification.user_id),
+    (Message, Message.sender_id),
+    (Message, Message.receiver_id),
+    (TrainerMessage, TrainerMessage.sender_id),
+    (TrainerMessage, TrainerMessage.receiver_id),
+)
+
+_jobs: Dict[str, "ErasureJob"] = {}
+_jobs_lock = threading.Lock()
+
+
+def _unique_ids(user_ids: Iterable[int]) -> List[int]:
+    return sorted({int(user_id) for user_id in user_ids})
+
+
+def erase_users(db: Session, user_ids: Iterable[int]) -> Dict:
+    """
+    Delete the given users and, through the cascades, all their data.
+    Admins are skipped. Does not commit.
+    """
+    ids = _unique_ids(user_ids)
+    if not ids:
+        return {"deleted": [], "not_found": [], "skipped_admins": []}
+
+    roles = dict(db.query(User.id, User.role).filter(User.id.in_(ids)).all())
+    admins = sorted(user_id for user_id, role in roles.items() if role == UserRole.ADMIN)
+    erasable = sorted(user_id for user_id, role in roles.items() if role != UserRole.ADMIN)
+
+    deleted = []
+    if erasable:
+        remove_payments_from_ledger(db, Payment.trainee_id.in_(erasable))
+        trainer_ids = select(cast(Trainer.id, String)).where(Trainer.user_id.in_(erasable))
+        for model in (TrainerDocument, TrainerLeave):
+            db.execute(
+                delete(model)
+                .where(model.trainer_id.in_(trainer_ids))
+                .execution_options(synchronize_session=False)
+            )
+        deleted = sorted(db.execute(
+            delete(User)
+            .where(User.id.in_(erasable), User.role != UserRole.ADMIN)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all())
+        # Objects of the erased rows may still sit in the identity map
+        db.expire_all()
+
+    return {
+        "deleted": deleted,
+        "not_found": [user_id for user_id in ids if user_id not in roles],
+        "skipped_admins": admins,
+    }
+
+
+# ====================== BACKGROUND JOBS ======================
+
+class ErasureJob:
+    def __init__(self, user_ids: List[int], chunk_size: int = ERASURE_CHUNK_SIZE):
+        self.id = uuid.uuid4().hex
+        self.user_ids = user_ids
+        self.chunk_size = chunk_size
+        self.status = "pending"
+        self.total_rows = 0
+        self.deleted_rows = 0
+        self.current_table: Optional[str] = None
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+
+    def to_dict(self) -> Dict:
+        total = self.total_rows
+        if self.status == "completed":
+            progress = 100.0
+        else:
+            progress = round(min(self.deleted_rows / total, 1) * 100, 1) if total else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "user_ids": self.user_ids,
+            "total_rows": total,
+            "deleted_rows": self.deleted_rows,
+            "progress_percent": progress,
+            "current_table": self.current_table,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+    def _erasable_ids(self, db: Session) -> List[int]:
+        return [
+            user_id for (user_id,) in db.query(User.id).filter(
+                User.id.in_(self.user_ids), User.role != UserRole.ADMIN
+            )
+        ]
+
+    def _delete_chunks(self, db: Session, ids: List[int]):
+        for model, column in ERASURE_CHUNKED_TABLES:
+            self.current_table = model.__tablename__
+            chunk = select(model.id).where(column.in_(ids)).limit(self.chunk_size)
+            while True:
+                deleted = db.execute(
+                    delete(model).where(model.id.in_(chunk)).execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+                self.deleted_rows += deleted
+                if deleted < self.chunk_size:
+                    break
+
+    def run(self):
+        db = SessionLocal()
+        try:
+            self.status = "running"
+            ids = self._erasable_ids(db)
+            self.total_rows = len(ids) + sum(
+                db.query(func.count(model.id)).filter(column.in_(ids)).scalar()
+                for model, column in ERASURE_CHUNKED_TABLES
+            ) if ids else 0
+            if ids:
+                self._delete_chunks(db, ids)
+            self.current_table = "users"
+            self.result = erase_users(db, self.user_ids)
+            db.commit()
+            self.deleted_rows += len(self.result["deleted"])
+            self.status = "completed"
+        except Exception as e:
+            db.rollback()
+            self.status = "failed"
+            self.error = str(e)
+            print(f"ERROR in erasure job {self.id}: {e}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self.current_table = None
+            self.finished_at = datetime.now(timezone.utc)
+            db.close()
+
+
+def _prune_jobs():
+    finished = sorted(
+        (job for job in _jobs.values() if job.finished_at is not None),
+        key=lambda job: job.finished_at,
+    )
+    for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+        del _jobs[job.id]
+
+
+def start_erasure_job(user_ids: Iterable[int], chunk_size: int = ERASURE_CHUNK_SIZE) -> ErasureJob:
+    """Erase users on a background thread; poll get_erasure_job for progress."""
+    job = ErasureJob(_unique_ids(user_ids), chunk_size=chunk_size)
+    with _jobs_lock:
+        _prune_jobs()
+        _jobs[job.id] = job
+    threading.Thread(target=job.run, name=f"erasure-{job.id}", daemon=True).start()
+    return job
+
+
+def get_erasure_job(job_id: str) -> Optional[ErasureJob]:
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,67 @@
+"""
+Local stand-in for razorpay.Client, for development and load tests.
+
+Orders are created in memory; signatures use Razorpay's real scheme
+(HMAC-SHA256 of "<order_id>|<payment_id>" with the key secret) through the
+SDK's own Utility, so verification behaves exactly like production.
+sign_payment() produces what the checkout widget would return.
+
+Enabled with RAZORPAY_FAKE=true (see routers/payments.py). Never enable
+it in production: anyone can compute signatures for the fake secret.
+"""
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from typing import Dict, Tuple
+
+from razorpay.utility import Utility
+
+DEFAULT_KEY_ID = "rzp_test_fake"
+DEFAULT_KEY_SECRET = "fake_secret"
+
+
+class _FakeOrders:
+    def __init__(self):
+        self._orders: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def create(self, data: Dict) -> Dict:
+        order = {
+            "id": f"order_{secrets.token_hex(7)}",
+            "entity": "order",
+            "amount": data["amount"],
+            "currency": data.get("currency", "INR"),
+            "receipt": data.get("receipt"),
+            "notes": data.get("notes", {}),
+            "status": "created",
+            "created_at": int(time.time()),
+        }
+        with self._lock:
+            self._orders[order["id"]] = order
+        return order
+
+    def fetch(self, order_id: str) -> Dict:
+        return self._orders[order_id]
+
+
+class FakeRazorpayClient:
+    def __init__(self, auth: Tuple[str, str] = (DEFAULT_KEY_ID, DEFAULT_KEY_SECRET)):
+        self.auth = auth
+        self.order = _FakeOrders()
+        self.utility = Utility(self)
+
+    def sign_payment(self, order_id: str, payment_id: str) -> str:
+        message = f"{order_id}|{payment_id}".encode()
+        return hmac.new(self.auth[1].encode(), message, hashlib.sha256).hexdigest()
+
+    def pay(self, order_id: str) -> Dict:
+        """Simulate a successful checkout: the fields the frontend posts to /verify-payment."""
+        payment_id = f"pay_{secrets.token_hex(7)}"
+        return {
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": self.sign_payment(order_id, payment_id),
+        }
@@ -0,0 +1,328 @@
+"""
+Finance Export Service
+======================
+Streaming payment exports for the admin billing screen. Rows come from a
+server-side cursor (yield_per), and every writer emits chunks as it goes,
+so memory stays flat however many payments are exported:
+
+- iter_csv:  chunked csv.writer output
+- iter_xlsx: a minimal SpreadsheetML workbook zipped on the fly (inline
+  strings, no shared-string table), written to a non-seekable sink
+- iter_pdf:  reportlab report drawn page by page - SQL totals per status
+  and mode, then the payment rows (capped at FINANCE_PDF_MAX_ROWS since a
+  PDF is meant to be read; CSV/XLSX carry the full data)
+
+Environment:
+    FINANCE_PDF_MAX_ROWS   detail rows in the PDF report (default: 10000)
+"""
+
+import csv
+import io
+import os
+import zipfile
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, List, Optional
+from xml.sax.saxutils import escape
+
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+
+from app.models import Payment, User
+
+STREAM_BATCH_SIZE = 2000
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_COLUMNS = [
+    "id", "created_at", "receipt_number", "trainee_email", "amount",
+    "status", "payment_mode", "provider", "is_refund", "refund_amount",
+]
+
+
+def export_query(
+    db: Session,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    status: Optional[str] = None,
+) -> Query:
+    """Payments in the (inclusive) date range, oldest first, projected to EXPORT_COLUMNS."""
+    query = db.query(
+        Payment.id,
+        Payment.created_at,
+        Payment.receipt_number,
+        User.email.label("trainee_email"),
+        Payment.amount,
+        Payment.status,
+        Payment.payment_mode,
+        Payment.provider,
+        Payment.is_refund,
+        Payment.refund_amount,
+    ).outerjoin(User, User.id == Payment.trainee_id)
+    return _filtered(query, start_date, end_date, status).order_by(Payment.created_at, Payment.id)
+
+
+def _filtered(query: Query, start_date, end_date, status) -> Query:
+    if start_date:
+        query = query.filter(Payment.created_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.filter(Payment.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    if status:
+        query = query.filter(Payment.status == status)
+    return query
+
+
+def _values(row) -> List:
+    return [
+        row.id,
+        row.created_at.isoformat() if row.created_at else "",
+        row.receipt_number or "",
+        row.trainee_email or "",
+        float(row.amount or 0),
+        row.status or "",
+        row.payment_mode or "",
+        row.provider or "",
+        bool(row.is_refund),
+        float(row.refund_amount) if row.refund_amount is not None else "",
+    ]
+
+
+# ====================== CSV ======================
+
+def iter_csv(query: Query) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(EXPORT_COLUMNS)
+    for i, row in enumerate(query.yield_per(STREAM_BATCH_SIZE), 1):
+        writer.writerow(_values(row))
+        if i % STREAM_BATCH_SIZE == 0:
+            yield flush()
+    yield flush()
+
+
+# ====================== XLSX ======================
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable stream; zipfile then writes data descriptors."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def pending(self) -> int:
+        return self._size
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self._size = 0
+        return data
+
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Payments" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value) -> str:
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    if value == "":
+        return '<c/>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _xlsx_row(values) -> str:
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def iter_xlsx(query: Query) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/workbook.xml", _WORKBOOK)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+
+        with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_HEAD + _xlsx_row(EXPORT_COLUMNS)).encode())
+            for row in query.yield_per(STREAM_BATCH_SIZE):
+                sheet.write(_xlsx_row(_values(row)).encode())
+                if sink.pending() >= CHUNK_SIZE:
+                    yield sink.drain()
+            sheet.write(_SHEET_TAIL.encode())
+    yield sink.drain()
+
+
+# ====================== PDF ======================
+
+def pdf_max_rows() -> int:
+    try:
+        return max(int(os.getenv("FINANCE_PDF_MAX_ROWS", "10000")), 0)
+    except ValueError:
+        return 10000
+
+
+def export_totals(db: Session, start_date=None, end_date=None, status=None):
+    """(status, mode, count, total) grouped in SQL for the report header."""
+    query = db.query(
+        Payment.status,
+        Payment.payment_mode,
+        func.count(Payment.id),
+        func.coalesce(func.sum(Payment.amount), 0),
+    )
+    return _filtered(query, start_date, end_date, status) \
+        .group_by(Payment.status, Payment.payment_mode) \
+        .order_by(Payment.status, Payment.payment_mode) \
+        .all()
+
+
+# (header, x offset, value index in _values, max chars)
+_PDF_COLUMNS = [
+    ("ID", 40, 0, 8),
+    ("Date", 85, 1, 16),
+    ("Receipt", 175, 2, 22),
+    ("Trainee", 295, 3, 30),
+    ("Status", 450, 5, 10),
+    ("Mode", 505, 6, 10),
+]
+_PDF_AMOUNT_X = 570
+
+
+def iter_pdf(query: Query, totals, max_rows: int, title: str = "Finance Report") -> Iterator[bytes]:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    output = io.BytesIO()
+    pdf = canvas.Canvas(output, pagesize=A4, pageCompression=1)
+    width, height = A4
+    top, bottom, line = height - 50, 50, 14
+    page = 1
+
+    def footer():
+        pdf.setFont("Helvetica", 8)
+        pdf.drawRightString(width - 40, 25, f"Page {page}")
+
+    def new_page():
+        nonlocal page
+        footer()
+        pdf.showPage()
+        page += 1
+        return top
+
+    def table_header(y):
+        pdf.setFont("Helvetica-Bold", 9)
+        for header, x, _, _ in _PDF_COLUMNS:
+            pdf.drawString(x, y, header)
+        pdf.drawRightString(_PDF_AMOUNT_X, y, "Amount")
+        pdf.setFont("Helvetica", 8)
+        return y - line
+
+    # Summary from the grouped totals
+    y = top
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(40, y, title)
+    pdf.setFont("Helvetica", 9)
+    pdf.drawString(40, y - 16, f"Generated {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC")
+    y -= 44
+    pdf.setFont("Helvetica-Bold", 11)
+    pdf.drawString(40, y, "Totals")
+    y -= line
+    pdf.setFont("Helvetica", 9)
+    total_count, total_amount = 0, 0.0
+    for status, mode, count, amount in totals:
+        pdf.drawString(40, y, f"{status or '-'} / {mode or '-'}")
+        pdf.drawString(250, y, f"{count} payments")
+        pdf.drawRightString(_PDF_AMOUNT_X, y, f"{float(amount):,.2f}")
+        total_count += count
+        total_amount += float(amount)
+        y -= line
+        if y < bottom:
+            y = new_page()
+    pdf.setFont("Helvetica-Bold", 9)
+    pdf.drawString(40, y, "All")
+    pdf.drawString(250, y, f"{total_count} payments")
+    pdf.drawRightString(_PDF_AMOUNT_X, y, f"{total_amount:,.2f}")
+    y -= 2 * line
+
+    # Detail rows, one page at a time
+    if y < bottom + 3 * line:
+        y = new_page()
+    y = table_header(y)
+    shown = 0
+    for row in query.limit(max_rows).yield_per(STREAM_BATCH_SIZE):
+        if y < bottom:
+            y = table_header(new_page())
+        values = _values(row)
+        for _, x, index, max_chars in _PDF_COLUMNS:
+            pdf.drawString(x, y, str(values[index])[:max_chars])
+        pdf.drawRightString(_PDF_AMOUNT_X, y, f"{values[4]:,.2f}")
+        y -= line
+        shown += 1
+
+    if shown < total_count:
+        if y < bottom + line:
+            y = new_page()
+        pdf.setFont("Helvetica-Oblique", 9)
+        pdf.drawString(40, y - 4, f"Showing the first {shown} of {total_count} payments. "
+                                  f"Use the CSV or Excel export for the full list.")
+    footer()
+    pdf.save()
+
+    output.seek(0)
+    while True:
+        chunk = output.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
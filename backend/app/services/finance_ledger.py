@@ -0,0 +1,319 @@
+"""
+Finance Ledger
+==============
+Running per-day payment totals (finance_daily_totals), so finance summaries
+read a handful of rows per day instead of summing the whole payments table.
+
+Each ledger row is keyed by (day, status, payment_mode, provider) and holds
+payment_count / amount / refund_count / refund_amount. A Session
+before_flush hook turns every ORM insert, update (status, amount, refund,
+mode, ...) and delete of a Payment into deltas: the old contribution (read
+from the database, which the flush has not touched yet) is subtracted, the
+new one added, and the net deltas are upserted in one INSERT ... ON
+CONFLICT DO UPDATE, in the same transaction as the payment change. The old
+rows are read FOR UPDATE (in id order), so two transactions changing the
+same payment compute their deltas one after the other instead of both
+subtracting the same old contribution.
+
+Writes that bypass the unit of work (Query.update/delete, raw SQL, cascade
+deletes of users) are not seen by the hook. Bulk deleters can call
+remove_payments_from_ledger first; otherwise reconcile_finance_ledger
+recomputes the totals with one GROUP BY over payments, reports rows that
+drifted and repairs them. Ledger writers wait while it runs, so the
+scheduled run (hourly and at startup) only checks the last
+FINANCE_RECONCILE_DAYS days, a range scan on payments.created_at. A full
+check of all history is opt-in from the admin endpoint (?full=true).
+
+Environment:
+    FINANCE_RECONCILE_SECONDS   reconciliation interval (default: 3600)
+    FINANCE_RECONCILE_DAYS      days checked by scheduled runs (default: 3)
+"""
+
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import FinanceDailyTotal, Payment
+from app.services.scheduler import schedule_job
+
+RECONCILE_JOB = "finance-ledger-reconcile"
+TRACKED_COLUMNS = ("created_at", "status", "payment_mode", "provider", "amount", "refund_amount")
+KEY_COLUMNS = ("day", "status", "payment_mode", "provider")
+AMOUNT_TOLERANCE = 0.005
+MAX_REPORTED_MISMATCHES = 50
+
+
+def ledger_day(created_at: datetime) -> date:
+    """UTC calendar day of a payment; naive timestamps are taken as UTC."""
+    if created_at.tzinfo is not None:
+        created_at = created_at.astimezone(timezone.utc)
+    return created_at.date()
+
+
+def _contribution(values: Dict) -> Optional[Tuple[Tuple, Tuple]]:
+    """(ledger key, (count, amount, refund_count, refund_amount)) of one payment's column values."""
+    if values["created_at"] is None:
+        return None
+    key = (
+        ledger_day(values["created_at"]),
+        values["status"] or "",
+        values["payment_mode"] or "",
+        values["provider"] or "",
+    )
+    refund = float(values["refund_amount"] or 0)
+    return key, (1, float(values["amount"] or 0), 1 if refund else 0, refund)
+
+
+def _accumulate(deltas: Dict, values: Dict, sign: int):
+    contribution = _contribution(values)
+    if contribution is None:
+        return
+    key, totals = contribution
+    for i, value in enumerate(totals):
+        deltas[key][i] += sign * value
+
+
+def _tracked_changes(payment: Payment) -> Dict:
+    """New values of the tracked columns changed on a persistent payment (no loads)."""
+    changes = {}
+    attrs = inspect(payment).attrs
+    for name in TRACKED_COLUMNS:
+        history = attrs[name].history
+        if history.added:
+            changes[name] = history.added[0]
+    return changes
+
+
+def apply_ledger_deltas(connection, deltas: Dict):
+    """Upsert net per-key deltas, in key order so concurrent flushes lock rows in the same order."""
+    rows = [
+        dict(zip(KEY_COLUMNS, key), payment_count=d[0], amount=d[1], refund_count=d[2], refund_amount=d[3])
+        for key, d in sorted(deltas.items())
+        if d[0] or d[2] or abs(d[1]) > 1e-9 or abs(d[3]) > 1e-9
+    ]
+    if not rows:
+        return
+    stmt = insert(FinanceDailyTotal).values(rows)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[getattr(FinanceDailyTotal, c) for c in KEY_COLUMNS],
+        set_={
+            c: getattr(FinanceDailyTotal, c) + getattr(stmt.excluded, c)
+            for c in ("payment_count", "amount", "refund_count", "refund_amount")
+        },
+    ))
+
+
+@event.listens_for(Session, "before_flush")
+def track_payment_changes(session: Session, flush_context, instances):
+    deltas = defaultdict(lambda: [0, 0.0, 0, 0.0])
+
+    for obj in session.new:
+        if isinstance(obj, Payment):
+            if obj.created_at is None:
+                # Pin the day now instead of leaving it to the server default
+                obj.created_at = datetime.now(timezone.utc)
+            if obj.status is None:
+                # Column default, otherwise only applied after this hook
+                obj.status = Payment.__table__.c.status.default.arg
+            _accumulate(deltas, {c: getattr(obj, c) for c in TRACKED_COLUMNS}, +1)
+
+    changed = {}
+    for obj in session.dirty:
+        if isinstance(obj, Payment) and obj.id is not None:
+            changes = _tracked_changes(obj)
+            if changes:
+                changed[obj.id] = changes
+    removed = {obj.id for obj in session.deleted if isinstance(obj, Payment) and obj.id is not None}
+
+    ids = set(changed) | removed
+    if ids:
+        columns = [getattr(Payment, c) for c in TRACKED_COLUMNS]
+        old_rows = session.connection().execute(
+            select(Payment.id, *columns).where(Payment.id.in_(ids)).order_by(Payment.id).with_for_update()
+        ).mappings()
+        for old in old_rows:
+            _accumulate(deltas, old, -1)
+            if old["id"] not in removed:
+                _accumulate(deltas, {**old, **changed[old["id"]]}, +1)
+
+    if deltas:
+        apply_ledger_deltas(session.connection(), deltas)
+
+
+# ====================== SUMMARIES ======================
+
+def finance_summary(db: Session, today: Optional[date] = None) -> Dict:
+    """All-time amount and refunds over every status, plus today's amount."""
+    today = today or datetime.now(timezone.utc).date()
+    total_revenue, total_refunds, today_revenue = db.query(
+        func.coalesce(func.sum(FinanceDailyTotal.amount), 0),
+        func.coalesce(func.sum(FinanceDailyTotal.refund_amount), 0),
+        func.coalesce(func.sum(FinanceDailyTotal.amount).filter(FinanceDailyTotal.day == today), 0),
+    ).one()
+    return {
+        "total_revenue": float(total_revenue),
+        "total_refunds": float(total_refunds),
+        "net_revenue": float(total_revenue) - float(total_refunds),
+        "today_revenue": float(today_revenue),
+    }
+
+
+def completed_revenue(db: Session, days: int = 30, today: Optional[date] = None) -> Tuple[float, float]:
+    """(all-time, last `days` days including today) amount of completed payments."""
+    today = today or datetime.now(timezone.utc).date()
+    total, recent = db.query(
+        func.coalesce(func.sum(FinanceDailyTotal.amount), 0),
+        func.coalesce(func.sum(FinanceDailyTotal.amount).filter(
+            FinanceDailyTotal.day > today - timedelta(days=days)
+        ), 0),
+    ).filter(FinanceDailyTotal.status == "completed").one()
+    return float(total), float(recent)
+
+
+# ====================== RECONCILIATION ======================
+
+def _actual_totals(db: Session, *criteria) -> Dict[Tuple, Tuple]:
+    key = (
+        func.date(func.timezone("UTC", Payment.created_at)),
+        func.coalesce(Payment.status, ""),
+        func.coalesce(Payment.payment_mode, ""),
+        func.coalesce(Payment.provider, ""),
+    )
+    rows = db.query(
+        *key,
+        func.count(),
+        func.coalesce(func.sum(Payment.amount), 0),
+        func.count().filter(Payment.refund_amount != 0),
+        func.coalesce(func.sum(Payment.refund_amount), 0),
+    ).filter(Payment.created_at.isnot(None), *criteria).group_by(*key).all()
+    return {tuple(row[:4]): (row[4], float(row[5]), row[6], float(row[7])) for row in rows}
+
+
+def remove_payments_from_ledger(db: Session, *criteria):
+    """
+    Subtract the payments matching `criteria` from the ledger, for callers
+    about to delete them in bulk (e.g. through a cascade). Does not commit.
+    """
+    deltas = {key: [-value for value in totals] for key, totals in _actual_totals(db, *criteria).items()}
+    apply_ledger_deltas(db.connection(), deltas)
+
+
+def _same(a: Tuple, b: Tuple) -> bool:
+    return (
+        a[0] == b[0] and a[2] == b[2]
+        and abs(a[1] - b[1]) <= AMOUNT_TOLERANCE
+        and abs(a[3] - b[3]) <= AMOUNT_TOLERANCE
+    )
+
+
+def reconcile_days() -> int:
+    try:
+        return max(int(os.getenv("FINANCE_RECONCILE_DAYS", "3")), 1)
+    except ValueError:
+        return 3
+
+
+def reconcile_finance_ledger(
+    db: Session,
+    repair: bool = True,
+    days: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Dict:
+    """
+    Compare the ledger with a fresh GROUP BY over payments and (if repair)
+    overwrite drifted rows. With `days`, only the last `days` UTC days up to
+    `today` are checked; None checks all history. Blocks ledger writers
+    until the caller commits, so both sides are read at the same point.
+    Does not commit.
+    """
+    payment_criteria, ledger_criteria = [], []
+    if days is not None:
+        first_day = (today or datetime.now(timezone.utc).date()) - timedelta(days=days - 1)
+        payment_criteria.append(
+            Payment.created_at >= datetime.combine(first_day, datetime.min.time(), tzinfo=timezone.utc)
+        )
+        ledger_criteria.append(FinanceDailyTotal.day >= first_day)
+
+    db.execute(text("LOCK TABLE finance_daily_totals IN EXCLUSIVE MODE"))
+    actual = _actual_totals(db, *payment_criteria)
+    ledger = {
+        (row.day, row.status, row.payment_mode, row.provider):
+            (row.id, (row.payment_count, float(row.amount), row.refund_count, float(row.refund_amount)))
+        for row in db.query(FinanceDailyTotal).filter(*ledger_criteria)
+    }
+
+    zero = (0, 0.0, 0, 0.0)
+    mismatches: List[Dict] = []
+    for key in sorted(set(actual) | set(ledger)):
+        expected = actual.get(key, zero)
+        recorded = ledger[key][1] if key in ledger else zero
+        if not _same(expected, recorded):
+            mismatches.append({"key": key, "ledger": recorded, "actual": expected})
+
+    if repair and mismatches:
+        stale_ids = [ledger[m["key"]][0] for m in mismatches if m["key"] in ledger and m["key"] not in actual]
+        if stale_ids:
+            db.query(FinanceDailyTotal).filter(FinanceDailyTotal.id.in_(stale_ids)).delete(synchronize_session=False)
+        rows = [
+            dict(zip(KEY_COLUMNS, m["key"]), payment_count=m["actual"][0], amount=m["actual"][1],
+                 refund_count=m["actual"][2], refund_amount=m["actual"][3])
+            for m in mismatches if m["key"] in actual
+        ]
+        if rows:
+            stmt = insert(FinanceDailyTotal).values(rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[getattr(FinanceDailyTotal, c) for c in KEY_COLUMNS],
+                set_={
+                    c: getattr(stmt.excluded, c)
+                    for c in ("payment_count", "amount", "refund_count", "refund_amount")
+                },
+            ))
+
+    return {
+        "days": days,
+        "checked_rows": len(set(actual) | set(ledger)),
+        "mismatches": len(mismatches),
+        "repaired": bool(repair and mismatches),
+        "details": [
+            {
+                "day": m["key"][0].isoformat(),
+                "status": m["key"][1],
+                "payment_mode": m["key"][2],
+                "provider": m["key"][3],
+                "ledger": dict(zip(("payment_count", "amount", "refund_count", "refund_amount"), m["ledger"])),
+                "actual": dict(zip(("payment_count", "amount", "refund_count", "refund_amount"), m["actual"])),
+            }
+            for m in mismatches[:MAX_REPORTED_MISMATCHES]
+        ],
+    }
+
+
+def reconcile_job() -> Dict:
+    """Scheduled job: verify and repair the recent ledger days in its own session."""
+    db = SessionLocal()
+    try:
+        result = reconcile_finance_ledger(db, repair=True, days=reconcile_days())
+        db.commit()
+        if result["mismatches"]:
+            print(f"Finance ledger: repaired {result['mismatches']} drifted row(s)")
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_finance_reconciler():
+    schedule_job(
+        RECONCILE_JOB,
+        float(os.getenv("FINANCE_RECONCILE_SECONDS", "3600")),
+        reconcile_job,
+        run_immediately=True,
+    )
@@ -0,0 +1,251 @@
+"""
+Food Recognizer Backends
+========================
+Pluggable, fully offline food recognition:
+- HeuristicRecognizer: colour-region segmentation (always available)
+- OnnxRecognizer: local CPU classifier loaded from FOOD_MODEL_PATH
+- MicroBatcher: groups concurrent requests arriving within a short
+  window into a single batched inference call
+
+The active recognizer is loaded once at startup via load_food_recognizer().
+If no model file is configured (or onnxruntime is not installed) the
+heuristic recognizer is used.
+
+Environment:
+    FOOD_MODEL_PATH        path to an .onnx image classifier (optional)
+    FOOD_MODEL_LABELS      label file, one food per line (default: <model>.labels.txt)
+    FOOD_BATCH_WINDOW_MS   how long to wait for more requests (default: 8)
+    FOOD_MAX_BATCH         max images per inference call (default: 16)
+"""
+
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.food_segmentation import (
+    FULL_PLATE_GRAMS,
+    load_image_array,
+    segment_food_regions_batch,
+)
+
+IMAGE_SIZE = 256
+RECOGNIZE_TIMEOUT_SECONDS = 10
+
+
+# ====================== RECOGNIZER INTERFACE ======================
+
+class FoodRecognizer(ABC):
+    """
+    Base recognizer. Subclasses implement recognize_batch, which takes a list
+    of decoded RGB arrays and returns, per image, a list of
+    {"food", "confidence", "portion_grams"} dicts ordered by relevance.
+    """
+    name = "base"
+
+    def prepare(self, image_data: bytes) -> np.ndarray:
+        """Decode image bytes. Runs in the caller's thread so decoding stays parallel."""
+        return load_image_array(image_data, IMAGE_SIZE)
+
+    @abstractmethod
+    def recognize_batch(self, images: List[np.ndarray]) -> List[List[Dict]]:
+        """Per image, the recognized foods ordered by relevance."""
+
+
+class HeuristicRecognizer(FoodRecognizer):
+    """Colour-region segmentation (see food_segmentation)"""
+    name = "heuristic"
+
+    def recognize_batch(self, images: List[np.ndarray]) -> List[List[Dict]]:
+        # Batched segmentation needs equal shapes; group images by shape
+        results: List[Optional[List[Dict]]] = [None] * len(images)
+        by_shape: Dict[tuple, List[int]] = {}
+        for i, img in enumerate(images):
+            by_shape.setdefault(img.shape, []).append(i)
+
+        for indices in by_shape.values():
+            regions = segment_food_regions_batch(np.stack([images[i] for i in indices]))
+            for i, image_regions in zip(indices, regions):
+                results[i] = image_regions[:3]
+
+        return results
+
+
+class OnnxRecognizer(FoodRecognizer):
+    """
+    Local ONNX image classifier on CPU.
+
+    Expects a single image input (NCHW or NHWC, float32, ImageNet-normalised)
+    and a (batch, num_classes) output of logits or probabilities.
+    Portions are split from the plate coverage found by segmentation.
+    """
+    name = "onnx"
+
+    MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+    STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+    def __init__(self, model_path: str, labels_path: Optional[str] = None,
+                 top_k: int = 3, min_confidence: float = 0.15):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.getenv("FOOD_MODEL_THREADS", "1"))
+        self.session = ort.InferenceSession(model_path, sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        shape = model_input.shape
+        self.channels_first = shape[1] == 3
+        self.input_size = int(shape[2] if self.channels_first else shape[1])
+        # Models exported with a fixed batch dimension of 1 are run image by image
+        self.fixed_batch = isinstance(shape[0], int) and shape[0] == 1
+
+        labels_path = labels_path or os.path.splitext(model_path)[0] + ".labels.txt"
+        with open(labels_path, encoding="utf-8") as f:
+            self.labels = [line.strip().lower() for line in f if line.strip()]
+
+        self.top_k = top_k
+        self.min_confidence = min_confidence
+        self.heuristic = HeuristicRecognizer()
+
+    def _to_tensor(self, img: np.ndarray) -> np.ndarray:
+        from PIL import Image
+
+        resized = Image.fromarray(img).resize((self.input_size, self.input_size))
+        arr = (np.asarray(resized, dtype=np.float32) / 255.0 - self.MEAN) / self.STD
+        return arr.transpose(2, 0, 1) if self.channels_first else arr
+
+    def recognize_batch(self, images: List[np.ndarray]) -> List[List[Dict]]:
+        batch = np.stack([self._to_tensor(img) for img in images]).astype(np.float32)
+
+        if self.fixed_batch:
+            scores = np.concatenate([self.session.run(None, {self.input_name: batch[i:i + 1]})[0]
+                                     for i in range(len(batch))])
+        else:
+            scores = self.session.run(None, {self.input_name: batch})[0]
+
+        # Accept logits or probabilities
+        if scores.min() < 0 or not np.allclose(scores.sum(axis=1), 1.0, atol=1e-3):
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            scores /= scores.sum(axis=1, keepdims=True)
+
+        regions = self.heuristic.recognize_batch(images)
+        top = np.argsort(-scores, axis=1)[:, :self.top_k]
+
+        results = []
+        for b in range(len(images)):
+            picks = [(self.labels[c], float(scores[b, c])) for c in top[b]
+                     if c < len(self.labels) and scores[b, c] >= self.min_confidence]
+            if not picks:
+                # Classifier is unsure - use the segmentation result for this image
+                results.append(regions[b])
+                continue
+
+            plate_grams = sum(r["portion_grams"] for r in regions[b]) or FULL_PLATE_GRAMS / 2
+            total = sum(p for _, p in picks)
+            results.append([{
+                "food": food,
+                "confidence": round(p, 2),
+                "portion_grams": round(plate_grams * p / total, 0),
+            } for food, p in picks])
+
+        return results
+
+
+# ====================== MICRO-BATCHING ======================
+
+class MicroBatcher:
+    """
+    Collects requests from concurrent callers and runs them through the
+    recognizer in one batch. The worker takes the first waiting request,
+    then keeps collecting until max_batch is reached or window_ms elapses.
+    """
+
+    def __init__(self, recognizer: FoodRecognizer, window_ms: float = 8, max_batch: int = 16):
+        self.recognizer = recognizer
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="food-recognizer", daemon=True)
+        self._worker.start()
+
+    def submit(self, image: np.ndarray) -> Future:
+        future: Future = Future()
+        self._queue.put((image, future))
+        return future
+
+    def _collect(self) -> List[tuple]:
+        items = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(items) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self):
+        while True:
+            items = self._collect()
+            images = [image for image, _ in items]
+            try:
+                results = self.recognizer.recognize_batch(images)
+                for (_, future), result in zip(items, results):
+                    future.set_result(result)
+            except Exception as e:
+                print(f"Food recognizer batch failed: {e}")
+                for _, future in items:
+                    future.set_exception(e)
+
+
+# ====================== ACTIVE RECOGNIZER ======================
+
+_batcher: Optional[MicroBatcher] = None
+_lock = threading.Lock()
+
+
+def create_recognizer() -> FoodRecognizer:
+    """Build the configured recognizer, falling back to heuristics."""
+    model_path = os.getenv("FOOD_MODEL_PATH", "")
+    if model_path and os.path.exists(model_path):
+        try:
+            recognizer = OnnxRecognizer(model_path, os.getenv("FOOD_MODEL_LABELS") or None)
+            print(f"Food recognizer: ONNX model {model_path} ({len(recognizer.labels)} labels)")
+            return recognizer
+        except Exception as e:
+            print(f"Food recognizer: could not load {model_path} ({e}), using heuristics")
+    elif model_path:
+        print(f"Food recognizer: model file {model_path} not found, using heuristics")
+    return HeuristicRecognizer()
+
+
+def load_food_recognizer() -> MicroBatcher:
+    """Load the recognizer once (called at app startup, or lazily on first use)."""
+    global _batcher
+    with _lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                create_recognizer(),
+                window_ms=float(os.getenv("FOOD_BATCH_WINDOW_MS", "8")),
+                max_batch=int(os.getenv("FOOD_MAX_BATCH", "16")),
+            )
+    return _batcher
+
+
+def recognize_foods(image_data: bytes) -> List[Dict]:
+    """
+    Recognize foods in a meal photo. Blocks until the batch containing this
+    image has run, so call it from a worker thread, not the event loop.
+    """
+    batcher = _batcher or load_food_recognizer()
+    image = batcher.recognizer.prepare(image_data)
+    return batcher.submit(image).result(timeout=RECOGNIZE_TIMEOUT_SECONDS)
@@ -0,0 +1,265 @@
+"""
+Food Segmentation Engine
+========================
+Vectorized colour-region segmentation for meal photos:
+- RGB -> HSV conversion on a downsampled pixel grid
+- Mini-batch k-means clustering into k dominant colour regions
+- Region area fractions mapped to foods and portion estimates
+
+Everything runs on NumPy arrays and works on a batch of images at once,
+so the only per-image Python work is building the result dicts.
+"""
+
+from typing import Dict, List
+import numpy as np
+
+# ====================== CONFIG ======================
+
+DEFAULT_CLUSTERS = 5         # dominant colour regions per image
+DEFAULT_GRID = 32            # pixels sampled per side (32x32 = 1024 samples)
+KMEANS_ITERATIONS = 8
+KMEANS_BATCH_SIZE = 256
+FULL_PLATE_GRAMS = 450       # food weight when the whole frame is covered
+MIN_PORTION_GRAMS = 30
+MIN_REGION_FRACTION = 0.04   # ignore specks smaller than 4% of the food area
+
+# Colour profiles: (food, hue_lo, hue_hi, sat_lo, sat_hi, val_lo, val_hi, confidence)
+# Hue in degrees [0, 360), saturation/value in [0, 1]. First match wins, so
+# narrower profiles come before broader ones. "plate" marks background.
+COLOR_FOOD_PROFILES = [
+    ("plate",    0,   360, 0.00, 0.06, 0.85, 1.01, 0.00),   # white plate
+    ("plate",    0,   360, 0.00, 0.06, 0.12, 0.60, 0.00),   # grey table / tray
+    ("plate",    0,   360, 0.00, 1.01, 0.00, 0.12, 0.00),   # shadows / black background
+    ("rice",     0,   360, 0.00, 0.22, 0.60, 1.01, 0.78),   # off-white grains
+    ("broccoli", 75,  170, 0.25, 1.01, 0.12, 0.55, 0.82),   # dark green vegetables
+    ("spinach",  75,  170, 0.25, 1.01, 0.55, 1.01, 0.80),   # bright leafy greens
+    ("tomato",   345, 360, 0.45, 1.01, 0.45, 1.01, 0.80),   # bright red (wraps around 0)
+    ("tomato",   0,   12,  0.45, 1.01, 0.45, 1.01, 0.80),
+    ("beef",     345, 360, 0.25, 1.01, 0.12, 0.45, 0.78),   # dark red / cooked meat
+    ("beef",     0,   25,  0.25, 1.01, 0.12, 0.45, 0.78),
+    ("carrot",   12,  35,  0.55, 1.01, 0.55, 1.01, 0.76),   # saturated orange
+    ("chicken",  15,  45,  0.25, 0.55, 0.45, 1.01, 0.80),   # golden-brown
+    ("egg",      40,  70,  0.35, 1.01, 0.55, 1.01, 0.74),   # yellow
+    ("bread",    20,  55,  0.20, 0.55, 0.30, 0.45, 0.72),   # crust / toast
+    ("beans",    0,   60,  0.20, 1.01, 0.12, 0.30, 0.70),   # dark brown
+]
+
+_PROFILE_TABLE = np.array([p[1:] for p in COLOR_FOOD_PROFILES], dtype=np.float32)
+_PROFILE_NAMES = [p[0] for p in COLOR_FOOD_PROFILES]
+
+
+# ====================== COLOUR SPACE ======================
+
+def rgb_to_hsv(rgb: np.ndarray) -> np.ndarray:
+    """
+    Vectorized RGB -> HSV for arrays shaped (..., 3) with values in [0, 255].
+    Returns hue in degrees [0, 360) and saturation/value in [0, 1].
+    """
+    rgb = rgb.astype(np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    maxc = rgb.max(axis=-1)
+    minc = rgb.min(axis=-1)
+    delta = maxc - minc
+    safe_delta = np.where(delta == 0, 1.0, delta)
+
+    hue = np.where(
+        maxc == r, (g - b) / safe_delta % 6.0,
+        np.where(maxc == g, (b - r) / safe_delta + 2.0, (r - g) / safe_delta + 4.0)
+    ) * 60.0
+    hue = np.where(delta == 0, 0.0, hue)
+    sat = np.where(maxc == 0, 0.0, delta / np.where(maxc == 0, 1.0, maxc))
+
+    return np.stack([hue, sat, maxc], axis=-1).astype(np.float32)
+
+
+def hsv_to_features(hsv: np.ndarray) -> np.ndarray:
+    """Embed HSV into a cone (s*cos h, s*sin h, v) so hue wraps around and greys cluster together."""
+    rad = np.deg2rad(hsv[..., 0])
+    sat = hsv[..., 1]
+    return np.stack([sat * np.cos(rad), sat * np.sin(rad), hsv[..., 2]], axis=-1)
+
+
+def features_to_hsv(features: np.ndarray) -> np.ndarray:
+    """Inverse of hsv_to_features."""
+    hue = np.rad2deg(np.arctan2(features[..., 1], features[..., 0])) % 360.0
+    sat = np.hypot(features[..., 0], features[..., 1])
+    return np.stack([hue, np.clip(sat, 0, 1), np.clip(features[..., 2], 0, 1)], axis=-1)
+
+
+def downsample_grid(images: np.ndarray, grid: int = DEFAULT_GRID) -> np.ndarray:
+    """
+    Sample an evenly spaced grid of pixels from (B, H, W, 3) images.
+    Returns (B, grid * grid, 3). Strided sampling avoids a full resize.
+    """
+    _, height, width, _ = images.shape
+    rows = np.linspace(0, height - 1, min(grid, height)).astype(np.intp)
+    cols = np.linspace(0, width - 1, min(grid, width)).astype(np.intp)
+    sampled = images[:, rows][:, :, cols]
+    return sampled.reshape(images.shape[0], -1, 3)
+
+
+# ====================== CLUSTERING ======================
+
+def _farthest_point_init(features: np.ndarray, k: int) -> np.ndarray:
+    """Deterministic k-means seeding: start near the mean colour, then add the farthest pixel."""
+    batch = features.shape[0]
+    batch_idx = np.arange(batch)
+
+    mean = features.mean(axis=1, keepdims=True)
+    first = ((features - mean) ** 2).sum(-1).argmin(axis=1)
+    centers = [features[batch_idx, first]]
+    min_dist = ((features - centers[0][:, None, :]) ** 2).sum(-1)
+
+    for _ in range(1, k):
+        nxt = min_dist.argmax(axis=1)
+        centers.append(features[batch_idx, nxt])
+        min_dist = np.minimum(min_dist, ((features - centers[-1][:, None, :]) ** 2).sum(-1))
+
+    return np.stack(centers, axis=1)
+
+
+def minibatch_kmeans(
+    features: np.ndarray,
+    k: int = DEFAULT_CLUSTERS,
+    iterations: int = KMEANS_ITERATIONS,
+    batch_size: int = KMEANS_BATCH_SIZE,
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Mini-batch k-means (Sculley, 2010) over a batch of images.
+
+    features: (B, N, F) pixel features
+    Returns centers (B, k, F), labels (B, N), counts (B, k), inertia (B, k)
+    """
+    batch, n_pixels, _ = features.shape
+    k = max(1, min(k, n_pixels))
+    rng = np.random.default_rng(seed)
+    cluster_ids = np.arange(k)
+
+    centers = _farthest_point_init(features, k)
+    seen = np.zeros((batch, k), dtype=np.float32)
+
+    for _ in range(iterations):
+        idx = rng.integers(0, n_pixels, size=min(batch_size, n_pixels))
+        sample = features[:, idx]
+        dist = ((sample[:, :, None, :] - centers[:, None, :, :]) ** 2).sum(-1)
+        onehot = (dist.argmin(-1)[..., None] == cluster_ids).astype(np.float32)
+
+        batch_counts = onehot.sum(axis=1)
+        batch_sums = np.einsum("bmk,bmf->bkf", onehot, sample)
+        seen += batch_counts
+
+        rate = batch_counts / np.maximum(seen, 1.0)
+        batch_means = batch_sums / np.maximum(batch_counts, 1.0)[..., None]
+        centers = centers + rate[..., None] * (batch_means - centers)
+
+    dist = ((features[:, :, None, :] - centers[:, None, :, :]) ** 2).sum(-1)
+    labels = dist.argmin(-1)
+    onehot = (labels[..., None] == cluster_ids).astype(np.float32)
+    counts = onehot.sum(axis=1)
+    inertia = (onehot * dist).sum(axis=1) / np.maximum(counts, 1.0)
+
+    return {"centers": centers, "labels": labels, "counts": counts, "inertia": inertia}
+
+
+# ====================== REGION -> FOOD MAPPING ======================
+
+def classify_centers(center_hsv: np.ndarray) -> np.ndarray:
+    """
+    Map cluster centre colours (..., 3) to COLOR_FOOD_PROFILES indices.
+    Returns -1 where no profile matches.
+    """
+    hsv = center_hsv[..., None, :]
+    lo = _PROFILE_TABLE[:, [0, 2, 4]]
+    hi = _PROFILE_TABLE[:, [1, 3, 5]]
+    matches = ((hsv >= lo) & (hsv < hi)).all(axis=-1)
+    first = matches.argmax(axis=-1)
+    return np.where(matches.any(axis=-1), first, -1)
+
+
+def segment_food_regions_batch(
+    images: np.ndarray,
+    k: int = DEFAULT_CLUSTERS,
+    grid: int = DEFAULT_GRID,
+    seed: int = 0,
+) -> List[List[Dict]]:
+    """
+    Segment a batch of RGB images (B, H, W, 3) into food regions.
+
+    Returns one list per image of:
+    {"food", "confidence", "area_fraction", "portion_grams", "hsv"}
+    sorted by area. area_fraction is relative to the non-background area.
+    """
+    if images.ndim == 3:
+        images = images[None]
+
+    pixels = downsample_grid(images, grid)
+    features = hsv_to_features(rgb_to_hsv(pixels))
+    result = minibatch_kmeans(features, k=k, seed=seed)
+
+    n_pixels = pixels.shape[1]
+    fractions = result["counts"] / float(n_pixels)
+    center_hsv = features_to_hsv(result["centers"])
+    profile_idx = classify_centers(center_hsv)
+    # Tight clusters get full confidence, spread-out ones are discounted
+    compactness = np.exp(-result["inertia"] / 0.05)
+
+    batch_regions = []
+    for b in range(images.shape[0]):
+        foods: Dict[str, Dict] = {}
+        background = 0.0
+        for c in np.argsort(-fractions[b]):
+            fraction = float(fractions[b, c])
+            if fraction == 0:
+                continue
+            p = int(profile_idx[b, c])
+            if p < 0 or _PROFILE_NAMES[p] == "plate":
+                background += fraction
+                continue
+
+            name = _PROFILE_NAMES[p]
+            confidence = float(_PROFILE_TABLE[p, 6]) * (0.8 + 0.2 * float(compactness[b, c]))
+            entry = foods.setdefault(name, {"food": name, "confidence": 0.0, "frame_fraction": 0.0,
+                                            "hsv": [round(float(v), 3) for v in center_hsv[b, c]]})
+            # Area-weighted confidence when several clusters map to the same food
+            total = entry["frame_fraction"] + fraction
+            entry["confidence"] = (entry["confidence"] * entry["frame_fraction"] + confidence * fraction) / total
+            entry["frame_fraction"] = total
+
+        coverage = max(1.0 - background, 1e-6)
+        regions = []
+        for entry in foods.values():
+            area_fraction = entry.pop("frame_fraction") / coverage
+            if area_fraction < MIN_REGION_FRACTION:
+                continue
+            entry["area_fraction"] = round(area_fraction, 3)
+            entry["confidence"] = round(entry["confidence"], 2)
+            entry["portion_grams"] = round(max(MIN_PORTION_GRAMS, area_fraction * coverage * FULL_PLATE_GRAMS), 0)
+            regions.append(entry)
+
+        regions.sort(key=lambda r: r["area_fraction"], reverse=True)
+        batch_regions.append(regions)
+
+    return batch_regions
+
+
+def segment_food_regions(
+    image_array: np.ndarray,
+    k: int = DEFAULT_CLUSTERS,
+    grid: int = DEFAULT_GRID,
+    seed: int = 0,
+) -> List[Dict]:
+    """Segment a single RGB image (H, W, 3) into food regions."""
+    return segment_food_regions_batch(np.asarray(image_array)[None], k=k, grid=grid, seed=seed)[0]
+
+
+def load_image_array(image_data: bytes, size: int = 256) -> np.ndarray:
+    """Decode image bytes to an RGB array no larger than size x size (JPEG decodes at reduced scale)."""
+    from io import BytesIO
+    from PIL import Image
+
+    img = Image.open(BytesIO(image_data))
+    img.draft("RGB", (size, size))
+    img = img.convert("RGB")
+    img.thumbnail((size, size))
+    return np.asarray(img)
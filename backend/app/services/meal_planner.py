@@ -0,0 +1,337 @@
+"""
+Meal Planner Engine
+===================
+Builds meals by solving for portion sizes over the food table:
+- Every protein/carb/veg/fat combination for a meal slot is solved at once
+  as a bounded least-squares problem (batched projected gradient in NumPy)
+- Combinations that land within tolerance of the calorie/macro targets are
+  ranked, with a variety penalty for foods used on recent days
+- Dietary filters (vegan / vegetarian / pescatarian) and excluded foods
+- Solved slots and plans are cached per target bucket, so repeat requests
+  for similar goals are served from memory
+"""
+
+import copy
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.nutrition_enhanced import NUTRITION_DATABASE
+
+# ====================== CONFIG ======================
+
+# Diet levels: a food is allowed when its level <= the requested diet's level
+DIET_LEVELS = {
+    "vegan": 0,
+    "vegetarian": 1,
+    "veg": 1,
+    "pescatarian": 2,
+    "omnivore": 3,
+    "non-veg": 3,
+    "any": 3,
+}
+
+# Portion bounds in grams per role
+ROLE_BOUNDS = {
+    "protein": (60, 250),
+    "carb": (40, 250),
+    "veg": (50, 200),
+    "fruit": (50, 200),
+    "fat": (0, 30),
+}
+
+# Planner food table: name -> (role, diet level, slots)
+# B = breakfast, M = lunch/dinner, S = snack
+PLANNER_FOODS = {
+    # Proteins
+    "chicken breast": ("protein", 3, "M"),
+    "turkey breast": ("protein", 3, "M"),
+    "beef lean": ("protein", 3, "M"),
+    "salmon": ("protein", 2, "M"),
+    "tuna": ("protein", 2, "M"),
+    "fish": ("protein", 2, "M"),
+    "shrimp": ("protein", 2, "M"),
+    "egg": ("protein", 1, "BS"),
+    "egg white": ("protein", 1, "B"),
+    "greek yogurt": ("protein", 1, "BS"),
+    "cottage cheese": ("protein", 1, "BS"),
+    "paneer": ("protein", 1, "BM"),
+    "tofu": ("protein", 0, "BM"),
+    "tempeh": ("protein", 0, "BM"),
+    "lentils": ("protein", 0, "M"),
+    "chickpeas": ("protein", 0, "BMS"),
+    "black beans": ("protein", 0, "M"),
+    # Carbs
+    "oats": ("carb", 0, "B"),
+    "whole wheat bread": ("carb", 0, "BS"),
+    "brown rice": ("carb", 0, "M"),
+    "basmati rice": ("carb", 0, "M"),
+    "quinoa": ("carb", 0, "M"),
+    "whole wheat pasta": ("carb", 0, "M"),
+    "sweet potato": ("carb", 0, "M"),
+    "potato": ("carb", 0, "M"),
+    # Vegetables
+    "broccoli": ("veg", 0, "M"),
+    "spinach": ("veg", 0, "M"),
+    "cauliflower": ("veg", 0, "M"),
+    "kale": ("veg", 0, "M"),
+    "bell pepper": ("veg", 0, "M"),
+    "mushroom": ("veg", 0, "M"),
+    "carrot": ("veg", 0, "M"),
+    "cabbage": ("veg", 0, "M"),
+    # Fruits
+    "banana": ("fruit", 0, "BS"),
+    "apple": ("fruit", 0, "BS"),
+    "blueberry": ("fruit", 0, "BS"),
+    "strawberry": ("fruit", 0, "BS"),
+    "mango": ("fruit", 0, "B"),
+    "orange": ("fruit", 0, "S"),
+    # Fats
+    "olive oil": ("fat", 0, "M"),
+    "avocado": ("fat", 0, "BM"),
+    "almonds": ("fat", 0, "BS"),
+    "walnuts": ("fat", 0, "BS"),
+    "peanut butter": ("fat", 0, "BS"),
+}
+
+# Slot -> (share of daily targets, slot code, roles in the meal)
+MEAL_SLOTS = {
+    "breakfast": (0.25, "B", ("protein", "carb", "fruit", "fat")),
+    "lunch": (0.35, "M", ("protein", "carb", "veg", "fat")),
+    "dinner": (0.30, "M", ("protein", "carb", "veg", "fat")),
+    "snack": (0.10, "S", ("protein", "fruit", "fat")),
+}
+
+# Relative tolerance per nutrient (calories, protein, carbs, fats)
+TOLERANCES = np.array([0.10, 0.20, 0.20, 0.25])
+# Calories matter most, then protein
+NUTRIENT_WEIGHTS = np.array([2.0, 1.5, 1.0, 1.0])
+
+SOLVER_ITERATIONS = 150
+VARIETY_WEIGHT = 0.15      # score penalty per recent use of a food
+VARIETY_DECAY = 0.5        # how fast past uses are forgotten (per day)
+
+_FOOD_NAMES = list(PLANNER_FOODS)
+_FOOD_INDEX = {name: i for i, name in enumerate(_FOOD_NAMES)}
+# Nutrients per gram: (calories, protein, carbs, fats)
+_NUTRIENTS = np.array([
+    [NUTRITION_DATABASE[name][k] / 100.0 for k in ("calories", "protein", "carbs", "fats")]
+    for name in _FOOD_NAMES
+])
+
+
+# ====================== FILTERS ======================
+
+def _diet_level(diet: Optional[str]) -> int:
+    if not diet:
+        return DIET_LEVELS["omnivore"]
+    key = diet.strip().lower()
+    if key not in DIET_LEVELS:
+        raise ValueError(f"Unknown diet '{diet}'. Use one of: vegan, vegetarian, pescatarian, omnivore")
+    return DIET_LEVELS[key]
+
+
+def _candidates(role: str, slot_code: str, diet_level: int, exclude: Tuple[str, ...]) -> List[int]:
+    return [
+        _FOOD_INDEX[name]
+        for name, (food_role, level, slots) in PLANNER_FOODS.items()
+        if food_role == role and slot_code in slots and level <= diet_level
+        and not any(term in name for term in exclude)
+    ]
+
+
+def _normalize_exclude(exclude: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    return tuple(sorted({term.strip().lower() for term in (exclude or []) if term and term.strip()}))
+
+
+# ====================== SOLVER ======================
+
+def solve_portions(
+    combos: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    target: np.ndarray,
+    iterations: int = SOLVER_ITERATIONS,
+) -> np.ndarray:
+    """
+    Bounded least squares for many food combinations at once.
+
+    combos: (C, K) food indices; lower/upper: (C, K) gram bounds;
+    target: (4,) calories/protein/carbs/fats.
+    Minimises sum_i (w_i * (A x - t)_i / t_i)^2 subject to lower <= x <= upper,
+    using projected gradient descent with a per-combination step size.
+    Returns grams (C, K).
+    """
+    scale = NUTRIENT_WEIGHTS / np.maximum(target, 1.0)
+    # A: (C, 4, K) weighted nutrients per gram; b: (4,) weighted targets
+    A = _NUTRIENTS[combos].transpose(0, 2, 1) * scale[None, :, None]
+    b = target * scale
+
+    AtA = A.transpose(0, 2, 1) @ A
+    Atb = A.transpose(0, 2, 1) @ b
+    # Lipschitz constant of the gradient -> safe step size
+    step = 1.0 / np.maximum(np.linalg.eigvalsh(AtA)[:, -1], 1e-12)
+
+    # Start from the regularised unconstrained solution, projected into bounds
+    ridge = 1e-9 * np.eye(combos.shape[1])
+    x = np.linalg.solve(AtA + ridge, Atb[..., None])[..., 0]
+    x = np.clip(x, lower, upper)
+
+    for _ in range(iterations):
+        grad = (AtA @ x[..., None])[..., 0] - Atb
+        x = np.clip(x - step[:, None] * grad, lower, upper)
+
+    return x
+
+
+@lru_cache(maxsize=256)
+def _solve_slot(slot: str, target: Tuple[float, ...], diet_level: int, exclude: Tuple[str, ...]):
+    """Solve every combination for a slot. Cached per (slot, target bucket, filters)."""
+    _, slot_code, roles = MEAL_SLOTS[slot]
+    pools = [_candidates(role, slot_code, diet_level, exclude) for role in roles]
+    if any(not pool for pool in pools):
+        return None
+
+    combos = np.array(np.meshgrid(*pools, indexing="ij")).reshape(len(roles), -1).T
+    lower = np.tile([ROLE_BOUNDS[r][0] for r in roles], (len(combos), 1)).astype(float)
+    upper = np.tile([ROLE_BOUNDS[r][1] for r in roles], (len(combos), 1)).astype(float)
+    target_arr = np.array(target, dtype=float)
+
+    grams = solve_portions(combos, lower, upper, target_arr)
+    grams = np.clip(np.round(grams / 10.0) * 10.0, lower, upper)  # serve in 10g steps
+
+    nutrients = np.einsum("ck,ckn->cn", grams, _NUTRIENTS[combos])
+    rel_error = np.abs(nutrients - target_arr) / np.maximum(target_arr, 1.0)
+    score = (NUTRIENT_WEIGHTS * rel_error ** 2).sum(axis=1)
+    feasible = (rel_error <= TOLERANCES).all(axis=1)
+
+    return combos, grams, nutrients, score, feasible
+
+
+def _bucket(calories: float, protein: float, carbs: float, fats: float) -> Tuple[float, ...]:
+    """Round targets so nearby goals share cached solutions."""
+    return (
+        round(calories / 50.0) * 50.0,
+        round(protein / 5.0) * 5.0,
+        round(carbs / 5.0) * 5.0,
+        round(fats / 5.0) * 5.0,
+    )
+
+
+def _meal_dict(combo: np.ndarray, grams: np.ndarray, nutrients: np.ndarray, feasible: bool) -> Dict:
+    items = [
+        {"food": _FOOD_NAMES[f], "grams": int(g)}
+        for f, g in zip(combo, grams) if g > 0
+    ]
+    return {
+        "name": " + ".join(f"{item['food'].title()} ({item['grams']}g)" for item in items),
+        "cal": int(round(nutrients[0])),
+        "protein": round(float(nutrients[1]), 1),
+        "carbs": round(float(nutrients[2]), 1),
+        "fats": round(float(nutrients[3]), 1),
+        "items": items,
+        "within_tolerance": bool(feasible),
+    }
+
+
+def _pick(solution, usage: np.ndarray, used_combos: set) -> int:
+    combos, _, _, score, feasible = solution
+    penalty = VARIETY_WEIGHT * usage[combos].sum(axis=1)
+    # Feasible combos always beat infeasible ones; repeats of a whole meal are a last resort
+    total = score + penalty + np.where(feasible, 0.0, 1e3)
+    if used_combos:
+        total[list(used_combos)] += 1e2
+    return int(np.argmin(total))
+
+
+# ====================== PLANS ======================
+
+@lru_cache(maxsize=128)
+def _plan(bucket: Tuple[float, ...], days: int, diet_level: int, exclude: Tuple[str, ...]) -> Tuple:
+    solutions = {}
+    for slot, (share, _, _) in MEAL_SLOTS.items():
+        solutions[slot] = _solve_slot(slot, tuple(v * share for v in bucket), diet_level, exclude)
+        if solutions[slot] is None:
+            raise ValueError(f"Not enough foods left for {slot} with the chosen diet/exclusions")
+
+    usage = np.zeros(len(_FOOD_NAMES))
+    used = {slot: set() for slot in MEAL_SLOTS}
+    plan = []
+    for day in range(days):
+        usage *= VARIETY_DECAY
+        day_meals = {"day": day + 1}
+        for slot, solution in solutions.items():
+            idx = _pick(solution, usage, used[slot])
+            combos, grams, nutrients, _, feasible = solution
+            used[slot].add(idx)
+            usage[combos[idx]] += 1
+            day_meals[slot] = _meal_dict(combos[idx], grams[idx], nutrients[idx], feasible[idx])
+        plan.append(day_meals)
+
+    return tuple(plan)
+
+
+def plan_meals(
+    daily_goals: Dict,
+    days: int = 7,
+    diet: Optional[str] = None,
+    exclude: Optional[Sequence[str]] = None,
+) -> List[Dict]:
+    """
+    Multi-day meal plan hitting the daily calorie/macro goals.
+
+    Returns [{"day", "breakfast", "lunch", "dinner", "snack"}], each meal
+    {"name", "cal", "protein", "carbs", "fats", "items", "within_tolerance"}.
+    """
+    bucket = _bucket(
+        daily_goals.get("calories", 2000),
+        daily_goals.get("protein", 120),
+        daily_goals.get("carbs", 250),
+        daily_goals.get("fats", 65),
+    )
+    plan = _plan(bucket, days, _diet_level(diet), _normalize_exclude(exclude))
+    return copy.deepcopy(list(plan))
+
+
+def suggest_meals(
+    target_protein: float,
+    target_carbs: float,
+    target_fats: float,
+    meals_per_day: int = 3,
+    diet: Optional[str] = None,
+    exclude: Optional[Sequence[str]] = None,
+    count: int = 3,
+) -> List[Dict]:
+    """
+    Main-meal suggestions for a share of the daily macro targets.
+    Returns up to `count` meals built around different protein sources.
+    """
+    meals_per_day = max(1, meals_per_day)
+    calories = 4 * target_protein + 4 * target_carbs + 9 * target_fats
+    bucket = _bucket(calories / meals_per_day, target_protein / meals_per_day,
+                     target_carbs / meals_per_day, target_fats / meals_per_day)
+    solution = _solve_slot("lunch", bucket, _diet_level(diet), _normalize_exclude(exclude))
+    if solution is None:
+        return []
+
+    combos, grams, nutrients, score, feasible = solution
+    order = np.lexsort((score, ~feasible))
+    suggestions, proteins = [], set()
+    for idx in order:
+        if combos[idx, 0] in proteins:
+            continue
+        proteins.add(combos[idx, 0])
+        meal = _meal_dict(combos[idx], grams[idx], nutrients[idx], feasible[idx])
+        suggestions.append({
+            "meal": meal["name"],
+            "protein": meal["protein"],
+            "carbs": meal["carbs"],
+            "fats": meal["fats"],
+            "calories": meal["cal"],
+            "items": meal["items"],
+        })
+        if len(suggestions) == count:
+            break
+
+    return suggestions
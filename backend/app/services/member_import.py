@@ -0,0 +1,314 @@
+"""
+Bulk Member Import
+==================
+Creates trainees (user + trainee profile + optional membership) from a CSV,
+streaming it in batches of IMPORT_BATCH_SIZE rows instead of one request and
+three commits per member.
+
+For each batch:
+
+1. validate: every row goes through MemberManagementRequest (the same
+   rules as POST /members); emails repeated in the file, emails already
+   registered, unknown trainer ids and unknown plan ids are rejected with
+   one query each per batch
+2. hash: passwords (given, or generated like create_member does) are hashed
+   on a process pool - PBKDF2 is CPU bound and dominates the import
+3. load: one multi-row INSERT ... ON CONFLICT (email) DO NOTHING RETURNING
+   for users, then executemany INSERTs for trainees and memberships, and a
+   commit per batch
+
+Every row ends up in the report, either created (with the generated
+temporary password, if any; "valid" on a dry run) or failed with its errors. Row numbers are CSV
+line numbers (the header is line 1). A failed batch is rolled back and
+reported without stopping the import.
+
+Environment:
+    IMPORT_HASH_WORKERS   hashing processes (default: CPU count)
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, IO, Iterable, Iterator, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.auth_util import get_password_hash
+from app.models import Membership, MembershipPlan, Trainee, Trainer, User, UserRole
+from app.schemas import MemberManagementRequest
+from app.services.payment_finalization import DAYS_PER_PLAN_MONTH
+
+IMPORT_BATCH_SIZE = 1000
+INLINE_HASH_LIMIT = 32
+HASH_CHUNK_SIZE = 16
+REQUIRED_COLUMNS = ("name", "email")
+IMPORT_COLUMNS = (
+    "name", "email", "phone", "password", "trainer_id", "membership_plan_id",
+    "date_of_birth", "gender", "address", "emergency_contact_name",
+    "emergency_contact_phone", "health_conditions", "fitness_goals",
+)
+TRAINEE_COLUMNS = (
+    "gender", "address", "emergency_contact_name",
+    "emergency_contact_phone", "health_conditions", "fitness_goals",
+)
+REPORT_COLUMNS = ("row", "email", "status", "user_id", "temp_password", "membership_created", "errors")
+
+
+def hash_workers() -> int:
+    try:
+        return max(int(os.getenv("IMPORT_HASH_WORKERS", "0")), 0) or os.cpu_count() or 1
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+def _validate(row: Dict) -> MemberManagementRequest:
+    data = {
+        column: (row.get(column) or "").strip() or None
+        for column in IMPORT_COLUMNS
+    }
+    return MemberManagementRequest(**data)
+
+
+def _errors(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+def _batches(rows: Iterable, size: int) -> Iterator[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MemberImport:
+    def __init__(self, db: Session, dry_run: bool = False, batch_size: int = IMPORT_BATCH_SIZE):
+        self.db = db
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.plans = {plan.id: plan for plan in db.query(MembershipPlan).all()}
+        self.known_trainers = set()
+        self.seen_emails: Dict[str, int] = {}
+        self.report = {
+            "dry_run": dry_run,
+            "total_rows": 0,
+            "valid": 0,
+            "created": 0,
+            "memberships_created": 0,
+            "failed": 0,
+            "errors": [],
+            "members": [],
+        }
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # ---------- validation ----------
+
+    def _fail(self, row_no: int, email: Optional[str], errors: List[str]):
+        self.report["failed"] += 1
+        self.report["errors"].append({"row": row_no, "email": email, "errors": errors})
+
+    def _validate_batch(self, batch: List) -> List[Dict]:
+        """Rows that pass every check, as dicts ready for hashing and loading."""
+        valid = []
+        for row_no, row in batch:
+            email = (row.get("email") or "").strip().lower() or None
+            try:
+                member = _validate(row)
+            except ValidationError as e:
+                self._fail(row_no, email, _errors(e))
+                continue
+            email = member.email.lower().strip()
+            if email in self.seen_emails:
+                self._fail(row_no, email, [f"email: duplicate of row {self.seen_emails[email]}"])
+                continue
+            self.seen_emails[email] = row_no
+            valid.append({"row": row_no, "email": email, "member": member})
+
+        emails = [entry["email"] for entry in valid]
+        registered = {
+            email for (email,) in self.db.query(User.email).filter(User.email.in_(emails))
+        } if emails else set()
+        trainer_ids = {
+            entry["member"].trainer_id for entry in valid
+            if entry["member"].trainer_id and entry["member"].trainer_id not in self.known_trainers
+        }
+        if trainer_ids:
+            self.known_trainers.update(
+                trainer_id for (trainer_id,) in self.db.query(Trainer.id).filter(Trainer.id.in_(trainer_ids))
+            )
+
+        checked = []
+        for entry in valid:
+            member = entry["member"]
+            errors = []
+            if entry["email"] in registered:
+                errors.append("email: already registered")
+            if member.trainer_id and member.trainer_id not in self.known_trainers:
+                errors.append(f"trainer_id: trainer {member.trainer_id} not found")
+            if member.membership_plan_id and member.membership_plan_id not in self.plans:
+                errors.append(f"membership_plan_id: plan {member.membership_plan_id} not found")
+            if errors:
+                self._fail(entry["row"], entry["email"], errors)
+            else:
+                checked.append(entry)
+        self.report["valid"] += len(checked)
+        return checked
+
+    # ---------- hashing ----------
+
+    def _hash(self, passwords: List[str]) -> List[str]:
+        if len(passwords) < INLINE_HASH_LIMIT:
+            return [get_password_hash(password) for password in passwords]
+        if self._pool is None:
+            # spawn, not fork: children must not inherit the parent's pooled DB connections
+            context = multiprocessing.get_context("spawn")
+            self._pool = ProcessPoolExecutor(max_workers=hash_workers(), mp_context=context)
+        return list(self._pool.map(get_password_hash, passwords, chunksize=HASH_CHUNK_SIZE))
+
+    # ---------- loading ----------
+
+    def _load_batch(self, entries: List[Dict]):
+        for entry in entries:
+            given = entry["member"].password
+            # Same rule as create_member: short or missing passwords are replaced
+            entry["temp_password"] = None if given and len(given) >= 6 else secrets.token_urlsafe(8)
+        hashes = self._hash([entry["temp_password"] or entry["member"].password for entry in entries])
+
+        created = self.db.execute(
+            pg_insert(User).values([
+                {
+                    "email": entry["email"],
+                    "password_hash": password_hash,
+                    "name": entry["member"].name.strip(),
+                    "phone": entry["member"].phone,
+                    "role": UserRole.TRAINEE,
+                    "is_active": True,
+                    "is_verified": True,
+                }
+                for entry, password_hash in zip(entries, hashes)
+            ]).on_conflict_do_nothing(index_elements=[User.email]).returning(User.id, User.email)
+        ).all()
+        user_ids = {email: user_id for user_id, email in created}
+
+        trainees, memberships = [], []
+        now = datetime.now(timezone.utc)
+        for entry in entries:
+            user_id = user_ids.get(entry["email"])
+            if user_id is None:
+                # Registered between validation and insert
+                self._fail(entry["row"], entry["email"], ["email: already registered"])
+                continue
+            member = entry["member"]
+            entry["user_id"] = user_id
+            trainees.append({
+                "user_id": user_id,
+                "trainer_id": member.trainer_id,
+                "date_of_birth": datetime.strptime(member.date_of_birth, "%Y-%m-%d").date()
+                if member.date_of_birth else None,
+                **{column: getattr(member, column) for column in TRAINEE_COLUMNS},
+            })
+            plan = self.plans.get(member.membership_plan_id)
+            entry["membership_created"] = plan is not None
+            if plan is not None:
+                memberships.append({
+                    "trainee_id": user_id,
+                    "membership_type": plan.membership_type,
+                    "start_date": now,
+                    "end_date": now + timedelta(days=plan.duration_months * DAYS_PER_PLAN_MONTH),
+                    "status": "active",
+                    "price": plan.price,
+                })
+
+        if trainees:
+            self.db.execute(insert(Trainee), trainees)
+        if memberships:
+            self.db.execute(insert(Membership), memberships)
+        self.db.commit()
+
+        for entry in entries:
+            if "user_id" not in entry:
+                continue
+            self.report["created"] += 1
+            self.report["members"].append({
+                "row": entry["row"],
+                "email": entry["email"],
+                "user_id": entry["user_id"],
+                "temp_password": entry["temp_password"],
+                "membership_created": entry["membership_created"],
+            })
+        self.report["memberships_created"] += len(memberships)
+
+    # ---------- driver ----------
+
+    def run(self, rows: Iterable[Dict]) -> Dict:
+        numbered = ((row_no, row) for row_no, row in enumerate(rows, start=2))
+        try:
+            for batch in _batches(numbered, self.batch_size):
+                self.report["total_rows"] += len(batch)
+                entries = self._validate_batch(batch)
+                if self.dry_run:
+                    self.report["members"].extend(
+                        {"row": entry["row"], "email": entry["email"], "user_id": None, "temp_password": None,
+                         "membership_created": False}
+                        for entry in entries
+                    )
+                    continue
+                if not entries:
+                    continue
+                try:
+                    self._load_batch(entries)
+                except Exception as e:
+                    self.db.rollback()
+                    print(f"Member import: batch starting at row {batch[0][0]} failed: {e}")
+                    for entry in entries:
+                        self._fail(entry["row"], entry["email"], [f"batch failed: {e}"])
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+        self.report["errors"].sort(key=lambda error: error["row"])
+        return self.report
+
+
+def import_members(db: Session, csv_file: IO[str], dry_run: bool = False,
+                   batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    """
+    Import members from a text-mode CSV stream with a header row.
+    Raises ValueError if a required column is missing.
+    """
+    reader = csv.DictReader(csv_file)
+    header = {(name or "").strip().lower() for name in (reader.fieldnames or [])}
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(missing)}")
+    rows = ({(k or "").strip().lower(): v for k, v in row.items()} for row in reader)
+    return MemberImport(db, dry_run=dry_run, batch_size=batch_size).run(rows)
+
+
+def report_csv(report: Dict) -> str:
+    """The import report as CSV, one line per input row in file order."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    lines = [
+        (member["row"], member["email"], "created" if member["user_id"] else "valid",
+         member["user_id"] or "", member["temp_password"] or "", member["membership_created"], "")
+        for member in report["members"]
+    ] + [
+        (error["row"], error["email"] or "", "failed", "", "", "", "; ".join(error["errors"]))
+        for error in report["errors"]
+    ]
+    writer.writerow(REPORT_COLUMNS)
+    writer.writerows(sorted(lines, key=lambda line: line[0]))
+    return buffer.getvalue()
@@ -0,0 +1,148 @@
+"""
+Membership Lifecycle
+====================
+Keeps Membership.status and Membership.expiring_soon current on a schedule,
+so dashboards and renewals read flags instead of doing date math per request:
+
+1. expire: active memberships past end_date become "expired" (one UPDATE)
+2. flag: active memberships ending within the notice window get
+   expiring_soon = true; ones renewed past it are cleared (two UPDATEs,
+   both served by the partial index on end_date WHERE status = 'active')
+3. remind: members of newly flagged memberships get one in-app
+   Notification each, in batches of REMINDER_BATCH_SIZE. Each batch locks its
+   rows with SKIP LOCKED and commits on its own, so concurrent workers
+   never remind twice and a long backlog never holds locks for long.
+
+Extending a membership (renewal, admin extend) should call
+clear_expiry_flags() so the member is flagged and reminded afresh.
+
+Environment:
+    MEMBERSHIP_LIFECYCLE_SECONDS    run interval (default: 3600)
+    MEMBERSHIP_EXPIRY_NOTICE_DAYS   notice window in days (default: 7)
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Membership, Notification
+from app.services.scheduler import schedule_job
+
+LIFECYCLE_JOB = "membership-lifecycle"
+REMINDER_BATCH_SIZE = 500
+ACTIVE = Membership.status == "active"
+
+
+def notice_days() -> int:
+    return int(os.getenv("MEMBERSHIP_EXPIRY_NOTICE_DAYS", "7"))
+
+
+def clear_expiry_flags(membership: Membership):
+    membership.expiring_soon = False
+    membership.expiry_reminder_sent_at = None
+
+
+def expire_memberships(db: Session, now: Optional[datetime] = None) -> int:
+    """Mark active memberships past their end date expired. Does not commit."""
+    now = now or datetime.now(timezone.utc)
+    result = db.execute(
+        update(Membership)
+        .where(ACTIVE, Membership.end_date <= now)
+        .values(status="expired", expiring_soon=False)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def flag_expiring_memberships(db: Session, now: Optional[datetime] = None, days: Optional[int] = None) -> Dict:
+    """Set expiring_soon on active memberships ending within `days`, clear it on the rest. Does not commit."""
+    now = now or datetime.now(timezone.utc)
+    horizon = now + timedelta(days=notice_days() if days is None else days)
+    flagged = db.execute(
+        update(Membership)
+        .where(ACTIVE, Membership.end_date > now, Membership.end_date <= horizon,
+               Membership.expiring_soon == False)
+        .values(expiring_soon=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    cleared = db.execute(
+        update(Membership)
+        .where(ACTIVE, Membership.end_date > horizon, Membership.expiring_soon == True)
+        .values(expiring_soon=False, expiry_reminder_sent_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    return {"flagged": flagged, "cleared": cleared}
+
+
+def send_expiry_reminders(db: Session, batch_size: int = REMINDER_BATCH_SIZE, now: Optional[datetime] = None) -> int:
+    """Notify members of flagged, not yet reminded memberships, committing per batch."""
+    now = now or datetime.now(timezone.utc)
+    sent = 0
+    while True:
+        batch = db.query(
+            Membership.id, Membership.trainee_id, Membership.membership_type, Membership.end_date
+        ).filter(
+            ACTIVE,
+            Membership.expiring_soon == True,
+            Membership.expiry_reminder_sent_at.is_(None)
+        ).order_by(Membership.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if not batch:
+            return sent
+
+        db.execute(insert(Notification), [
+            {
+                "user_id": row.trainee_id,
+                "title": "Membership Expiring Soon",
+                "message": f"Your {row.membership_type} membership expires on "
+                           f"{row.end_date.strftime('%d %b %Y')}. Renew to keep your access.",
+                "notification_type": "membership",
+                "is_read": False,
+            }
+            for row in batch
+        ])
+        db.execute(
+            update(Membership)
+            .where(Membership.id.in_([row.id for row in batch]))
+            .values(expiry_reminder_sent_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        sent += len(batch)
+
+
+def run_membership_lifecycle(db: Session, now: Optional[datetime] = None) -> Dict:
+    """Expire, flag and remind; commits after the transitions and after each reminder batch."""
+    now = now or datetime.now(timezone.utc)
+    expired = expire_memberships(db, now)
+    flags = flag_expiring_memberships(db, now)
+    db.commit()
+    reminded = send_expiry_reminders(db, now=now)
+    return {"expired": expired, **flags, "reminded": reminded}
+
+
+def membership_lifecycle_job() -> Dict:
+    """Scheduled job: run the lifecycle in its own session."""
+    db = SessionLocal()
+    try:
+        result = run_membership_lifecycle(db)
+        if any(result.values()):
+            print(f"Membership lifecycle: {result}")
+        return result
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def start_membership_lifecycle():
+    schedule_job(
+        LIFECYCLE_JOB,
+        float(os.getenv("MEMBERSHIP_LIFECYCLE_SECONDS", "3600")),
+        membership_lifecycle_job,
+        run_immediately=True,
+    )
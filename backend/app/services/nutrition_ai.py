@@ -10,7 +10,9 @@ from typing import Dict, List, Tuple, Optional
 from io import BytesIO
 from datetime import datetime
 from PIL import Image, ImageEnhance, ImageFilter
-import numpy as np
+
+from app.services.food_segmentation import segment_food_regions, load_image_array
+from app.services.food_recognizer import recognize_foods
 
 # ====================== COMPREHENSIVE FOOD DATABASE ======================
 # Nutrition data: (calories, protein_g, carbs_g, fats_g, fiber_g) per 100g
@@ -242,7 +244,7 @@ def preprocess_image(image_data: bytes) -> Tuple[Image.Image, int, int]:
 
 def call_google_vision_api(image_data: bytes) -> Dict:
     """
-    Real Google Vision API Integration
+    Food recognition via the local recognizer backend
     
     Returns: {
         "labels": ["rice", "chicken", "salad"],
@@ -250,23 +252,21 @@ def call_google_vision_api(image_data: bytes) -> Dict:
         "description": "A plate with rice, chicken, and salad"
     }
     
-    Note: Requires GOOGLE_CLOUD_VISION credentials to be set up.
-    For now, uses intelligent simulation based on image analysis.
+    Uses the local recognizer backend (ONNX model if FOOD_MODEL_PATH is set,
+    colour segmentation otherwise). Runs fully offline.
     """
     try:
-        # TODO: Implement real Google Vision API call
-        # from google.cloud import vision
-        # client = vision.ImageAnnotatorClient()
-        # image = vision.Image(content=image_data)
-        # response = client.label_detection(image=image)
-        # labels = response.label_annotations
-        # return {
-        #     "labels": [label.description for label in labels],
-        #     "confidence": [label.score for label in labels]
-        # }
+        foods = recognize_foods(image_data)
+        if not foods:
+            return simulate_vision_api_intelligent(image_data)
         
-        # For now: Use intelligent simulation
-        return simulate_vision_api_intelligent(image_data)
+        labels = [f["food"] for f in foods]
+        return {
+            "labels": labels,
+            "confidence": [f["confidence"] for f in foods],
+            "portion_grams": [f["portion_grams"] for f in foods],
+            "description": f"Detected: {', '.join(labels)}"
+        }
     
     except Exception as e:
         print(f"Vision API Error: {e}")
@@ -281,66 +281,25 @@ def simulate_vision_api_intelligent(image_data: bytes) -> Dict:
     NO external API key required!
     """
     try:
-        # Load and process image safely
-        img = Image.open(BytesIO(image_data))
-        img = img.convert("RGB")
-        
-        # Resize for analysis
-        img_resized = img.resize((50, 50))
-        img_array = np.array(img_resized, dtype=np.float32)
-        
-        # Calculate average color
-        avg_color = img_array.reshape(-1, 3).mean(axis=0)
-        r, g, b = avg_color
-        
-        # Detect food by color heuristics
-        detected = []
-        confidence = []
-        
-        # Brown/tan tones → Rice, chicken, bread
-        if r > 140 and g > 100 and b < 100:
-            detected.extend(["rice", "chicken"])
-            confidence.extend([0.85, 0.80])
-        
-        # Green tones → Vegetables, salad
-        if g > r and g > b and g > 80:
-            detected.extend(["salad", "vegetables"])
-            confidence.extend([0.82, 0.75])
-        
-        # Orange/red tones → Tomato, carrot, spices
-        if r > g > b and r > 120:
-            detected.extend(["tomato", "carrot"])
-            confidence.extend([0.78, 0.72])
-        
-        # White/light tones → Bread, rice, milk products
-        if r > 180 and g > 180 and b > 180:
-            detected.extend(["bread", "milk"])
-            confidence.extend([0.75, 0.70])
-        
-        # Dark brown → Meat, beef, chocolate
-        if r < 120 and g < 100 and b < 80 and (r + g + b) > 150:
-            detected.extend(["beef", "meat"])
-            confidence.extend([0.80, 0.75])
-        
-        # Remove duplicates
-        seen = set()
-        unique_foods = []
-        unique_conf = []
-        for food, conf in zip(detected, confidence):
-            if food not in seen:
-                unique_foods.append(food)
-                unique_conf.append(conf)
-                seen.add(food)
+        # Decode at reduced scale and segment into colour regions
+        img_array = load_image_array(image_data)
+        regions = segment_food_regions(img_array)[:3]
         
+        unique_foods = [r["food"] for r in regions]
+        unique_conf = [r["confidence"] for r in regions]
+        portions = [r["portion_grams"] for r in regions]
+
         # Ensure at least one food
         if not unique_foods:
             unique_foods = ["food"]
             unique_conf = [0.50]
-        
+            portions = []
+
         return {
-            "labels": unique_foods[:3],
-            "confidence": unique_conf[:3],
-            "description": f"Detected: {', '.join(unique_foods[:3])}"
+            "labels": unique_foods,
+            "confidence": unique_conf,
+            "portion_grams": portions,
+            "description": f"Detected: {', '.join(unique_foods)}"
         }
     
     except Exception as e:
@@ -440,6 +399,7 @@ def analyze_meal_from_image(image_data: bytes, filename: str = "meal.jpg") -> Di
         
         detected_foods = vision_result.get("labels", ["food"])
         confidence_scores = vision_result.get("confidence", [0.5])
+        region_portions = vision_result.get("portion_grams", [])
         
         if not detected_foods:
             detected_foods = ["food"]
@@ -455,16 +415,19 @@ def analyze_meal_from_image(image_data: bytes, filename: str = "meal.jpg") -> Di
         total_carbs = 0
         total_fats = 0
         
-        for food, confidence in zip(detected_foods, confidence_scores):
+        for i, (food, confidence) in enumerate(zip(detected_foods, confidence_scores)):
             match = find_best_match(food)
             
             if match:
                 matched_name, nutrition_tuple = match
                 cal_per_100g, protein_per_100g, carbs_per_100g, fats_per_100g = nutrition_tuple[0], nutrition_tuple[1], nutrition_tuple[2], nutrition_tuple[3]
                 
-                # Calculate portion grams
+                # Calculate portion grams - prefer the segmented region's share of the plate
                 standard_portion = 100  # Base portion in grams
-                portion_grams = standard_portion * portion_multiplier
+                if i < len(region_portions):
+                    portion_grams = region_portions[i]
+                else:
+                    portion_grams = standard_portion * portion_multiplier
                 
                 # Scale nutrition by portion and confidence
                 food_calories = (cal_per_100g * portion_grams / 100) * confidence
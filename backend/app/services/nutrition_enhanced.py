@@ -13,11 +13,13 @@ import base64
 import json
 import hashlib
 from typing import Dict, List, Tuple, Optional
-from io import BytesIO
 from datetime import datetime, timedelta
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import ImageEnhance, ImageFilter
 import numpy as np
 
+from app.services.food_segmentation import segment_food_regions
+from app.services.food_recognizer import recognize_foods
+
 # ====================== FOOD DATABASE ======================
 # Comprehensive nutrition data per 100g
 NUTRITION_DATABASE = {
@@ -168,31 +170,20 @@ def analyze_meal_from_image(image_data: bytes, filename: str) -> Dict:
     Uses: Color detection + shape analysis for food recognition
     """
     try:
-        image = Image.open(BytesIO(image_data))
-        
-        # Convert to RGB
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize for processing
-        image_resized = image.resize((300, 300))
+        # Local recognizer (ONNX model or colour segmentation), batched with concurrent requests
+        regions = recognize_foods(image_data)
         
-        # Extract color information
-        img_array = np.array(image_resized)
-        
-        # Detect dominant colors
-        detected_foods = detect_foods_by_color(img_array)
-        
-        if detected_foods:
-            # Get nutrition for detected foods
+        if regions:
+            # Get nutrition for detected foods, sized by their share of the plate
             results = []
-            for food_name, confidence in detected_foods:
-                nutrition = calculate_nutrition_for_portion(food_name, 150)  # Default 150g
+            for region in regions:
+                nutrition = calculate_nutrition_for_portion(region["food"], region["portion_grams"])
                 if nutrition:
                     results.append({
-                        "food": food_name,
-                        "confidence": confidence,
-                        "portion_grams": 150,
+                        "food": region["food"],
+                        "confidence": region["confidence"],
+                        "portion_grams": region["portion_grams"],
+                        "area_fraction": region.get("area_fraction"),
                         "nutrition": nutrition
                     })
             
@@ -241,45 +232,10 @@ def analyze_meal_from_image(image_data: bytes, filename: str) -> Dict:
 
 
 def detect_foods_by_color(image_array: np.ndarray) -> List[Tuple[str, float]]:
-    """Detect foods based on color analysis"""
-    # Calculate average color
-    avg_color = np.mean(image_array, axis=(0, 1))
-    r, g, b = avg_color[0], avg_color[1], avg_color[2]
-    
-    detected = []
-    
-    # Color-based detection logic
-    if r > 180 and g > 140 and b < 100:  # Orange/brown
-        detected.append(("chicken", 0.85))
-        detected.append(("rice", 0.80))
-    
-    if g > r + 20 and g > b:  # Green dominant
-        detected.append(("salad", 0.85))
-        detected.append(("vegetables", 0.80))
-        detected.append(("spinach", 0.75))
-    
-    if r > g + 30 and r > b + 30:  # Red dominant
-        detected.append(("tomato", 0.80))
-        detected.append(("meat", 0.75))
-        detected.append(("carrot", 0.70))
-    
-    if 150 < r < 180 and 150 < g < 180 and 150 < b < 180:  # Light
-        detected.append(("bread", 0.80))
-        detected.append(("chicken", 0.75))
-    
-    if r < 100 and g < 100 and b < 100:  # Dark
-        detected.append(("beef", 0.82))
-        detected.append(("beans", 0.75))
-    
-    # Remove duplicates and sort by confidence
-    seen = set()
-    unique = []
-    for food, conf in detected:
-        if food not in seen:
-            unique.append((food, conf))
-            seen.add(food)
-    
-    return sorted(unique, key=lambda x: x[1], reverse=True)[:3]
+    """Detect foods from dominant colour regions (see food_segmentation)"""
+    regions = segment_food_regions(image_array)
+    ranked = sorted(regions, key=lambda r: r["confidence"] * r["area_fraction"], reverse=True)
+    return [(r["food"], r["confidence"]) for r in ranked[:3]]
 
 
 # ====================== PERSONALIZED NUTRITION GOALS ======================
@@ -391,94 +347,27 @@ def get_nutrition_recommendations(daily_totals: Dict, daily_goals: Dict) -> Dict
 
 # ====================== MEAL SUGGESTIONS ======================
 
-def suggest_meals_for_macros(target_protein: float, target_carbs: float, target_fats: float) -> List[Dict]:
-    """Suggest meals to hit macro targets"""
-    suggestions = []
-    
-    # High protein options
-    if target_protein > 20:
-        suggestions.extend([
-            {
-                "meal": "Grilled Chicken (200g) + Brown Rice (150g) + Broccoli (100g)",
-                "protein": 62,
-                "carbs": 45,
-                "fats": 8,
-                "calories": 400
-            },
-            {
-                "meal": "Salmon (150g) + Sweet Potato (150g) + Salad (100g)",
-                "protein": 35,
-                "carbs": 30,
-                "fats": 20,
-                "calories": 450
-            },
-            {
-                "meal": "Egg Whites (4) + Whole Wheat Toast (2) + Avocado (1/2)",
-                "protein": 24,
-                "carbs": 28,
-                "fats": 12,
-                "calories": 280
-            }
-        ])
-    
-    # Balanced meals
-    if target_carbs > 30:
-        suggestions.extend([
-            {
-                "meal": "Turkey Sandwich + Fruit + Nuts",
-                "protein": 30,
-                "carbs": 45,
-                "fats": 15,
-                "calories": 450
-            },
-            {
-                "meal": "Lentil Curry (200g) + Brown Rice (100g)",
-                "protein": 18,
-                "carbs": 52,
-                "fats": 8,
-                "calories": 350
-            }
-        ])
-    
-    return suggestions[:3]  # Return top 3 suggestions
+def suggest_meals_for_macros(
+    target_protein: float,
+    target_carbs: float,
+    target_fats: float,
+    meals_per_day: int = 3,
+    diet: Optional[str] = None,
+    exclude: Optional[List[str]] = None,
+) -> List[Dict]:
+    """Suggest meals to hit macro targets (portions solved over the food table)"""
+    from app.services.meal_planner import suggest_meals
+    
+    return suggest_meals(target_protein, target_carbs, target_fats, meals_per_day, diet, exclude)
 
 
-def get_meal_prep_plan(daily_goals: Dict, days: int = 7) -> List[Dict]:
-    """Generate meal prep plan for the week"""
-    meals = []
-    
-    breakfast_options = [
-        {"name": "Oatmeal + Berries + Almonds", "cal": 400, "protein": 15, "carbs": 50, "fats": 12},
-        {"name": "Eggs (3) + Whole Wheat Toast + Avocado", "cal": 450, "protein": 20, "carbs": 35, "fats": 18},
-        {"name": "Greek Yogurt + Granola + Honey", "cal": 350, "protein": 15, "carbs": 45, "fats": 10},
-    ]
-    
-    lunch_options = [
-        {"name": "Grilled Chicken + Brown Rice + Vegetables", "cal": 550, "protein": 45, "carbs": 60, "fats": 12},
-        {"name": "Salmon + Sweet Potato + Salad", "cal": 600, "protein": 40, "carbs": 55, "fats": 20},
-        {"name": "Lentil Bowl + Olive Oil Dressing", "cal": 450, "protein": 20, "carbs": 55, "fats": 15},
-    ]
-    
-    dinner_options = [
-        {"name": "Turkey Meatballs + Pasta + Tomato Sauce", "cal": 550, "protein": 38, "carbs": 65, "fats": 12},
-        {"name": "Lean Beef + Quinoa + Vegetables", "cal": 600, "protein": 42, "carbs": 60, "fats": 18},
-        {"name": "Baked Fish + Asparagus + Olive Oil", "cal": 400, "protein": 35, "carbs": 20, "fats": 18},
-    ]
-    
-    snack_options = [
-        {"name": "Protein Shake + Banana", "cal": 300, "protein": 25, "carbs": 35, "fats": 5},
-        {"name": "Greek Yogurt + Nuts", "cal": 250, "protein": 15, "carbs": 20, "fats": 12},
-        {"name": "Apple + Peanut Butter", "cal": 280, "protein": 8, "carbs": 32, "fats": 14},
-    ]
-    
-    for day in range(days):
-        day_meals = {
-            "day": day + 1,
-            "breakfast": breakfast_options[day % 3],
-            "lunch": lunch_options[day % 3],
-            "dinner": dinner_options[day % 3],
-            "snack": snack_options[day % 3],
-        }
-        meals.append(day_meals)
-    
-    return meals
+def get_meal_prep_plan(
+    daily_goals: Dict,
+    days: int = 7,
+    diet: Optional[str] = None,
+    exclude: Optional[List[str]] = None,
+) -> List[Dict]:
+    """Generate meal prep plan hitting the daily goals, with variety across days"""
+    from app.services.meal_planner import plan_meals
+    
+    return plan_meals(daily_goals, days, diet, exclude)
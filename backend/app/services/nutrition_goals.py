@@ -0,0 +1,142 @@
+"""
+Nutrition Goals Service
+=======================
+Persists each trainee's computed daily goals (BMR/TDEE/macros) in the
+nutrition_goals table. Goals are computed when the inputs change
+(profile update, POST /api/nutrition/goals) and read back as a single
+row everywhere else.
+
+Inputs given explicitly (POST /api/nutrition/goals, or weight/height/gender
+edited on the profile) are recorded in user_set_fields and win over values
+derived from the profile later on: a free-text Trainee.goal maps to some
+fitness_goal and a date of birth to an age, but neither replaces a
+fitness_goal or age the trainee chose.
+
+The row is created with INSERT ... ON CONFLICT DO NOTHING and read back, so
+two requests creating a trainee's goals at once do not collide on the
+unique trainee_id.
+"""
+
+from datetime import date
+from typing import Dict, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import NutritionGoal, Trainee
+from app.services.nutrition_enhanced import calculate_daily_nutrition_goals
+
+DEFAULT_WEIGHT = 70
+DEFAULT_HEIGHT = 170
+DEFAULT_AGE = 30
+DEFAULT_GENDER = "M"
+
+GOAL_FIELDS = ("calories", "protein", "carbs", "fats", "fiber", "water_liters", "tdee", "bmr")
+INPUT_FIELDS = ("weight", "height", "age", "gender", "activity_level", "fitness_goal")
+
+
+def fitness_goal_from_text(goal: Optional[str]) -> Optional[str]:
+    """Map the free-text Trainee.goal ("Weight loss", "Muscle gain", ...) to lose/maintain/gain."""
+    if not goal:
+        return None
+    goal = goal.lower()
+    if any(word in goal for word in ("loss", "lose", "cut", "fat")):
+        return "lose"
+    if any(word in goal for word in ("gain", "muscle", "bulk", "mass")):
+        return "gain"
+    return "maintain"
+
+
+def _age_from_dob(dob: Optional[date]) -> Optional[int]:
+    if not dob:
+        return None
+    today = date.today()
+    return today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
+
+
+def _normalize_gender(gender: Optional[str]) -> str:
+    if not gender:
+        return DEFAULT_GENDER
+    return "F" if gender.strip().upper().startswith("F") else "M"
+
+
+def goals_to_dict(row: NutritionGoal) -> Dict:
+    return {field: getattr(row, field) for field in GOAL_FIELDS}
+
+
+def inputs_to_dict(row: NutritionGoal) -> Dict:
+    return {field: getattr(row, field) for field in INPUT_FIELDS}
+
+
+def refresh_nutrition_goals(
+    db: Session,
+    trainee_id: int,
+    trainee_profile: Optional[Trainee] = None,
+    **overrides
+) -> NutritionGoal:
+    """
+    Recompute and store goals for a trainee. Inputs come from overrides,
+    then the stored row for fields the user set, then the trainee profile,
+    then the stored row, then defaults. Non-None overrides are recorded as
+    user-set. Does not commit - the caller commits with its own changes.
+    """
+    row = db.query(NutritionGoal).filter(NutritionGoal.trainee_id == trainee_id).first()
+    stored = inputs_to_dict(row) if row else {}
+    user_set = set(row.user_set_fields or []) if row else set()
+    user_set |= {field for field in INPUT_FIELDS if overrides.get(field) is not None}
+    user_stored = {field: value for field, value in stored.items() if field in user_set}
+    if trainee_profile is None:
+        trainee_profile = db.query(Trainee).filter(Trainee.user_id == trainee_id).first()
+
+    profile = {
+        "weight": trainee_profile.weight if trainee_profile else None,
+        "height": trainee_profile.height if trainee_profile else None,
+        "age": _age_from_dob(trainee_profile.date_of_birth) if trainee_profile else None,
+        "gender": trainee_profile.gender if trainee_profile else None,
+        "fitness_goal": fitness_goal_from_text(trainee_profile.goal) if trainee_profile else None,
+    }
+    defaults = {
+        "weight": DEFAULT_WEIGHT,
+        "height": DEFAULT_HEIGHT,
+        "age": DEFAULT_AGE,
+        "gender": DEFAULT_GENDER,
+        "activity_level": "moderate",
+        "fitness_goal": "maintain",
+    }
+
+    inputs = {}
+    for field in INPUT_FIELDS:
+        for source in (overrides, user_stored, profile, stored, defaults):
+            if source.get(field) is not None:
+                inputs[field] = source[field]
+                break
+    inputs["gender"] = _normalize_gender(inputs["gender"])
+
+    goals = calculate_daily_nutrition_goals(inputs)
+    values = {
+        **inputs,
+        **{field: goals[field] for field in GOAL_FIELDS},
+        "user_set_fields": sorted(user_set),
+    }
+
+    if row is None:
+        db.execute(
+            insert(NutritionGoal)
+            .values(trainee_id=trainee_id, **values)
+            .on_conflict_do_nothing(index_elements=[NutritionGoal.trainee_id])
+        )
+        # Ours, or the row a concurrent request inserted first
+        row = db.query(NutritionGoal).filter(NutritionGoal.trainee_id == trainee_id).one()
+    for field, value in values.items():
+        setattr(row, field, value)
+
+    return row
+
+
+def get_trainee_goals(db: Session, trainee_id: int) -> NutritionGoal:
+    """Stored goals for a trainee; computed and saved once if missing."""
+    row = db.query(NutritionGoal).filter(NutritionGoal.trainee_id == trainee_id).first()
+    if row is None:
+        row = refresh_nutrition_goals(db, trainee_id)
+        db.commit()
+    return row
@@ -0,0 +1,79 @@
+"""
+Nutrition Aggregation Service
+=============================
+SQL-side totals over NutritionLog using the typed macro columns
+(protein, carbs, fats, fiber). One query per summary regardless of
+how many days or logs are covered.
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import NutritionLog
+
+MACRO_FIELDS = ("protein", "carbs", "fats", "fiber")
+
+
+def macro_columns(macros: Optional[Dict]) -> Dict[str, float]:
+    """Typed column values for a macros_json payload (missing/invalid -> 0)."""
+    values = {}
+    for field in MACRO_FIELDS:
+        try:
+            values[field] = float((macros or {}).get(field) or 0)
+        except (TypeError, ValueError):
+            values[field] = 0.0
+    return values
+
+
+def _aggregate_columns():
+    return (
+        func.coalesce(func.sum(NutritionLog.calories), 0).label("calories"),
+        func.coalesce(func.sum(NutritionLog.protein), 0).label("protein"),
+        func.coalesce(func.sum(NutritionLog.carbs), 0).label("carbs"),
+        func.coalesce(func.sum(NutritionLog.fats), 0).label("fats"),
+        func.coalesce(func.sum(NutritionLog.fiber), 0).label("fiber"),
+        func.count(NutritionLog.id).label("meals_count"),
+    )
+
+
+def _row_to_dict(row) -> Dict[str, float]:
+    return {
+        "calories": float(row.calories),
+        "protein": float(row.protein),
+        "carbs": float(row.carbs),
+        "fats": float(row.fats),
+        "fiber": float(row.fiber),
+        "meals_count": int(row.meals_count),
+    }
+
+
+def nutrition_totals(db: Session, trainee_id: int, start: date, end: Optional[date] = None) -> Dict[str, float]:
+    """Totals for logs in [start, end) (end defaults to start + 1 day)."""
+    end = end or start + timedelta(days=1)
+    row = db.query(*_aggregate_columns()).filter(
+        NutritionLog.trainee_id == trainee_id,
+        NutritionLog.date >= start,
+        NutritionLog.date < end
+    ).one()
+    return _row_to_dict(row)
+
+
+def daily_nutrition_totals(db: Session, trainee_id: int, start: date, end: date) -> Dict[str, Dict[str, float]]:
+    """
+    Per-day totals for logs in [start, end], keyed by ISO date.
+    Days without logs are absent from the result.
+    """
+    day = func.date(NutritionLog.date).label("day")
+    rows = db.query(day, *_aggregate_columns()).filter(
+        NutritionLog.trainee_id == trainee_id,
+        NutritionLog.date >= start,
+        NutritionLog.date < end + timedelta(days=1)
+    ).group_by(day).all()
+
+    return {
+        (row.day.isoformat() if isinstance(row.day, (date, datetime)) else str(row.day)): _row_to_dict(row)
+        for row in rows
+    }
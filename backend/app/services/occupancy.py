@@ -0,0 +1,218 @@
+"""
+Gym Occupancy Service
+=====================
+Live count of members currently in the gym, kept in an atomic counter
+that check-in/check-out update directly instead of scanning attendance:
+
+- MemoryOccupancyCounter: process-local counter guarded by a lock
+- RedisOccupancyCounter: shared counter (Lua scripts keep capped
+  increments atomic across workers), used when REDIS_URL is set
+- reconcile_occupancy: scheduled job that periodically resets the
+  counter from the attendance table, correcting drift (crashed requests,
+  sessions left open past midnight, manual DB edits)
+
+A visit counts as "in the gym" when it was checked in through the app
+today (UTC) and has no check-out. Trainer-marked attendance is a record
+of presence, not a live visit, and is not counted.
+
+Environment:
+    GYM_CAPACITY                  max members inside; unset/0 = no limit
+    REDIS_URL                     shared counter for multi-worker deployments (optional)
+    OCCUPANCY_RECONCILE_SECONDS   reconciliation interval (default: 60)
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, time
+from typing import Dict, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.models import Attendance
+from app.services.scheduler import schedule_job
+
+REDIS_KEY = "gym:occupancy"
+MANUAL_METHOD = "trainer_manual"
+
+
+def gym_capacity() -> int:
+    try:
+        return max(int(os.getenv("GYM_CAPACITY", "0")), 0)
+    except ValueError:
+        return 0
+
+
+# ====================== COUNTERS ======================
+
+class OccupancyCounter(ABC):
+    """Base counter. try_enter respects capacity (<= 0 means unlimited)."""
+    name = "base"
+
+    @abstractmethod
+    def value(self) -> int:
+        """Members currently inside."""
+
+    @abstractmethod
+    def try_enter(self, capacity: int = 0) -> bool:
+        """Count one more member unless that would exceed capacity."""
+
+    @abstractmethod
+    def leave(self):
+        """Count one member out (never below zero)."""
+
+    @abstractmethod
+    def reset(self, value: int):
+        """Overwrite the count (reconciliation)."""
+
+
+class MemoryOccupancyCounter(OccupancyCounter):
+    name = "memory"
+
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def value(self) -> int:
+        return self._value
+
+    def try_enter(self, capacity: int = 0) -> bool:
+        with self._lock:
+            if capacity > 0 and self._value >= capacity:
+                return False
+            self._value += 1
+            return True
+
+    def leave(self):
+        with self._lock:
+            self._value = max(self._value - 1, 0)
+
+    def reset(self, value: int):
+        with self._lock:
+            self._value = max(value, 0)
+
+
+class RedisOccupancyCounter(OccupancyCounter):
+    name = "redis"
+
+    ENTER_SCRIPT = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    local capacity = tonumber(ARGV[1])
+    if capacity > 0 and current >= capacity then
+        return -1
+    end
+    return redis.call('INCR', KEYS[1])
+    """
+
+    LEAVE_SCRIPT = """
+    local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+    if current <= 0 then
+        redis.call('SET', KEYS[1], 0)
+        return 0
+    end
+    return redis.call('DECR', KEYS[1])
+    """
+
+    def __init__(self, url: str, key: str = REDIS_KEY):
+        import redis
+
+        self.client = redis.Redis.from_url(url, socket_timeout=2)
+        self.client.ping()
+        self.key = key
+        self._enter = self.client.register_script(self.ENTER_SCRIPT)
+        self._leave = self.client.register_script(self.LEAVE_SCRIPT)
+
+    def value(self) -> int:
+        return int(self.client.get(self.key) or 0)
+
+    def try_enter(self, capacity: int = 0) -> bool:
+        return int(self._enter(keys=[self.key], args=[capacity])) >= 0
+
+    def leave(self):
+        self._leave(keys=[self.key])
+
+    def reset(self, value: int):
+        self.client.set(self.key, max(value, 0))
+
+
+# ====================== RECONCILIATION ======================
+
+def is_live_visit(attendance: Attendance) -> bool:
+    """Whether an attendance record is counted by the occupancy counter."""
+    return attendance.check_in_method != MANUAL_METHOD
+
+
+def count_open_visits(db: Session, now: Optional[datetime] = None) -> int:
+    """Today's app check-ins without a check-out (the source of truth)."""
+    today_start = datetime.combine((now or datetime.utcnow()).date(), time.min)
+    return db.query(func.count(Attendance.id)).filter(
+        Attendance.check_out_time.is_(None),
+        Attendance.check_in_time >= today_start,
+        or_(Attendance.check_in_method.is_(None), Attendance.check_in_method != MANUAL_METHOD)
+    ).scalar() or 0
+
+
+def reconcile_occupancy(db: Optional[Session] = None) -> int:
+    """Reset the counter from the attendance table; returns the reconciled value."""
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        count = count_open_visits(db)
+    finally:
+        if own_session:
+            db.close()
+    get_occupancy_counter().reset(count)
+    return count
+
+
+# ====================== ACTIVE COUNTER ======================
+
+RECONCILE_JOB = "occupancy-reconcile"
+
+_counter: Optional[OccupancyCounter] = None
+_lock = threading.Lock()
+
+
+def create_counter() -> OccupancyCounter:
+    """Redis counter when REDIS_URL is set and reachable, otherwise in-memory."""
+    url = os.getenv("REDIS_URL", "")
+    if url:
+        try:
+            counter = RedisOccupancyCounter(url)
+            print(f"Occupancy counter: redis {url}")
+            return counter
+        except Exception as e:
+            print(f"Occupancy counter: redis unavailable ({e}), using in-memory counter")
+    return MemoryOccupancyCounter()
+
+
+def get_occupancy_counter() -> OccupancyCounter:
+    global _counter
+    if _counter is None:
+        with _lock:
+            if _counter is None:
+                _counter = create_counter()
+    return _counter
+
+
+def start_occupancy_tracking():
+    """Seed the counter from the table and schedule periodic reconciliation (app startup)."""
+    try:
+        reconcile_occupancy()
+    except Exception as e:
+        print(f"Occupancy counter: initial reconciliation failed ({e})")
+    schedule_job(RECONCILE_JOB, float(os.getenv("OCCUPANCY_RECONCILE_SECONDS", "60")), reconcile_occupancy)
+
+
+def occupancy_snapshot() -> Dict:
+    current = get_occupancy_counter().value()
+    capacity = gym_capacity()
+    return {
+        "occupancy": current,
+        "capacity": capacity or None,
+        "available": max(capacity - current, 0) if capacity else None,
+        "at_capacity": bool(capacity) and current >= capacity,
+        "updated_at": datetime.utcnow().isoformat() + "Z",
+    }
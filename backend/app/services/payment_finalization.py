@@ -0,0 +1,160 @@
+"""
+Payment Finalization Service
+============================
+Turns a verified Razorpay payment into a completed Payment and an active or
+extended Membership - exactly once, however often the client retries.
+
+finalize_payment runs the whole transition in one transaction:
+
+1. INSERT the idempotency key ("razorpay:<order_id>") ON CONFLICT DO
+   NOTHING. A concurrent duplicate blocks on the uncommitted key until the
+   first request commits, then sees the key and replays the stored
+   response instead of extending the membership again.
+2. Lock the payment row (FOR UPDATE); it must belong to the caller.
+3. Check the plan: the one applied is the plan stored on the payment by
+   /create-order, never the client's plan_id. A plan_id that differs from
+   it, an order amount that differs from the plan price, or a plan that is
+   no longer active is rejected.
+4. Lock the member's user row so concurrent payments for different orders
+   of the same member extend one membership in turn.
+5. Mark the payment completed, apply the plan, store the response on the
+   key and commit.
+
+Locks are always taken in that order (key, payment, user).
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models import Membership, MembershipPlan, Payment, PaymentIdempotencyKey, User
+from app.services.membership_lifecycle import clear_expiry_flags
+
+DAYS_PER_PLAN_MONTH = 30
+AMOUNT_TOLERANCE = 0.005
+
+
+class PaymentMismatchError(ValueError):
+    """The order does not match the plan the client claims it paid for."""
+
+
+def idempotency_key(order_id: str) -> str:
+    return f"razorpay:{order_id}"
+
+
+def _claim_key(db: Session, key: str, user_id: int) -> PaymentIdempotencyKey:
+    """Insert the key if new (waiting out a concurrent insert) and lock it for this transaction."""
+    db.execute(
+        insert(PaymentIdempotencyKey)
+        .values(key=key, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=[PaymentIdempotencyKey.key])
+    )
+    return db.query(PaymentIdempotencyKey).filter(
+        PaymentIdempotencyKey.key == key
+    ).with_for_update().one()
+
+
+def apply_plan(db: Session, user_id: int, plan: MembershipPlan, now: Optional[datetime] = None) -> Membership:
+    """Extend the member's active membership by the plan, or start a new one. Caller holds the user lock."""
+    now = now or datetime.utcnow()
+    duration = timedelta(days=plan.duration_months * DAYS_PER_PLAN_MONTH)
+
+    existing = db.query(Membership).filter(
+        Membership.trainee_id == user_id,
+        Membership.status == "active"
+    ).order_by(Membership.end_date.desc()).with_for_update().first()
+
+    if existing:
+        existing.end_date = existing.end_date + duration
+        clear_expiry_flags(existing)
+        existing.membership_type = plan.membership_type
+        existing.price = plan.price
+        return existing
+
+    membership = Membership(
+        trainee_id=user_id,
+        membership_type=plan.membership_type,
+        start_date=now,
+        end_date=now + duration,
+        status="active",
+        price=plan.price,
+    )
+    db.add(membership)
+    return membership
+
+
+def _order_plan(db: Session, payment: Payment, plan_id: Optional[int]) -> Optional[MembershipPlan]:
+    """The plan the order was created for, checked against the client's plan_id and the amount."""
+    if plan_id is not None and plan_id != payment.plan_id:
+        raise PaymentMismatchError("Plan does not match the plan this order was created for")
+    if payment.plan_id is None:
+        return None
+    plan = db.query(MembershipPlan).filter(
+        MembershipPlan.id == payment.plan_id,
+        MembershipPlan.is_active == True
+    ).first()
+    if plan is None:
+        raise PaymentMismatchError("Membership plan is no longer available")
+    if abs(float(payment.amount) - float(plan.price)) > AMOUNT_TOLERANCE:
+        raise PaymentMismatchError("Order amount does not match the plan price")
+    return plan
+
+
+def finalize_payment(
+    db: Session,
+    user_id: int,
+    order_id: str,
+    razorpay_payment_id: str,
+    plan_id: Optional[int] = None,
+) -> Tuple[Dict, bool]:
+    """
+    Complete a signature-verified payment. Returns (response, replayed);
+    replayed is True when the order was already finalized.
+    Raises LookupError (unknown order), PermissionError (someone else's
+    order) or PaymentMismatchError (plan_id or amount does not match the order).
+    """
+    try:
+        record = _claim_key(db, idempotency_key(order_id), user_id)
+        if record.user_id != user_id:
+            raise PermissionError("This order belongs to another account")
+        if record.completed_at is not None:
+            response = record.response_json
+            db.rollback()
+            return response, True
+
+        payment = db.query(Payment).filter(
+            Payment.transaction_id.in_([order_id, razorpay_payment_id])
+        ).with_for_update().first()
+        if payment is None:
+            raise LookupError("Payment order not found")
+        if payment.trainee_id != user_id:
+            raise PermissionError("This order belongs to another account")
+
+        membership = None
+        if payment.status != "completed":
+            plan = _order_plan(db, payment, plan_id)
+            payment.status = "completed"
+            payment.transaction_id = razorpay_payment_id
+
+            if plan:
+                # NO KEY UPDATE: must not conflict with the KEY SHARE locks our own FK inserts take
+                db.query(User.id).filter(User.id == user_id).with_for_update(key_share=True).one()
+                membership = apply_plan(db, user_id, plan)
+        db.flush()
+
+        response = {
+            "status": "success",
+            "message": "Payment verified and membership activated!",
+            "payment_id": razorpay_payment_id,
+            "membership_end": membership.end_date.isoformat() if membership and membership.end_date else None,
+        }
+        record.payment_id = payment.id
+        record.response_json = response
+        record.completed_at = datetime.utcnow()
+        db.commit()
+        return response, False
+    except Exception:
+        db.rollback()
+        raise
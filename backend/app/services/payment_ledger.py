@@ -0,0 +1,204 @@
+"""
+Payment Ledger Service
+======================
+Trainee payments and trainer payouts as one ledger, built in SQL:
+
+- UNION ALL of payments (joined to the trainee's user row) and payouts
+  (joined to trainer -> user), so names come back with the rows instead of
+  one lazy load per entry.
+- Filters (mode, status, type, search) are applied inside each branch.
+- Ordered by (timestamp, source, id) descending and paginated with an
+  opaque keyset cursor; ids are only unique per source, hence the source
+  in the key.
+
+Payouts have no mode/status columns; they appear as mode "bank_transfer"
+and status "paid", and filters treat them that way. Entries without a
+timestamp sort as LEDGER_EPOCH (after every dated entry) so the keyset
+always has a value, and are served with a null date.
+"""
+
+import base64
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, String, cast, false, func, literal, null, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from app.models import Payment, Trainer, TrainerRevenue, User
+
+PAYMENT = "trainee_payment"
+PAYOUT = "trainer_payout"
+ENTRY_TYPES = (PAYMENT, PAYOUT)
+PAYOUT_MODE = "bank_transfer"
+PAYOUT_STATUS = "paid"
+
+# Sort rank of each source, used as the keyset tie-breaker
+_SOURCE_RANK = {PAYMENT: 1, PAYOUT: 0}
+
+# Sort key of entries without a timestamp
+LEDGER_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(timestamp: datetime, source: int, entry_id: int) -> str:
+    raw = f"{timestamp.isoformat()}|{source}|{entry_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, source, entry_id = raw.rsplit("|", 2)
+        return datetime.fromisoformat(timestamp), int(source), int(entry_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def _payments_select(mode: Optional[str], status: Optional[str], search_like: Optional[str]):
+    query = select(
+        literal(PAYMENT).label("type"),
+        literal(_SOURCE_RANK[PAYMENT]).label("source"),
+        Payment.id.label("id"),
+        func.coalesce(Payment.created_at, LEDGER_EPOCH).label("timestamp"),
+        Payment.amount.label("amount"),
+        Payment.status.label("status"),
+        Payment.payment_mode.label("payment_mode"),
+        Payment.provider.label("provider"),
+        User.email.label("email"),
+        User.name.label("name"),
+        cast(null(), String).label("trainer_id"),
+        Payment.receipt_number.label("receipt_number"),
+        Payment.receipt_pdf_url.label("receipt_pdf_url"),
+        Payment.is_refund.label("is_refund"),
+        Payment.refund_amount.label("refund_amount"),
+        Payment.notes.label("notes"),
+    ).select_from(Payment).outerjoin(User, User.id == Payment.trainee_id)
+
+    if mode:
+        query = query.where(Payment.payment_mode == mode.lower())
+    if status:
+        query = query.where(Payment.status == status)
+    if search_like:
+        query = query.where(or_(
+            func.lower(User.email).like(search_like),
+            func.lower(Payment.receipt_number).like(search_like),
+        ))
+    return query
+
+
+def _payouts_select(mode: Optional[str], status: Optional[str], search_like: Optional[str]):
+    # paid_at is a naive UTC timestamp; make it comparable with payments.created_at
+    paid_at = func.coalesce(
+        func.timezone("UTC", func.coalesce(TrainerRevenue.paid_at, TrainerRevenue.created_at)),
+        LEDGER_EPOCH,
+    )
+    query = select(
+        literal(PAYOUT).label("type"),
+        literal(_SOURCE_RANK[PAYOUT]).label("source"),
+        TrainerRevenue.id.label("id"),
+        paid_at.label("timestamp"),
+        TrainerRevenue.amount.label("amount"),
+        literal(PAYOUT_STATUS).label("status"),
+        literal(PAYOUT_MODE).label("payment_mode"),
+        literal("admin").label("provider"),
+        User.email.label("email"),
+        User.name.label("name"),
+        cast(TrainerRevenue.trainer_id, String).label("trainer_id"),
+        cast(null(), String).label("receipt_number"),
+        cast(null(), String).label("receipt_pdf_url"),
+        false().label("is_refund"),
+        cast(null(), Float).label("refund_amount"),
+        TrainerRevenue.notes.label("notes"),
+    ).select_from(TrainerRevenue) \
+        .outerjoin(Trainer, Trainer.id == TrainerRevenue.trainer_id) \
+        .outerjoin(User, User.id == Trainer.user_id)
+
+    if (mode and mode.lower() != PAYOUT_MODE) or (status and status != PAYOUT_STATUS):
+        query = query.where(false())
+    if search_like:
+        query = query.where(or_(
+            func.lower(User.email).like(search_like),
+            func.lower(User.name).like(search_like),
+        ))
+    return query
+
+
+def ledger_select(
+    mode: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    entry_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+):
+    """The filtered ledger as a SELECT over the UNION ALL, newest first."""
+    if entry_type and entry_type not in ENTRY_TYPES:
+        raise ValueError(f"Unknown type '{entry_type}'. Allowed: {', '.join(ENTRY_TYPES)}")
+    search_like = f"%{search.lower()}%" if search else None
+
+    branches = []
+    if entry_type in (None, PAYMENT):
+        branches.append(_payments_select(mode, status, search_like))
+    if entry_type in (None, PAYOUT):
+        branches.append(_payouts_select(mode, status, search_like))
+    ledger = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("ledger")
+
+    query = select(ledger)
+    if cursor:
+        key_time, key_source, key_id = decode_cursor(cursor)
+        query = query.where(
+            tuple_(ledger.c.timestamp, ledger.c.source, ledger.c.id) < tuple_(key_time, key_source, key_id)
+        )
+    return query.order_by(ledger.c.timestamp.desc(), ledger.c.source.desc(), ledger.c.id.desc())
+
+
+def serialize_entry(row) -> Dict:
+    """Ledger row -> the shape the billing screens already consume."""
+    timestamp = row.timestamp.isoformat() if row.timestamp != LEDGER_EPOCH else None
+    if row.type == PAYOUT:
+        return {
+            "id": row.id,
+            "type": PAYOUT,
+            "amount": float(row.amount or 0),
+            "status": row.status,
+            "payment_mode": row.payment_mode,
+            "provider": row.provider,
+            "trainer_id": row.trainer_id,
+            "trainer_name": row.name,
+            "notes": row.notes,
+            "paid_at": timestamp,
+        }
+    return {
+        "id": row.id,
+        "type": PAYMENT,
+        "amount": float(row.amount or 0),
+        "status": row.status,
+        "payment_mode": row.payment_mode,
+        "provider": row.provider,
+        "trainee_email": row.email,
+        "user_email": row.email,
+        "receipt_number": row.receipt_number,
+        "receipt_pdf_url": row.receipt_pdf_url,
+        "is_refund": row.is_refund,
+        "refund_amount": float(row.refund_amount) if row.refund_amount is not None else None,
+        "created_at": timestamp,
+    }
+
+
+def ledger_page(
+    db: Session,
+    limit: int,
+    cursor: Optional[str] = None,
+    mode: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = None,
+    entry_type: Optional[str] = None,
+) -> Dict:
+    """One page of the ledger plus next_cursor (None on the last page)."""
+    query = ledger_select(mode, status, search, entry_type, cursor).limit(limit + 1)
+    rows: List = db.execute(query).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.timestamp, last.source, last.id)
+    return {"payments": [serialize_entry(row) for row in rows], "next_cursor": next_cursor}
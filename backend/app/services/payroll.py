@@ -0,0 +1,176 @@
+"""
+Trainer Payroll Service
+=======================
+Month-end pay for every trainer in a fixed number of queries, whatever the
+number of trainers:
+
+1. trainers with their active salary config (one outer join)
+2. trainee counts grouped by trainer
+3. completed PT sessions in the month grouped by trainer
+4. (run only) payroll rows already written for the month
+
+Pay is base + trainees x commission_per_trainee (per_trainee / hybrid)
++ sessions x commission_per_session (per_session / hybrid), the same rule
+as the single-trainer earnings endpoint (earnings_breakdown is shared).
+
+run_payroll writes one TrainerRevenue per trainer with pay > 0 in a single
+bulk INSERT, tagged source "payroll:YYYY-MM" so re-running a month skips
+trainers already paid (runs for the same month hold an advisory lock).
+dry_run computes without writing.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models import PTSession, Trainee, Trainer, TrainerRevenue, TrainerSalary, User
+
+TRAINEE_MODELS = ("per_trainee", "hybrid")
+SESSION_MODELS = ("per_session", "hybrid")
+PAYROLL_LOCK_NAMESPACE = 4401
+
+
+def month_bounds(year: int, month: int) -> Tuple[datetime, datetime]:
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def payroll_source(year: int, month: int) -> str:
+    return f"payroll:{year}-{month:02d}"
+
+
+def earnings_breakdown(salary_config, trainee_count: int, session_count: int) -> Dict:
+    """Pay for one trainer; salary_config needs salary_model, base_salary and the two rates."""
+    if salary_config is None or salary_config.salary_model is None:
+        return {
+            "total": 0,
+            "base_salary": 0,
+            "trainee_commission": 0,
+            "session_commission": 0
+        }
+
+    base_salary = float(salary_config.base_salary or 0)
+    trainee_commission = 0
+    session_commission = 0
+    if salary_config.salary_model in TRAINEE_MODELS:
+        trainee_commission = trainee_count * float(salary_config.commission_per_trainee or 0)
+    if salary_config.salary_model in SESSION_MODELS:
+        session_commission = session_count * float(salary_config.commission_per_session or 0)
+
+    total = base_salary + trainee_commission + session_commission
+    return {
+        "total": round(total, 2),
+        "base_salary": round(base_salary, 2),
+        "trainee_commission": round(trainee_commission, 2),
+        "session_commission": round(session_commission, 2),
+        "salary_model": salary_config.salary_model
+    }
+
+
+def compute_payroll(
+    db: Session,
+    year: int,
+    month: int,
+    trainer_ids: Optional[Iterable] = None,
+) -> List[Dict]:
+    """Earnings of every trainer (or the given ones) for the month."""
+    start, end = month_bounds(year, month)
+    trainer_ids = list(trainer_ids) if trainer_ids is not None else None
+
+    configs = db.query(
+        Trainer.id.label("trainer_id"),
+        User.name.label("name"),
+        TrainerSalary.salary_model,
+        TrainerSalary.base_salary,
+        TrainerSalary.commission_per_trainee,
+        TrainerSalary.commission_per_session,
+    ).join(User, User.id == Trainer.user_id).outerjoin(
+        TrainerSalary,
+        and_(TrainerSalary.trainer_id == Trainer.id, TrainerSalary.is_active == True)
+    )
+    trainee_counts = db.query(Trainee.trainer_id, func.count(Trainee.id)).filter(Trainee.trainer_id.isnot(None))
+    session_counts = db.query(PTSession.trainer_id, func.count(PTSession.id)).filter(
+        PTSession.session_date >= start,
+        PTSession.session_date < end,
+        PTSession.status == 'completed'
+    )
+    if trainer_ids is not None:
+        configs = configs.filter(Trainer.id.in_(trainer_ids))
+        trainee_counts = trainee_counts.filter(Trainee.trainer_id.in_(trainer_ids))
+        session_counts = session_counts.filter(PTSession.trainer_id.in_(trainer_ids))
+
+    # Newest active config wins if a trainer somehow has several
+    configs = configs.order_by(
+        Trainer.id,
+        TrainerSalary.effective_from.desc().nulls_last(),
+        TrainerSalary.id.desc().nulls_last()
+    ).all()
+    trainees = dict(trainee_counts.group_by(Trainee.trainer_id).all())
+    sessions = dict(session_counts.group_by(PTSession.trainer_id).all())
+
+    payroll = []
+    seen = set()
+    for row in configs:
+        if row.trainer_id in seen:
+            continue
+        seen.add(row.trainer_id)
+        trainee_count = trainees.get(row.trainer_id, 0)
+        session_count = sessions.get(row.trainer_id, 0)
+        payroll.append({
+            "trainer_id": str(row.trainer_id),
+            "name": row.name,
+            "trainee_count": trainee_count,
+            "session_count": session_count,
+            **earnings_breakdown(row, trainee_count, session_count),
+        })
+    payroll.sort(key=lambda entry: (-entry["total"], entry["name"] or ""))
+    return payroll
+
+
+def run_payroll(db: Session, year: int, month: int, dry_run: bool = False) -> Dict:
+    """Compute the month's payroll and (unless dry_run) record payouts in one bulk INSERT."""
+    if not dry_run:
+        # Serialise concurrent runs for the same month until commit
+        db.execute(select(func.pg_advisory_xact_lock(PAYROLL_LOCK_NAMESPACE, year * 100 + month)))
+    payroll = compute_payroll(db, year, month)
+    source = payroll_source(year, month)
+
+    already_paid = {
+        str(trainer_id) for (trainer_id,) in
+        db.query(TrainerRevenue.trainer_id).filter(TrainerRevenue.source == source).distinct()
+    }
+    payable = [
+        entry for entry in payroll
+        if entry["total"] > 0 and entry["trainer_id"] not in already_paid
+    ]
+
+    if not dry_run and payable:
+        now = datetime.utcnow()
+        db.execute(insert(TrainerRevenue), [
+            {
+                "trainer_id": uuid.UUID(entry["trainer_id"]),
+                "amount": entry["total"],
+                "source": source,
+                "notes": f"Payroll {year}-{month:02d}: base {entry['base_salary']}, "
+                         f"{entry['trainee_count']} trainees, {entry['session_count']} sessions",
+                "created_at": now,
+                "paid_at": now,
+            }
+            for entry in payable
+        ])
+        db.commit()
+
+    return {
+        "year": year,
+        "month": month,
+        "dry_run": dry_run,
+        "trainers": len(payroll),
+        "payable": len(payable),
+        "already_paid": len(already_paid),
+        "total_amount": round(sum(entry["total"] for entry in payable), 2),
+        "payroll": payroll,
+    }
@@ -0,0 +1,107 @@
+"""
+Plan Analytics Service
+======================
+Per-plan purchase count, revenue, renewal rate, churn and average tenure for
+every MembershipPlan in three queries, however many plans there are:
+
+1. the plans
+2. completed payments grouped by payments.plan_id (purchases, revenue)
+3. memberships grouped by membership_type (active, churned, AVG tenure)
+
+Purchases and revenue come from payments: a renewal extends the existing
+membership in place, so memberships count members, not purchases, and
+their price is only the latest one paid. Revenue is net of refunds.
+Memberships reference plans by membership_type, so plans sharing a type
+share the membership figures. Definitions:
+
+    renewal_rate   active memberships / members of the type
+    churn_rate     expired or cancelled memberships / members of the type
+    avg_tenure     mean days from start to end (or to now, if still running)
+
+Results are cached for PLAN_ANALYTICS_CACHE_SECONDS; pass refresh=True to
+recompute.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models import Membership, MembershipPlan, Payment
+
+PLAN_ANALYTICS_CACHE_SECONDS = 60
+CHURNED_STATUSES = ("expired", "cancelled")
+
+_cache: Optional[Tuple[float, List]] = None
+_cache_lock = threading.Lock()
+
+
+def _ratio(part: int, whole: int) -> float:
+    return round(part / whole, 4) if whole else 0
+
+
+def build_plan_analytics(db: Session) -> List:
+    """Analytics of every plan, best sellers (by revenue, then purchases) first."""
+    now = datetime.now(timezone.utc)
+    sales = {
+        row.plan_id: row for row in db.query(
+            Payment.plan_id,
+            func.count(Payment.id).label("purchases"),
+            func.coalesce(func.sum(Payment.amount - func.coalesce(Payment.refund_amount, 0)), 0).label("revenue"),
+        ).filter(
+            Payment.status == "completed",
+            Payment.plan_id.isnot(None),
+        ).group_by(Payment.plan_id).all()
+    }
+    tenure_end = func.least(Membership.end_date, now)
+    stats = {
+        row.membership_type: row for row in db.query(
+            Membership.membership_type,
+            func.count(Membership.id).label("members"),
+            func.count(Membership.id).filter(Membership.status == "active").label("active"),
+            func.count(Membership.id).filter(Membership.status.in_(CHURNED_STATUSES)).label("churned"),
+            func.avg(func.extract("epoch", tenure_end - Membership.start_date)).label("tenure_seconds"),
+        ).group_by(Membership.membership_type).all()
+    }
+
+    analytics = []
+    for plan in db.query(MembershipPlan).order_by(MembershipPlan.id).all():
+        sold = sales.get(plan.id)
+        row = stats.get(plan.membership_type)
+        analytics.append({
+            "plan_id": plan.id,
+            "name": plan.name,
+            "membership_type": plan.membership_type,
+            "purchase_count": sold.purchases if sold else 0,
+            "active_count": row.active if row else 0,
+            "revenue": float(sold.revenue) if sold else 0.0,
+            "renewal_rate": _ratio(row.active, row.members) if row else 0,
+            "churn_rate": _ratio(row.churned, row.members) if row else 0,
+            "avg_tenure_days": round(max(0, float(row.tenure_seconds or 0)) / 86400, 1) if row else 0,
+        })
+    analytics.sort(key=lambda entry: (-entry["revenue"], -entry["purchase_count"]))
+    return analytics
+
+
+def cached_plan_analytics(db: Session, refresh: bool = False) -> List:
+    global _cache
+    now = time.monotonic()
+    if not refresh:
+        with _cache_lock:
+            hit = _cache
+        if hit and now - hit[0] < PLAN_ANALYTICS_CACHE_SECONDS:
+            return hit[1]
+
+    analytics = build_plan_analytics(db)
+    with _cache_lock:
+        _cache = (now, analytics)
+    return analytics
+
+
+def clear_plan_analytics_cache():
+    global _cache
+    with _cache_lock:
+        _cache = None
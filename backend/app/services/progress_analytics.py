@@ -0,0 +1,185 @@
+"""
+Progress Analytics Engine
+=========================
+Server-side smoothing and downsampling for body-measurement charts
+(ProgressMeasurement / Measurement series):
+
+- rolling_mean: trailing time-window average (cumulative sums + searchsorted)
+- weekly_means: Monday-based weekly buckets (np.unique + bincount)
+- trend_slope: least-squares slope, reported per week
+- lttb_indices: Largest-Triangle-Three-Buckets downsampling to N points
+
+Everything is vectorized over the full series; only LTTB walks its
+output buckets (each bucket is scored in one NumPy expression). Payload
+size is bounded by the requested point count regardless of history length.
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_POINTS = 200
+DEFAULT_WINDOW_DAYS = 7
+MEASUREMENT_FIELDS = ("weight", "body_fat", "muscle_mass", "chest", "waist", "hips", "biceps")
+
+
+# ====================== SERIES HELPERS ======================
+
+def to_days(value) -> float:
+    """date/datetime -> fractional proleptic ordinal day (Monday 0001-01-01 == 1)."""
+    if isinstance(value, datetime):
+        return value.toordinal() + (value.hour * 3600 + value.minute * 60 + value.second) / 86400.0
+    return float(value.toordinal())
+
+
+def _iso(value) -> str:
+    return value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+
+
+def _round(values: np.ndarray, digits: int = 2) -> List[Optional[float]]:
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
+
+
+# ====================== STATISTICS ======================
+
+def rolling_mean(t: np.ndarray, v: np.ndarray, window_days: float = DEFAULT_WINDOW_DAYS) -> np.ndarray:
+    """Mean of all samples in (t_i - window_days, t_i] for each i. t must be sorted."""
+    if len(v) == 0:
+        return np.empty(0)
+    left = np.searchsorted(t, t - window_days, side="right")
+    sums = np.concatenate(([0.0], np.cumsum(v)))
+    idx = np.arange(1, len(v) + 1)
+    return (sums[idx] - sums[left]) / (idx - left)
+
+
+def weekly_means(t: np.ndarray, v: np.ndarray):
+    """(week_start_ordinals, means, counts) for Monday-based weeks present in the series."""
+    if len(v) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0), np.empty(0, dtype=np.int64)
+    day = np.floor(t).astype(np.int64)
+    week_start = day - (day - 1) % 7
+    weeks, inverse = np.unique(week_start, return_inverse=True)
+    counts = np.bincount(inverse)
+    means = np.bincount(inverse, weights=v) / counts
+    return weeks, means, counts
+
+
+def trend_slope(t: np.ndarray, v: np.ndarray) -> Optional[float]:
+    """Least-squares slope in units per day (None with fewer than two distinct days)."""
+    if len(v) < 2:
+        return None
+    tc = t - t.mean()
+    denominator = float(np.dot(tc, tc))
+    if denominator == 0:
+        return None
+    return float(np.dot(tc, v - v.mean()) / denominator)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    First and last points are always kept; returns all indices if the series
+    already fits in `threshold` points.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    starts, ends = bounds[:-1], bounds[1:]
+
+    # Bucket centroids, all at once; the centroid "after" the last bucket is the last point
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = ends - starts
+    next_x = np.append(((cx[ends] - cx[starts]) / sizes)[1:], x[-1])
+    next_y = np.append(((cy[ends] - cy[starts]) / sizes)[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        s, e = starts[i], ends[i]
+        area = np.abs((x[a] - next_x[i]) * (y[s:e] - y[a]) - (x[a] - x[s:e]) * (next_y[i] - y[a]))
+        a = s + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+# ====================== SERIES ANALYSIS ======================
+
+def analyze_series(
+    dates: Sequence,
+    values: Sequence[Optional[float]],
+    points: int = DEFAULT_POINTS,
+    window_days: float = DEFAULT_WINDOW_DAYS,
+) -> Dict:
+    """
+    Rolling average, weekly means, trend and a downsampled chart series for
+    one measurement. Dates must be ascending; missing values are skipped.
+    """
+    pairs = [(d, v) for d, v in zip(dates, values) if d is not None and v is not None]
+    if not pairs:
+        return {"count": 0, "first": None, "last": None, "change": None,
+                "slope_per_week": None, "points": [], "weekly": []}
+
+    kept_dates = [d for d, _ in pairs]
+    t = np.fromiter((to_days(d) for d in kept_dates), dtype=np.float64, count=len(pairs))
+    v = np.fromiter((float(val) for _, val in pairs), dtype=np.float64, count=len(pairs))
+
+    rolling = rolling_mean(t, v, window_days)
+    slope = trend_slope(t, v)
+    keep = lttb_indices(t, v, points)
+    weeks, week_means, week_counts = weekly_means(t, v)
+
+    return {
+        "count": len(v),
+        "first": round(float(v[0]), 2),
+        "last": round(float(v[-1]), 2),
+        "change": round(float(v[-1] - v[0]), 2),
+        "slope_per_week": round(slope * 7, 3) if slope is not None else None,
+        "points": [
+            {"date": _iso(kept_dates[i]), "value": value, "rolling_avg": avg}
+            for i, value, avg in zip(keep.tolist(), _round(v[keep]), _round(rolling[keep]))
+        ],
+        "weekly": [
+            {"week_start": date.fromordinal(int(w)).isoformat(), "mean": m, "count": int(c)}
+            for w, m, c in zip(weeks, _round(week_means), week_counts)
+        ],
+    }
+
+
+def analyze_measurements(
+    rows: Iterable,
+    fields: Sequence[str] = MEASUREMENT_FIELDS,
+    date_attr: str = "date",
+    points: int = DEFAULT_POINTS,
+    window_days: float = DEFAULT_WINDOW_DAYS,
+) -> Dict[str, Dict]:
+    """analyze_series for each field of measurement rows ordered by `date_attr`."""
+    rows = list(rows)
+    dates = [getattr(r, date_attr) for r in rows]
+    return {
+        field: analyze_series(dates, [getattr(r, field) for r in rows], points, window_days)
+        for field in fields
+    }
+
+
+def downsample_rows(rows: Sequence, field: str, points: int, date_attr: str = "date") -> List:
+    """
+    Subset of rows (ordered by `date_attr`) chosen by LTTB on `field`, so raw
+    measurement lists stay bounded. Rows without a value for `field` are
+    dropped when downsampling is needed.
+    """
+    if len(rows) <= points:
+        return list(rows)
+    candidates = [r for r in rows if getattr(r, field) is not None and getattr(r, date_attr) is not None]
+    if not candidates:
+        step = np.linspace(0, len(rows) - 1, points).round().astype(int)
+        return [rows[i] for i in np.unique(step)]
+    t = np.array([to_days(getattr(r, date_attr)) for r in candidates])
+    v = np.array([float(getattr(r, field)) for r in candidates])
+    return [candidates[i] for i in lttb_indices(t, v, points)]
@@ -0,0 +1,196 @@
+"""
+Workout / Progress Correlation Engine
+=====================================
+Puts workouts and body measurements on a shared daily grid (NumPy
+bincount, O(W + M + days)) and derives, in one pass over the grid:
+
+- workout counts on each measurement day (the chart timeline)
+- lagged correlations: trailing 7-day workout volume vs the change in a
+  measurement over the following N days
+- weekly workout volume vs weekly measurement deltas (Pearson r and the
+  regression slope "change per extra workout")
+- overall trend slopes per week
+
+Measurements are linearly interpolated between measured days; days outside
+the measured range are left as NaN and ignored.
+
+Benchmark: python -m benchmarks.bench_progress_correlation
+"""
+
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.progress_analytics import trend_slope
+
+CORRELATION_FIELDS = ("weight", "body_fat", "muscle_mass")
+DEFAULT_LAGS = (7, 14, 28)
+VOLUME_WINDOW_DAYS = 7
+MIN_PAIRS = 3
+
+
+def _ordinal(value) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    return value.toordinal()
+
+
+def _pearson(a: np.ndarray, b: np.ndarray) -> Tuple[Optional[float], int]:
+    """Pearson r over positions where both are finite, with the pair count."""
+    mask = np.isfinite(a) & np.isfinite(b)
+    n = int(mask.sum())
+    if n < MIN_PAIRS:
+        return None, n
+    a, b = a[mask] - a[mask].mean(), b[mask] - b[mask].mean()
+    denominator = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    if denominator == 0:
+        return None, n
+    return float(np.dot(a, b) / denominator), n
+
+
+def _regression_slope(x: np.ndarray, y: np.ndarray) -> Optional[float]:
+    mask = np.isfinite(x) & np.isfinite(y)
+    if mask.sum() < MIN_PAIRS:
+        return None
+    xc = x[mask] - x[mask].mean()
+    denominator = np.dot(xc, xc)
+    if denominator == 0:
+        return None
+    return float(np.dot(xc, y[mask] - y[mask].mean()) / denominator)
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+# ====================== DAILY GRID ======================
+
+class DailyGrid:
+    """Workout and measurement series binned onto consecutive days from `start`."""
+
+    def __init__(self, start: date, end: date):
+        self.start = start.toordinal()
+        self.days = max(end.toordinal() - self.start + 1, 1)
+
+    def index(self, ordinals: np.ndarray) -> np.ndarray:
+        return np.clip(ordinals - self.start, 0, self.days - 1)
+
+    def workout_series(self, workouts: Sequence) -> Dict[str, np.ndarray]:
+        """Per-day workout count and minutes from (start_time, duration_minutes) rows."""
+        rows = [w for w in workouts if w[0] is not None]
+        idx = self.index(np.fromiter((_ordinal(w[0]) for w in rows), dtype=np.int64, count=len(rows)))
+        minutes = np.fromiter((w[1] or 0 for w in rows), dtype=np.float64, count=len(rows))
+        return {
+            "count": np.bincount(idx, minlength=self.days).astype(np.float64),
+            "minutes": np.bincount(idx, weights=minutes, minlength=self.days),
+        }
+
+    def measurement_series(self, days: Sequence, values: Sequence) -> np.ndarray:
+        """Daily means on measured days, linearly interpolated in between, NaN outside."""
+        pairs = [(d, v) for d, v in zip(days, values) if d is not None and v is not None]
+        series = np.full(self.days, np.nan)
+        if not pairs:
+            return series
+        idx = self.index(np.fromiter((_ordinal(d) for d, _ in pairs), dtype=np.int64, count=len(pairs)))
+        v = np.fromiter((float(val) for _, val in pairs), dtype=np.float64, count=len(pairs))
+        counts = np.bincount(idx, minlength=self.days)
+        measured = np.flatnonzero(counts)
+        means = np.bincount(idx, weights=v, minlength=self.days)[measured] / counts[measured]
+        inside = np.arange(measured[0], measured[-1] + 1)
+        series[inside] = np.interp(inside, measured, means)
+        return series
+
+
+def trailing_sum(values: np.ndarray, window: int) -> np.ndarray:
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(1, len(values) + 1)
+    return sums[idx] - sums[np.maximum(idx - window, 0)]
+
+
+# ====================== CORRELATION ======================
+
+def correlate_progress(
+    measurements: Sequence,
+    workouts: Sequence,
+    start: date,
+    end: date,
+    fields: Sequence[str] = CORRELATION_FIELDS,
+    lags: Sequence[int] = DEFAULT_LAGS,
+) -> Dict:
+    """
+    Correlate workout volume with measurement changes between start and end.
+
+    measurements: rows with .date and the requested fields, ascending by date
+    workouts: (start_time, duration_minutes) tuples
+    """
+    grid = DailyGrid(start, end)
+    volume = grid.workout_series(workouts)
+    volume_7d = trailing_sum(volume["count"], VOLUME_WINDOW_DAYS)
+
+    measurement_days = [m.date for m in measurements]
+    day_offsets = np.arange(grid.days, dtype=np.float64)
+
+    # Weeks are consecutive 7-day blocks from the start of the grid
+    week_of_day = np.arange(grid.days) // 7
+    weeks = int(week_of_day[-1]) + 1
+    weekly_workouts = np.bincount(week_of_day, weights=volume["count"], minlength=weeks)
+    weekly_minutes = np.bincount(week_of_day, weights=volume["minutes"], minlength=weeks)
+    week_first = np.arange(weeks) * 7
+    week_last = np.minimum(week_first + 6, grid.days - 1)
+
+    metrics = {}
+    weekly_deltas = {}
+    for field in fields:
+        series = grid.measurement_series(measurement_days, [getattr(m, field) for m in measurements])
+        measured = np.isfinite(series)
+
+        lagged = []
+        for lag in lags:
+            if lag >= grid.days:
+                lagged.append({"lag_days": lag, "r": None, "pairs": 0})
+                continue
+            change = series[lag:] - series[:-lag]
+            r, n = _pearson(volume_7d[:-lag], change)
+            lagged.append({"lag_days": lag, "r": _round(r), "pairs": n})
+
+        deltas = series[week_last] - series[week_first]
+        weekly_deltas[field] = deltas
+        r, n = _pearson(weekly_workouts, deltas)
+        slope = trend_slope(day_offsets[measured], series[measured]) if measured.any() else None
+        observed = series[measured]
+
+        metrics[field] = {
+            "change": _round(observed[-1] - observed[0], 2) if len(observed) else None,
+            "trend_per_week": _round(slope * 7 if slope is not None else None),
+            "lagged_correlation": lagged,
+            "weekly_volume_correlation": {
+                "r": _round(r),
+                "weeks": n,
+                "change_per_workout": _round(_regression_slope(weekly_workouts, deltas)),
+            },
+        }
+
+    weekly = [
+        {
+            "week_start": date.fromordinal(grid.start + int(first)).isoformat(),
+            "workouts": int(weekly_workouts[k]),
+            "minutes": round(float(weekly_minutes[k]), 1),
+            **{f"{field}_delta": _round(weekly_deltas[field][k], 2) for field in fields},
+        }
+        for k, first in enumerate(week_first)
+    ]
+
+    # Workouts on each measurement day, aligned with `measurements`
+    measured_idx = np.fromiter((_ordinal(d) if d is not None else grid.start - 1 for d in measurement_days),
+                               dtype=np.int64,
+                               count=len(measurement_days)) - grid.start
+    on_grid = (measured_idx >= 0) & (measured_idx < grid.days)
+    timeline_workouts = np.zeros(len(measured_idx), dtype=np.int64)
+    timeline_workouts[on_grid] = volume["count"][measured_idx[on_grid]]
+
+    return {
+        "timeline_workouts": timeline_workouts.tolist(),
+        "metrics": metrics,
+        "weekly": weekly,
+    }
@@ -0,0 +1,392 @@
+"""
+Receipt Rendering Service
+=========================
+Payment receipts are rendered once - when the payment completes, or lazily
+on first download - and stored content-addressed on disk:
+
+    RECEIPT_DIR/<sha256[:2]>/<sha256>.pdf
+
+The path goes into Payment.receipt_pdf_url. Rendering is deterministic
+(reportlab invariant mode), so identical receipts share a file and the
+hash doubles as a strong ETag. Downloads are served from disk with
+ETag / If-None-Match and single-range requests.
+
+A Session before_flush hook clears receipt_pdf_url whenever a column the
+receipt shows (status, amount, refund, ...) changes, so the next download
+renders the receipt again instead of serving the stale one. Only completed
+payments have receipts.
+
+render_receipts_for_month renders a month of receipts on a process pool;
+workers only get plain dicts, render and store, and the parent writes the
+paths back in one pass.
+
+Environment:
+    RECEIPT_DIR       storage directory (default: ./receipts)
+    RECEIPT_WORKERS   process pool size for bulk rendering (default: CPU count)
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.models import Payment, User
+
+BULK_CHUNK_SIZE = 16
+
+# Payment columns printed on the receipt; changing one invalidates it
+RECEIPT_COLUMNS = (
+    "trainee_id", "amount", "provider", "status", "created_at", "receipt_number",
+    "payment_mode", "is_refund", "refund_amount", "refund_reason",
+)
+
+
+def receipt_dir() -> str:
+    return os.getenv("RECEIPT_DIR", "./receipts")
+
+
+def receipt_workers() -> int:
+    try:
+        return max(int(os.getenv("RECEIPT_WORKERS", "0")), 0) or os.cpu_count() or 1
+    except ValueError:
+        return os.cpu_count() or 1
+
+
+# ====================== RENDERING ======================
+
+def receipt_context(payment: Payment, user: Optional[User]) -> Dict:
+    """Everything the receipt shows, as a picklable dict."""
+    return {
+        "payment_id": payment.id,
+        "receipt_number": payment.receipt_number,
+        "created_at": payment.created_at,
+        "status": payment.status or "",
+        "amount": float(payment.amount or 0),
+        "provider": payment.provider,
+        "payment_mode": payment.payment_mode,
+        "refund_amount": float(payment.refund_amount or 0) if payment.is_refund else None,
+        "refund_reason": payment.refund_reason or "",
+        "name": user.name if user else "N/A",
+        "email": user.email if user else "",
+        "phone": (user.phone or "") if user else "",
+    }
+
+
+_styles = None
+
+
+def _receipt_styles():
+    """Paragraph and table styles, built once per process."""
+    global _styles
+    if _styles is None:
+        from reportlab.lib import colors
+        from reportlab.lib.enums import TA_CENTER
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import TableStyle
+
+        base = getSampleStyleSheet()
+        info = TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+        ])
+        _styles = {
+            "title": ParagraphStyle('CustomTitle', parent=base['Heading1'], fontSize=24,
+                                    textColor=colors.HexColor('#1f2937'), spaceAfter=30, alignment=TA_CENTER),
+            "subtitle": base['Heading2'],
+            "heading": ParagraphStyle('CustomHeading', parent=base['Heading2'], fontSize=14,
+                                      textColor=colors.HexColor('#374151'), spaceAfter=12),
+            "footer": ParagraphStyle('Footer', parent=base['Normal'], fontSize=9,
+                                     textColor=colors.HexColor('#6b7280'), alignment=TA_CENTER),
+            "info": info,
+            "details": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#3b82f6')),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 11),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db'))
+            ]),
+            "total": TableStyle([
+                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#10b981')),
+                ('TEXTCOLOR', (0, 0), (-1, -1), colors.whitesmoke),
+                ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, -1), 14),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+            ]),
+        }
+    return _styles
+
+
+def render_receipt_pdf(context: Dict) -> bytes:
+    """Receipt PDF bytes; the same context always renders the same bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer
+
+    styles = _receipt_styles()
+    created_at = context["created_at"]
+    receipt_number = context["receipt_number"]
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18,
+                            title=f"Receipt {receipt_number or context['payment_id']}",
+                            invariant=1)
+
+    # Use Rs. instead of ₹ symbol for better PDF compatibility
+    def format_currency(amount):
+        return f"Rs. {amount:,.2f}"
+
+    elements = [
+        Paragraph("<b>OMKAR FITNESS GYM</b>", styles["title"]),
+        Paragraph("Payment Receipt", styles["subtitle"]),
+        Spacer(1, 0.3*inch),
+    ]
+
+    receipt_table = Table([
+        ['Receipt No:', receipt_number or f'REC-{context["payment_id"]}'],
+        ['Date:', created_at.strftime('%d %b %Y, %I:%M %p') if created_at else 'N/A'],
+        ['Status:', context["status"].upper()],
+    ], colWidths=[2*inch, 4*inch])
+    receipt_table.setStyle(styles["info"])
+    elements += [receipt_table, Spacer(1, 0.3*inch)]
+
+    elements.append(Paragraph("<b>Customer Details</b>", styles["heading"]))
+    customer_table = Table([
+        ['Name:', context["name"]],
+        ['Email:', context["email"]],
+        ['Phone:', context["phone"]],
+    ], colWidths=[2*inch, 4*inch])
+    customer_table.setStyle(styles["info"])
+    elements += [customer_table, Spacer(1, 0.3*inch)]
+
+    elements.append(Paragraph("<b>Payment Details</b>", styles["heading"]))
+    refund = context.get("refund_amount")
+    details = [
+        ['Description', 'Amount'],
+        [context["provider"] or 'Manual by Admin', format_currency(context["amount"])],
+        ['Payment Mode', context["payment_mode"] or 'cash'],
+        ['Transaction ID', receipt_number or f'MAN-{context["payment_id"]}'],
+    ]
+    if refund is not None:
+        details += [
+            ['Refunded', f'- {format_currency(refund)}'],
+            ['Refund Reason', context.get("refund_reason") or 'N/A'],
+        ]
+    details_table = Table(details, colWidths=[4*inch, 2*inch])
+    details_table.setStyle(styles["details"])
+    elements += [details_table, Spacer(1, 0.3*inch)]
+
+    total = ['TOTAL AMOUNT', format_currency(context["amount"])]
+    if refund is not None:
+        total = ['NET AMOUNT', format_currency(context["amount"] - refund)]
+    total_table = Table([total], colWidths=[4*inch, 2*inch])
+    total_table.setStyle(styles["total"])
+    elements += [total_table, Spacer(1, 0.5*inch)]
+
+    footer_text = """
+    <br/><br/>
+    <b>Thank you for choosing Omkar Fitness Gym!</b><br/>
+    This is a computer-generated receipt and does not require a signature.<br/>
+    For queries, contact: support@omkarfitness.com | +91-XXXX-XXXXXX
+    """
+    elements.append(Paragraph(footer_text, styles["footer"]))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+# ====================== STORAGE ======================
+
+def store_receipt(pdf: bytes, directory: Optional[str] = None) -> str:
+    """Write PDF bytes under their sha256 (atomically, once); returns the path."""
+    digest = hashlib.sha256(pdf).hexdigest()
+    folder = os.path.join(directory or receipt_dir(), digest[:2])
+    path = os.path.join(folder, f"{digest}.pdf")
+    if not os.path.exists(path):
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(pdf)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return path
+
+
+def _render_and_store(job: Tuple[Dict, str]) -> Tuple[int, str]:
+    """Process pool worker: (context, directory) -> (payment_id, path)."""
+    context, directory = job
+    return context["payment_id"], store_receipt(render_receipt_pdf(context), directory)
+
+
+def render_receipt(db: Session, payment: Payment) -> str:
+    """Render and store the receipt and set receipt_pdf_url (caller commits)."""
+    user = db.query(User).filter(User.id == payment.trainee_id).first() if payment.trainee_id else None
+    _, path = _render_and_store((receipt_context(payment, user), receipt_dir()))
+    payment.receipt_pdf_url = path
+    return path
+
+
+@event.listens_for(Session, "before_flush")
+def invalidate_stale_receipts(session: Session, flush_context, instances):
+    """Forget the stored receipt of payments whose printed columns changed."""
+    for obj in session.dirty:
+        if not isinstance(obj, Payment) or not obj.receipt_pdf_url:
+            continue
+        attrs = inspect(obj).attrs
+        if attrs.receipt_pdf_url.history.added:
+            continue  # re-rendered in this flush
+        if any(attrs[name].history.added for name in RECEIPT_COLUMNS):
+            obj.receipt_pdf_url = None
+
+
+def receipt_is_stored(payment: Payment) -> bool:
+    return bool(payment.receipt_pdf_url) and os.path.exists(payment.receipt_pdf_url)
+
+
+def ensure_receipt(db: Session, payment: Payment, regenerate: bool = False) -> str:
+    """Path of the stored receipt, rendering (and committing) it when missing."""
+    if receipt_is_stored(payment) and not regenerate:
+        return payment.receipt_pdf_url
+    path = render_receipt(db, payment)
+    db.commit()
+    return path
+
+
+def render_completed_receipt(db: Session, payment: Payment):
+    """Hook for payment completion; a failed render is retried on first download."""
+    try:
+        ensure_receipt(db, payment)
+    except Exception as e:
+        db.rollback()
+        print(f"Receipt rendering failed for payment {payment.id}: {e}")
+
+
+def render_receipts_for_month(db: Session, year: int, month: int, regenerate: bool = False) -> Dict:
+    """Render receipts for the month's completed payments on a process pool."""
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    rows = db.query(Payment, User).outerjoin(User, User.id == Payment.trainee_id).filter(
+        Payment.status == "completed",
+        Payment.created_at >= start,
+        Payment.created_at < end
+    ).order_by(Payment.id).all()
+
+    directory = receipt_dir()
+    jobs = [
+        (receipt_context(payment, user), directory)
+        for payment, user in rows
+        if regenerate or not receipt_is_stored(payment)
+    ]
+
+    paths: Dict[int, str] = {}
+    if jobs:
+        # spawn, not fork: children must not inherit the parent's pooled DB connections
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(receipt_workers(), len(jobs)), mp_context=context) as pool:
+            for payment_id, path in pool.map(_render_and_store, jobs, chunksize=BULK_CHUNK_SIZE):
+                paths[payment_id] = path
+        if paths:
+            db.bulk_update_mappings(Payment, [
+                {"id": payment_id, "receipt_pdf_url": path} for payment_id, path in paths.items()
+            ])
+            db.commit()
+
+    return {
+        "year": year,
+        "month": month,
+        "payments": len(rows),
+        "rendered": len(paths),
+        "skipped": len(rows) - len(jobs),
+    }
+
+
+# ====================== SERVING ======================
+
+class RangeNotSatisfiable(Exception):
+    """A well-formed single byte range that lies outside the file."""
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Single 'bytes=start-end' range -> inclusive (start, end). Returns None
+    for headers to ignore (malformed, other units, several ranges: the full
+    body is sent) and raises RangeNotSatisfiable for a valid range that
+    does not overlap the file.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    start, dash, end = spec.strip().partition("-")
+    start, end = start.strip(), end.strip()
+    if not dash or (start and not start.isdigit()) or (end and not end.isdigit()) or not (start or end):
+        return None
+    if not start:
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    first = int(start)
+    if end and int(end) < first:
+        return None
+    if first >= size:
+        raise RangeNotSatisfiable()
+    last = min(int(end), size - 1) if end else size - 1
+    return first, last
+
+
+def receipt_response(request: Request, path: str, filename: str) -> Response:
+    """Serve a stored receipt with a strong ETag, 304s and byte ranges."""
+    etag = f'"{os.path.splitext(os.path.basename(path))[0]}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        size = os.path.getsize(path)
+        try:
+            byte_range = _parse_range(range_header.strip(), size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            first, last = byte_range
+            with open(path, "rb") as f:
+                f.seek(first)
+                body = f.read(last - first + 1)
+            return Response(
+                body,
+                status_code=206,
+                media_type="application/pdf",
+                headers={**headers, "Content-Range": f"bytes {first}-{last}/{size}"},
+            )
+
+    return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
@@ -0,0 +1,73 @@
+"""
+Background Job Scheduler
+========================
+Minimal in-process scheduler for periodic maintenance jobs (occupancy
+reconciliation, stale attendance sweeps, ...). Each job runs in its own
+daemon thread; failures are logged and the job keeps its schedule.
+
+Jobs are registered at app startup (see main.py) and stopped on shutdown.
+When running several API workers every worker schedules its own copy, so
+jobs must be idempotent (set-based UPDATEs, resets from the database).
+"""
+
+import threading
+from typing import Callable, Dict
+
+_jobs: Dict[str, "PeriodicJob"] = {}
+_lock = threading.Lock()
+
+
+class PeriodicJob:
+    """Calls `fn` every `interval` seconds (optionally once right away)."""
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object], run_immediately: bool = False):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_immediately = run_immediately
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        try:
+            self.fn()
+        except Exception as e:
+            print(f"Scheduled job {self.name} failed: {e}")
+
+    def _run(self):
+        if self.run_immediately:
+            self.run_once()
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+
+def schedule_job(name: str, interval: float, fn: Callable[[], object], run_immediately: bool = False) -> PeriodicJob:
+    """Start a periodic job unless one with the same name is already running."""
+    with _lock:
+        job = _jobs.get(name)
+        if job is None:
+            job = PeriodicJob(name, interval, fn, run_immediately)
+            _jobs[name] = job
+            job.start()
+        return job
+
+
+def stop_job(name: str):
+    with _lock:
+        job = _jobs.pop(name, None)
+    if job:
+        job.stop()
+
+
+def stop_all_jobs():
+    with _lock:
+        jobs = list(_jobs.values())
+        _jobs.clear()
+    for job in jobs:
+        job.stop()
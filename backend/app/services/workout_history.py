@@ -0,0 +1,148 @@
+"""
+Workout History Service
+=======================
+Keyset-paginated and streaming access to a trainee's workout history.
+
+- Pages are ordered by (start_time, id) descending; the cursor is an
+  opaque token holding the last row's key, so each page is an index seek
+  no matter how deep the client has paged.
+- `fields` projects the selected columns (e.g. skip summary_json).
+- iter_ndjson / iter_csv stream rows through a server-side cursor
+  (yield_per), keeping memory flat for any history length.
+"""
+
+import base64
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query, Session
+
+from app.models import Workout
+
+STREAM_BATCH_SIZE = 500
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+# field name -> (column, serializer)
+HISTORY_FIELDS: Dict[str, Tuple] = {
+    "id": (Workout.id, None),
+    "exercise_type": (Workout.exercise_type, None),
+    "start_time": (Workout.start_time, _iso),
+    "end_time": (Workout.end_time, _iso),
+    "duration_minutes": (Workout.duration_minutes, None),
+    "calories_burned": (Workout.calories_burned, None),
+    "total_reps": (Workout.total_reps, None),
+    "avg_accuracy": (Workout.avg_accuracy, None),
+    "summary": (Workout.summary_json, None),
+}
+DEFAULT_FIELDS = list(HISTORY_FIELDS)
+CSV_DEFAULT_FIELDS = [f for f in HISTORY_FIELDS if f != "summary"]
+
+
+def parse_fields(fields: Optional[str], default: Optional[List[str]] = None) -> List[str]:
+    """Comma-separated field list -> validated field names (ValueError on unknown names)."""
+    if not fields:
+        return list(default or DEFAULT_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in HISTORY_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(HISTORY_FIELDS)}")
+    return list(dict.fromkeys(names))
+
+
+def encode_cursor(start_time: datetime, workout_id: int) -> str:
+    raw = f"{start_time.isoformat()}|{workout_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start_time, workout_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(start_time), int(workout_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+
+def history_query(
+    db: Session,
+    trainee_id: int,
+    since: datetime,
+    fields: List[str],
+    cursor: Optional[str] = None,
+) -> Query:
+    """Projected rows, newest first. start_time and id are always selected for the keyset."""
+    columns = [HISTORY_FIELDS[f][0].label(f) for f in fields]
+    columns += [Workout.start_time.label("_key_time"), Workout.id.label("_key_id")]
+
+    query = db.query(*columns).filter(
+        Workout.trainee_id == trainee_id,
+        Workout.start_time >= since
+    )
+    if cursor:
+        key_time, key_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Workout.start_time, Workout.id) < tuple_(key_time, key_id))
+    return query.order_by(Workout.start_time.desc(), Workout.id.desc())
+
+
+def _serializer(fields: List[str]) -> Callable:
+    converters = [(f, HISTORY_FIELDS[f][1]) for f in fields]
+
+    def serialize(row) -> Dict:
+        return {f: convert(getattr(row, f)) if convert else getattr(row, f) for f, convert in converters}
+
+    return serialize
+
+
+def history_page(
+    db: Session,
+    trainee_id: int,
+    since: datetime,
+    fields: List[str],
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Dict:
+    rows = history_query(db, trainee_id, since, fields, cursor).limit(limit + 1).all()
+    serialize = _serializer(fields)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        "workouts": [serialize(row) for row in rows],
+        "next_cursor": encode_cursor(rows[-1]._key_time, rows[-1]._key_id) if has_more else None,
+    }
+
+
+def iter_ndjson(query: Query, fields: List[str]) -> Iterator[str]:
+    serialize = _serializer(fields)
+    for row in query.yield_per(STREAM_BATCH_SIZE):
+        yield json.dumps(serialize(row), default=str) + "\n"
+
+
+def iter_csv(query: Query, fields: List[str]) -> Iterator[str]:
+    serialize = _serializer(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        data = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(fields)
+    for i, row in enumerate(query.yield_per(STREAM_BATCH_SIZE), 1):
+        values = serialize(row)
+        writer.writerow([
+            json.dumps(values[f], default=str) if isinstance(values[f], (dict, list)) else values[f]
+            for f in fields
+        ])
+        if i % STREAM_BATCH_SIZE == 0:
+            yield flush()
+    yield flush()
@@ -0,0 +1,62 @@
+"""
+Workout Aggregation Service
+===========================
+SQL-side workout statistics for a trainee over a time window: totals,
+counts per exercise type and per week, and the most recent workouts.
+Each figure is one grouped query, so the cost does not depend on how
+many workouts the window contains beyond the index range scan.
+"""
+
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+
+from app.models import Workout
+
+RECENT_LIMIT = 10
+
+
+def _window(db: Session, trainee_id: int, since: datetime, *columns):
+    return db.query(*columns).filter(
+        Workout.trainee_id == trainee_id,
+        Workout.start_time >= since
+    )
+
+
+def workout_totals(db: Session, trainee_id: int, since: datetime) -> Dict:
+    row = _window(
+        db, trainee_id, since,
+        func.count(Workout.id).label("count"),
+        func.coalesce(func.sum(Workout.duration_minutes), 0).label("duration"),
+        func.coalesce(func.sum(Workout.calories_burned), 0).label("calories"),
+    ).one()
+    return {"count": int(row.count), "duration": int(row.duration), "calories": float(row.calories)}
+
+
+def workouts_by_type(db: Session, trainee_id: int, since: datetime) -> Dict[str, int]:
+    rows = _window(db, trainee_id, since, Workout.exercise_type, func.count(Workout.id)).filter(
+        Workout.exercise_type.isnot(None),
+        Workout.exercise_type != ""
+    ).group_by(Workout.exercise_type).all()
+    return {exercise_type: count for exercise_type, count in rows}
+
+
+def weekly_workout_counts(db: Session, trainee_id: int, since: datetime) -> List[Dict]:
+    """
+    Counts per week labelled like strftime("%Y-W%W"): Monday-based week of
+    the year, with days before the first Monday in week 00.
+    """
+    year = extract("year", Workout.start_time)
+    week = func.floor((extract("doy", Workout.start_time) + 7 - extract("isodow", Workout.start_time)) / 7)
+    rows = _window(db, trainee_id, since, year.label("year"), week.label("week"), func.count(Workout.id)).group_by(
+        year, week
+    ).order_by(year, week).all()
+    return [{"week": f"{int(y)}-W{int(w):02d}", "count": count} for y, w, count in rows]
+
+
+def recent_workouts(db: Session, trainee_id: int, since: datetime, limit: int = RECENT_LIMIT) -> List[Workout]:
+    return _window(db, trainee_id, since, Workout).order_by(
+        Workout.start_time.desc().nulls_last()
+    ).limit(limit).all()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Latency benchmark for the trainee dashboard query.
+
+Seeds a throwaway trainee with a realistic history in DATABASE_URL, times
+dashboard_snapshot() and reports p50/p99 plus SQL statements per call.
+The seeded rows are removed afterwards.
+
+Target on a local Postgres: 1 statement per call, p50 < 5 ms, p99 < 10 ms
+(the previous implementation issued up to ~107 statements per load).
+
+Usage (from backend/):
+    python -m benchmarks.bench_dashboard [--iterations 500] [--workouts 2000] [--logs 3000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, text  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import Measurement, NutritionLog, User, UserRole, Workout  # noqa: E402
+from app.services.activity_stats import rebuild_activity_stats  # noqa: E402
+from app.services.dashboard import dashboard_snapshot  # noqa: E402
+
+
+def seed(db, workouts: int, logs: int) -> int:
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    user = User(
+        name="Dashboard Bench",
+        email=f"bench-{uuid.uuid4().hex[:8]}@example.com",
+        password_hash="x",
+        role=UserRole.TRAINEE,
+    )
+    db.add(user)
+    db.flush()
+
+    db.bulk_save_objects([
+        Workout(
+            trainee_id=user.id,
+            exercise_type=rng.choice(["squat", "pushup", "lunge"]),
+            start_time=now - timedelta(hours=rng.uniform(0, 24 * 365)),
+            calories_burned=rng.uniform(50, 500),
+            avg_accuracy=rng.uniform(50, 100),
+        )
+        for _ in range(workouts)
+    ])
+    db.bulk_save_objects([
+        NutritionLog(
+            trainee_id=user.id,
+            date=now - timedelta(hours=rng.uniform(0, 24 * 365)),
+            item="meal",
+            calories=rng.uniform(100, 900),
+        )
+        for _ in range(logs)
+    ])
+    db.bulk_save_objects([
+        Measurement(trainee_id=user.id, date=now - timedelta(days=d), weight=80 - d * 0.05)
+        for d in range(0, 365, 7)
+    ])
+    rebuild_activity_stats(db, user.id)
+    db.commit()
+    # Fresh planner statistics, as autovacuum would have in production
+    for table in ("workouts", "nutrition_logs", "measurements", "trainee_activity_stats"):
+        db.execute(text(f"ANALYZE {table}"))
+    db.commit()
+    return user.id
+
+
+def cleanup(db, trainee_id: int):
+    db.query(Workout).filter(Workout.trainee_id == trainee_id).delete()
+    db.query(User).filter(User.id == trainee_id).delete()
+    db.commit()
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trainee dashboard query")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--workouts", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=3000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    trainee_id = seed(db, args.workouts, args.logs)
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        dashboard_snapshot(db, trainee_id)  # warm-up
+        event.listen(engine, "before_cursor_execute", count_statement)
+
+        timings = []
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            dashboard_snapshot(db, trainee_id)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+        print(f"dashboard_snapshot  ({args.workouts} workouts, {args.logs} nutrition logs)")
+        print(f"  statements/call  {len(statements) / args.iterations:.1f}")
+        print(f"  p50              {percentile(timings, 0.50):.3f} ms")
+        print(f"  p99              {percentile(timings, 0.99):.3f} ms")
+    finally:
+        db.rollback()
+        cleanup(db, trainee_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
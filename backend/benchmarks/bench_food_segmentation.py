@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for the food segmentation engine.
+
+Usage (from backend/):
+    python -m benchmarks.bench_food_segmentation [--images 512] [--size 256] [--batch 32]
+"""
+
+import argparse
+import os
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.food_segmentation import (  # noqa: E402
+    load_image_array,
+    segment_food_regions,
+    segment_food_regions_batch,
+)
+
+
+def make_images(count: int, size: int) -> np.ndarray:
+    """Synthetic plates: white background with a few random colour blocks."""
+    rng = np.random.default_rng(42)
+    images = np.full((count, size, size, 3), 245, dtype=np.uint8)
+    for img in images:
+        for _ in range(rng.integers(1, 4)):
+            y, x = rng.integers(0, size // 2, size=2)
+            h, w = rng.integers(size // 6, size // 2, size=2)
+            img[y:y + h, x:x + w] = rng.integers(0, 255, size=3)
+    images += rng.integers(0, 12, size=images.shape, dtype=np.uint8)
+    return images
+
+
+def report(label: str, count: int, seconds: float):
+    print(f"{label:<28} {count / seconds:>9.1f} images/s   {seconds / count * 1000:>7.3f} ms/image")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark food segmentation throughput")
+    parser.add_argument("--images", type=int, default=512)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    images = make_images(args.images, args.size)
+    segment_food_regions(images[0])  # warm-up
+
+    start = time.perf_counter()
+    for img in images:
+        segment_food_regions(img)
+    report("single image", args.images, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(0, args.images, args.batch):
+        segment_food_regions_batch(images[i:i + args.batch])
+    report(f"batched (x{args.batch})", args.images, time.perf_counter() - start)
+
+    encoded = []
+    for img in images:
+        buf = BytesIO()
+        Image.fromarray(img).save(buf, format="JPEG", quality=85)
+        encoded.append(buf.getvalue())
+
+    start = time.perf_counter()
+    for data in encoded:
+        segment_food_regions(load_image_array(data, args.size))
+    report("JPEG decode + single image", args.images, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+Benchmark month-end payroll over a synthetic gym.
+
+Seeds N trainers (mixed salary models), their trainees and a month of PT
+sessions in DATABASE_URL, then compares the per-trainer path (active
+config lookup + calculate_trainer_earnings for each trainer) with
+compute_payroll, reporting wall time and SQL statements. Everything
+seeded is rolled back afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_payroll [--trainers 500] [--trainees 20] [--sessions 30]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event, insert, text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.models import PTSession, Trainee, Trainer, TrainerSalary, User, UserRole  # noqa: E402
+from app.routers.trainer import calculate_trainer_earnings  # noqa: E402
+from app.services.payroll import compute_payroll, month_bounds  # noqa: E402
+
+MODELS = ["fixed", "per_trainee", "per_session", "hybrid"]
+
+
+def seed(db, trainers: int, trainees: int, sessions: int, year: int, month: int):
+    rng = random.Random(11)
+    tag = uuid.uuid4().hex[:8]
+    start, end = month_bounds(year, month)
+    span = (end - start).total_seconds()
+
+    trainer_users = db.execute(insert(User).returning(User.id), [
+        {"name": f"Coach {i}", "email": f"payroll-{tag}-coach{i}@example.com", "password_hash": "x",
+         "role": UserRole.TRAINER}
+        for i in range(trainers)
+    ]).scalars().all()
+    trainer_ids = [uuid.uuid4() for _ in trainer_users]
+    db.execute(insert(Trainer), [{"id": tid, "user_id": uid} for tid, uid in zip(trainer_ids, trainer_users)])
+    db.execute(insert(TrainerSalary), [
+        {"trainer_id": tid, "salary_model": MODELS[i % 4], "base_salary": 20000,
+         "commission_per_trainee": 500, "commission_per_session": 300, "is_active": True}
+        for i, tid in enumerate(trainer_ids)
+    ])
+
+    trainee_users = db.execute(insert(User).returning(User.id), [
+        {"name": f"Member {i}", "email": f"payroll-{tag}-m{i}@example.com", "password_hash": "x",
+         "role": UserRole.TRAINEE}
+        for i in range(trainers * trainees)
+    ]).scalars().all()
+    db.execute(insert(Trainee), [
+        {"user_id": uid, "trainer_id": trainer_ids[i // trainees]} for i, uid in enumerate(trainee_users)
+    ])
+    db.execute(insert(PTSession), [
+        {"trainer_id": trainer_ids[i // sessions], "trainee_id": trainee_users[rng.randrange(len(trainee_users))],
+         "session_date": start + timedelta(seconds=rng.uniform(0, span)),
+         "status": rng.choice(["completed", "completed", "completed", "cancelled"])}
+        for i in range(trainers * sessions)
+    ])
+    for table in ("trainers", "trainees", "trainer_salaries", "pt_sessions"):
+        db.execute(text(f"ANALYZE {table}"))
+
+
+def per_trainer(db, year: int, month: int):
+    results = []
+    for trainer in db.query(Trainer).all():
+        config = db.query(TrainerSalary).filter(
+            TrainerSalary.trainer_id == trainer.id,
+            TrainerSalary.is_active == True
+        ).first()
+        results.append(calculate_trainer_earnings(db, trainer.id, config, month, year))
+    return results
+
+
+def measure(label, fn):
+    statements = []
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    event.remove(engine, "before_cursor_execute", count_statement)
+    print(f"  {label:<16} {elapsed:9.1f} ms  {len(statements):6d} statements")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark month-end trainer payroll")
+    parser.add_argument("--trainers", type=int, default=500)
+    parser.add_argument("--trainees", type=int, default=20, help="trainees per trainer")
+    parser.add_argument("--sessions", type=int, default=30, help="PT sessions per trainer in the month")
+    args = parser.parse_args()
+
+    now = datetime.utcnow()
+    connection = engine.connect()
+    transaction = connection.begin()
+    db = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        seed(db, args.trainers, args.trainees, args.sessions, now.year, now.month)
+        print(f"payroll  ({args.trainers} trainers, {args.trainees} trainees and "
+              f"{args.sessions} sessions each)")
+        old = measure("per trainer", lambda: per_trainer(db, now.year, now.month))
+        new = measure("compute_payroll", lambda: compute_payroll(db, now.year, now.month))
+        old_total = round(sum(entry["total"] for entry in old), 2)
+        new_total = round(sum(entry["total"] for entry in new), 2)
+        print(f"  totals match     {old_total == new_total} ({new_total:,.2f})")
+    finally:
+        db.close()
+        transaction.rollback()
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Benchmark for the workout/progress correlation engine on multi-year histories.
+
+Compares the daily-grid engine against the previous per-measurement rescan
+of all workouts (O(M x W)) used to build the correlation timeline.
+
+Usage (from backend/):
+    python -m benchmarks.bench_progress_correlation [--years 5] [--workouts-per-week 4] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.progress_correlation import correlate_progress  # noqa: E402
+
+Measurement = namedtuple("Measurement", "date weight body_fat muscle_mass")
+WorkoutRow = namedtuple("WorkoutRow", "start_time duration_minutes")
+
+
+def make_history(years: int, workouts_per_week: float):
+    rng = np.random.default_rng(3)
+    start = date(2020, 1, 1)
+    days = years * 365
+    measurements = [
+        Measurement(start + timedelta(days=d), 90 - d * 0.01 + rng.normal(0, 0.3),
+                    25 - d * 0.003, 35 + d * 0.002)
+        for d in range(days)
+    ]
+    count = int(days / 7 * workouts_per_week)
+    offsets = np.sort(rng.uniform(0, days, size=count))
+    workouts = [
+        WorkoutRow(datetime.combine(start, datetime.min.time()) + timedelta(days=float(o)), int(rng.integers(20, 90)))
+        for o in offsets
+    ]
+    return start, start + timedelta(days=days - 1), measurements, workouts
+
+
+def naive_timeline(measurements, workouts):
+    return [len([w for w in workouts if w.start_time and w.start_time.date() == m.date]) for m in measurements]
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark workout/progress correlation")
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--workouts-per-week", type=float, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    start, end, measurements, workouts = make_history(args.years, args.workouts_per_week)
+    print(f"{args.years} years: {len(measurements)} measurements, {len(workouts)} workouts")
+
+    result = correlate_progress(measurements, workouts, start, end)
+    assert result["timeline_workouts"] == naive_timeline(measurements, workouts)
+
+    grid_ms = timed(lambda: correlate_progress(measurements, workouts, start, end), args.repeat)
+    naive_ms = timed(lambda: naive_timeline(measurements, workouts), max(1, args.repeat // 10))
+    print(f"daily-grid engine (full analysis)  {grid_ms:>9.2f} ms")
+    print(f"previous timeline rescan only      {naive_ms:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Load test for /api/payments/verify-payment against the fake Razorpay client.
+
+Creates a throwaway member and plan in DATABASE_URL, opens --orders
+orders through /create-order, then fires --duplicates verifications per
+order (as flaky mobile retries would), --concurrency at a time. Keep
+--concurrency below the DB pool size (5 + 10 overflow): each in-flight
+request holds a pooled connection. Checks that
+every order was finalized exactly once and the membership was extended
+exactly once per order, and reports latency. Seeded rows are removed
+afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.load_verify_payment [--orders 50] [--duplicates 8] [--concurrency 12]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["RAZORPAY_FAKE"] = "true"
+
+import httpx  # noqa: E402
+
+from app.auth_util import create_access_token  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import (  # noqa: E402
+    Membership, MembershipPlan, Payment, PaymentIdempotencyKey, Trainee, User, UserRole,
+)
+from app.routers.payments import razorpay_client  # noqa: E402
+from app.services.payment_finalization import DAYS_PER_PLAN_MONTH  # noqa: E402
+
+
+def seed(db):
+    user = User(name="Load Member", email=f"load-{uuid.uuid4().hex[:8]}@example.com",
+                password_hash="x", role=UserRole.TRAINEE, is_active=True)
+    plan = MembershipPlan(name="Load Plan", membership_type="basic", price=999, duration_months=1)
+    db.add_all([user, plan])
+    db.flush()
+    db.add(Trainee(user_id=user.id))
+    db.commit()
+    return user.id, plan.id
+
+
+def cleanup(db, user_id: int, plan_id: int):
+    db.query(PaymentIdempotencyKey).filter(PaymentIdempotencyKey.user_id == user_id).delete()
+    db.query(Membership).filter(Membership.trainee_id == user_id).delete()
+    db.query(Payment).filter(Payment.trainee_id == user_id).delete()
+    db.query(Trainee).filter(Trainee.user_id == user_id).delete()
+    db.query(User).filter(User.id == user_id).delete()
+    db.query(MembershipPlan).filter(MembershipPlan.id == plan_id).delete()
+    db.commit()
+
+
+def percentile(samples, q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(user_id: int, plan_id: int, orders: int, duplicates: int, concurrency: int):
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load", headers=headers, timeout=60) as client:
+        checkouts = []
+        for _ in range(orders):
+            order = (await client.post("/api/payments/create-order", json={"amount": 0, "plan_id": plan_id})).json()
+            checkouts.append({**razorpay_client.pay(order["order_id"]), "plan_id": plan_id})
+
+        timings = []
+        slots = asyncio.Semaphore(concurrency)
+
+        async def verify(body):
+            async with slots:
+                start = time.perf_counter()
+                response = await client.post("/api/payments/verify-payment", json=body)
+                timings.append((time.perf_counter() - start) * 1000)
+                return response
+
+        start = time.perf_counter()
+        # Duplicates of an order are adjacent, so they are in flight together
+        responses = await asyncio.gather(*[verify(body) for body in checkouts for _ in range(duplicates)])
+        elapsed = time.perf_counter() - start
+    return responses, timings, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent duplicate payment verifications")
+    parser.add_argument("--orders", type=int, default=50)
+    parser.add_argument("--duplicates", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=12)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    user_id, plan_id = seed(db)
+    try:
+        responses, timings, elapsed = asyncio.run(run(user_id, plan_id, args.orders, args.duplicates, args.concurrency))
+        statuses = [r.status_code for r in responses]
+        bodies = [r.json() for r in responses if r.status_code == 200]
+        fresh = sum(1 for b in bodies if not b["replayed"])
+
+        db.expire_all()
+        memberships = db.query(Membership).filter(Membership.trainee_id == user_id).all()
+        completed = db.query(Payment).filter(Payment.trainee_id == user_id, Payment.status == "completed").count()
+        days = (memberships[0].end_date - memberships[0].start_date).days if len(memberships) == 1 else None
+        expected_days = args.orders * DAYS_PER_PLAN_MONTH
+
+        print(f"verify-payment  ({args.orders} orders x {args.duplicates} duplicates, {args.concurrency} in flight)")
+        print(f"  requests         {len(responses)} in {elapsed:.2f} s ({len(responses) / elapsed:.0f} req/s)")
+        print(f"  p50 / p99        {percentile(timings, 0.50):.1f} / {percentile(timings, 0.99):.1f} ms")
+        print(f"  HTTP 200         {statuses.count(200)} / {len(statuses)}")
+        print(f"  finalized        {fresh} fresh, {len(bodies) - fresh} replayed, {completed} payments completed")
+        print(f"  memberships      {len(memberships)} row(s), {days} days (expected 1 row, {expected_days} days)")
+        ok = fresh == args.orders and completed == args.orders and len(memberships) == 1 and days == expected_days
+        print(f"  exactly-once     {'OK' if ok else 'FAILED'}")
+        if not ok:
+            sys.exit(1)
+    finally:
+        db.rollback()
+        cleanup(db, user_id, plan_id)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
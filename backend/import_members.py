@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Bulk-import trainees from a CSV (see app/services/member_import.py)
+
+Usage (from backend/):
+    python import_members.py members.csv [--report report.csv] [--dry-run]
+"""
+
+import argparse
+import sys
+
+from app.database import SessionLocal
+from app.services.member_import import import_members, report_csv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import trainees from a CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("--report", help="write the per-row report (CSV) here")
+    parser.add_argument("--dry-run", action="store_true", help="validate only, create nothing")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.csv_path, encoding="utf-8-sig", newline="") as csv_file:
+            report = import_members(db, csv_file, dry_run=args.dry_run)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    verb = "validated" if args.dry_run else "created"
+    count = report["valid"] if args.dry_run else report["created"]
+    print(f"✅ {count} of {report['total_rows']} member(s) {verb}, {report['failed']} failed")
+    for error in report["errors"][:20]:
+        print(f"   row {error['row']} ({error['email']}): {'; '.join(error['errors'])}")
+    if len(report["errors"]) > 20:
+        print(f"   ... {len(report['errors']) - 20} more")
+    if args.report:
+        with open(args.report, "w", newline="") as out:
+            out.write(report_csv(report))
+        print(f"Report written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
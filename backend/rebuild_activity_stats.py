@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+"""Rebuild trainee activity stats (streaks, totals) from the workouts table"""
+
+from app.database import SessionLocal
+from app.services.activity_stats import rebuild_all_activity_stats
+
+def rebuild():
+    db = SessionLocal()
+    try:
+        print("Rebuilding trainee activity stats...")
+        count = rebuild_all_activity_stats(db)
+        print(f"✅ Activity stats rebuilt for {count} trainees!")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild()
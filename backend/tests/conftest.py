@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+# Database tests run only against a dedicated database named by
+# TEST_DATABASE_URL. The app builds its engine from DATABASE_URL when
+# app.database is first imported, so point it at the test database before
+# that happens; services that open their own sessions then use it too.
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from sqlalchemy import inspect  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from sqlalchemy.schema import CreateIndex, CreateTable  # noqa: E402
+
+from app import models  # noqa: E402,F401  (registers every table on Base.metadata)
+from app.database import Base, engine  # noqa: E402
+
+
+def _valid_foreign_keys(table) -> list:
+    """
+    Foreign key constraints whose columns match the referenced column's type.
+    trainer_documents / trainer_leaves keep String(36) trainer ids against the
+    UUID trainers.id; PostgreSQL refuses to create those constraints.
+    """
+    return [
+        constraint for constraint in table.foreign_key_constraints
+        if all(type(fk.parent.type) is type(fk.column.type) for fk in constraint.elements)
+    ]
+
+
+@pytest.fixture(scope="session")
+def schema():
+    """Create the schema on the test database (tables that already exist are kept)."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    with engine.begin() as connection:
+        tables = Base.metadata.sorted_tables
+        Base.metadata.create_all(connection, tables=[
+            table for table in tables
+            if len(_valid_foreign_keys(table)) == len(table.foreign_key_constraints)
+        ])
+        # The rest are created without the foreign keys PostgreSQL would refuse
+        existing = set(inspect(connection).get_table_names())
+        for table in tables:
+            if table.name not in existing:
+                connection.execute(CreateTable(table, include_foreign_key_constraints=_valid_foreign_keys(table)))
+                for index in table.indexes:
+                    connection.execute(CreateIndex(index))
+    return engine
+
+
+@pytest.fixture
+def db(schema):
+    """Session inside an outer transaction that is rolled back afterwards."""
+    connection = schema.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
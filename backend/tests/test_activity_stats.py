@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import date, datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import TraineeActivityStats, User, UserRole, Workout
+from app.services.activity_stats import compute_streaks, rebuild_activity_stats, record_workout, remove_workout
+
+
+def test_compute_streaks_tracks_current_and_best_runs():
+    days = [date(2024, 1, d) for d in (1, 2, 3, 5, 6)]
+    assert compute_streaks(days) == (2, 3)
+
+
+def test_compute_streaks_empty_history():
+    assert compute_streaks([]) == (0, 0)
+
+
+def _snapshot(stats):
+    return (stats.current_streak, stats.best_streak, stats.last_active_date,
+            stats.total_workouts, stats.total_active_days)
+
+
+def _member(db, email):
+    user = User(name=email.split("@")[0], email=email, password_hash="x", role=UserRole.TRAINEE)
+    db.add(user)
+    db.flush()
+    return user.id
+
+
+def test_incremental_updates_agree_with_a_rebuild(db):
+    member_id = _member(db, "activity-steps@example.com")
+    workouts = []
+
+    def add(day, hour=9):
+        workout = Workout(trainee_id=member_id, exercise_type="run", start_time=datetime(2024, 3, day, hour))
+        db.add(workout)
+        workouts.append(workout)
+        return record_workout(db, member_id, workout.start_time)
+
+    def remove(workout):
+        db.delete(workout)
+        return remove_workout(db, member_id, workout)
+
+    steps = [
+        (lambda: add(1), (1, 1, date(2024, 3, 1), 1, 1)),
+        (lambda: add(2), (2, 2, date(2024, 3, 2), 2, 2)),
+        (lambda: add(2, 18), (2, 2, date(2024, 3, 2), 3, 2)),
+        (lambda: add(4), (1, 2, date(2024, 3, 4), 4, 3)),
+        (lambda: add(3), (4, 4, date(2024, 3, 4), 5, 4)),  # backdated, joins both runs
+        (lambda: remove(workouts[2]), (4, 4, date(2024, 3, 4), 4, 4)),  # day 2 still has a workout
+        (lambda: remove(workouts[1]), (2, 2, date(2024, 3, 4), 3, 3)),  # day 2 disappears, run splits
+        (lambda: remove(workouts[3]), (1, 1, date(2024, 3, 3), 2, 2)),
+    ]
+    for step, expected in steps:
+        stats = step()
+        assert _snapshot(stats) == expected
+        assert _snapshot(rebuild_activity_stats(db, member_id)) == expected
+
+
+def test_rebuild_creates_the_row_from_history(db):
+    member_id = _member(db, "activity-rebuild@example.com")
+    db.add_all([Workout(trainee_id=member_id, exercise_type="row", start_time=datetime(2024, 5, day))
+                for day in (10, 11, 11, 20)])
+    db.flush()
+
+    stats = rebuild_activity_stats(db, member_id)
+    assert _snapshot(stats) == (1, 2, date(2024, 5, 20), 4, 3)
+    assert db.query(TraineeActivityStats).filter(TraineeActivityStats.trainee_id == member_id).count() == 1
+
+
+def test_concurrent_first_workouts_share_one_row(schema):
+    setup = Session(bind=schema)
+    member_id = _member(setup, "activity-race@example.com")
+    setup.commit()
+
+    first, second = Session(bind=schema), Session(bind=schema)
+    errors = []
+
+    def log_workout(session, day):
+        try:
+            session.add(Workout(trainee_id=member_id, exercise_type="run", start_time=datetime(2024, 6, day)))
+            record_workout(session, member_id, datetime(2024, 6, day))
+            session.commit()
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    try:
+        first.add(Workout(trainee_id=member_id, exercise_type="run", start_time=datetime(2024, 6, 1)))
+        record_workout(first, member_id, datetime(2024, 6, 1))  # row inserted, not committed yet
+
+        writer = threading.Thread(target=log_workout, args=(second, 2))
+        writer.start()
+        time.sleep(0.3)
+        assert writer.is_alive()  # its INSERT waits on the uncommitted row
+        first.commit()
+        writer.join(10)
+        assert not writer.is_alive() and errors == []
+
+        stats = setup.query(TraineeActivityStats).filter(TraineeActivityStats.trainee_id == member_id).one()
+        assert _snapshot(stats) == (2, 2, date(2024, 6, 2), 2, 2)
+    finally:
+        first.close()
+        second.close()
+        setup.rollback()
+        setup.query(User).filter(User.id == member_id).delete(synchronize_session=False)
+        setup.commit()
+        setup.close()
@@ -0,0 +1,61 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from app.database import engine
+from app.models import Attendance, Trainee, Trainer, User, UserRole
+from app.services.attendance_stats import trainee_attendance_summary
+
+
+def _seed(db, trainees: int):
+    trainer_user = User(name="Coach", email=f"coach-{trainees}@example.com", password_hash="x", role=UserRole.TRAINER)
+    db.add(trainer_user)
+    db.flush()
+    trainer = Trainer(user_id=trainer_user.id)
+    db.add(trainer)
+    db.flush()
+
+    now = datetime.now(timezone.utc)
+    for i in range(trainees):
+        user = User(name=f"T{i}", email=f"t{trainees}-{i}@example.com", password_hash="x", role=UserRole.TRAINEE)
+        db.add(user)
+        db.flush()
+        db.add(Trainee(user_id=user.id, trainer_id=trainer.id))
+        for d in range(i % 4):
+            db.add(Attendance(trainee_id=user.id, check_in_time=now - timedelta(days=d * 10)))
+    db.flush()
+    return trainer
+
+
+def _count_queries(db, fn):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return result, len(statements)
+
+
+def test_attendance_summary_uses_constant_query_count(db):
+    small = _seed(db, 2)
+    large = _seed(db, 25)
+
+    small_summary, small_queries = _count_queries(db, lambda: trainee_attendance_summary(db, small.id))
+    large_summary, large_queries = _count_queries(db, lambda: trainee_attendance_summary(db, large.id))
+
+    assert len(small_summary) == 2 and len(large_summary) == 25
+    assert small_queries == large_queries == 1
+
+
+def test_attendance_summary_window_keeps_trainees_without_check_ins(db):
+    trainer = _seed(db, 4)
+    summary = trainee_attendance_summary(db, trainer.id, start_date=date.today() - timedelta(days=5))
+
+    assert len(summary) == 4
+    assert sorted(s["total_days"] for s in summary.values()) == [0, 1, 1, 1]
+    assert all(s["percentage"] in (0, 100.0) for s in summary.values())
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models import Attendance, User, UserRole
+from app.services.attendance_sweeper import close_stale_attendance, insert_open_visit
+
+
+def _trainee(db, email):
+    user = User(name="Sweep", email=email, password_hash="x", role=UserRole.TRAINEE)
+    db.add(user)
+    db.flush()
+    return user
+
+
+def test_close_stale_attendance_only_closes_previous_days(db):
+    user = _trainee(db, "sweep-a@example.com")
+    now = datetime.now(timezone.utc)
+    stale = Attendance(trainee_id=user.id, check_in_time=now - timedelta(days=2), check_in_method="app")
+    current = Attendance(trainee_id=user.id, check_in_time=now, check_in_method="trainer_manual")
+    db.add_all([stale, current])
+    db.flush()
+
+    assert close_stale_attendance(db, trainee_id=user.id) == 1
+    db.expire_all()
+    assert stale.check_out_time is not None
+    assert stale.check_out_time.date() == stale.check_in_time.date()
+    assert stale.duration_minutes == 60
+    assert current.check_out_time is None
+
+
+def test_insert_open_visit_is_single_per_trainee(db):
+    user = _trainee(db, "sweep-b@example.com")
+    first = insert_open_visit(db, user.id, datetime.utcnow())
+    assert first is not None
+    assert insert_open_visit(db, user.id, datetime.utcnow()) is None
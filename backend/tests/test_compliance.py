@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Measurement, Trainee, Trainer, User, UserRole, Workout
+from app.services import compliance
+from app.services.compliance import build_compliance_overview, cached_compliance_overview, clear_compliance_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_compliance_cache()
+    yield
+    clear_compliance_cache()
+
+
+def _trainee(db, trainer, email, joined_days_ago, measurements=0, workouts=0):
+    now = datetime.now(timezone.utc)
+    user = User(name=email.split("@")[0], email=email, password_hash="x", role=UserRole.TRAINEE,
+                created_at=now - timedelta(days=joined_days_ago))
+    db.add(user)
+    db.flush()
+    trainee = Trainee(user_id=user.id, trainer_id=trainer.id)
+    db.add(trainee)
+    db.add_all([Measurement(trainee_id=user.id, weight=70, created_at=now - timedelta(days=i))
+                for i in range(measurements)])
+    db.add_all([Workout(trainee_id=user.id, exercise_type="squat") for _ in range(workouts)])
+    db.flush()
+    return trainee
+
+
+def test_overview_aggregates_in_three_queries(db):
+    coaches = [User(name=f"Coach {i}", email=f"compliance-coach-{i}@example.com", password_hash="x",
+                    role=UserRole.TRAINER) for i in range(2)]
+    db.add_all(coaches)
+    db.flush()
+    trainer, other_trainer = (Trainer(user_id=coach.id) for coach in coaches)
+    db.add_all([trainer, other_trainer])
+    db.flush()
+    # 4 measurements over 4 weeks -> 100%; 5 over 10 weeks -> 50%; none -> 0%
+    steady = _trainee(db, trainer, "compliance-steady@example.com", 28, measurements=4, workouts=2)
+    lapsing = _trainee(db, trainer, "compliance-lapsing@example.com", 70, measurements=5, workouts=3)
+    idle = _trainee(db, trainer, "compliance-idle@example.com", 10)
+    _trainee(db, other_trainer, "compliance-elsewhere@example.com", 7, measurements=1)
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.connection(), "before_cursor_execute", listener)
+    try:
+        overview = build_compliance_overview(db, trainer.id)
+    finally:
+        event.remove(db.connection(), "before_cursor_execute", listener)
+
+    assert len(statements) == 3
+    rows = {row["trainee_id"]: row for row in overview["compliance_data"]}
+    assert list(rows) == [steady.id, lapsing.id, idle.id]
+    assert (rows[steady.id]["measurements_logged"], rows[steady.id]["workouts_completed"]) == (4, 2)
+    assert (rows[steady.id]["adherence_rate"], rows[steady.id]["status"]) == (100, "Active")
+    assert (rows[lapsing.id]["adherence_rate"], rows[lapsing.id]["status"]) == (50, "At Risk")
+    assert (rows[idle.id]["adherence_rate"], rows[idle.id]["status"]) == (0, "Inactive")
+    assert rows[idle.id]["last_measurement"] is None and rows[steady.id]["last_measurement"]
+    assert overview["average_adherence"] == 50
+
+
+def test_cache_expires_and_refresh_recomputes(monkeypatch):
+    clock = [1000.0]
+    builds = []
+
+    def build(db, trainer_id=None):
+        builds.append(trainer_id)
+        return {"build": len(builds)}
+
+    monkeypatch.setattr(compliance, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(compliance, "build_compliance_overview", build)
+
+    assert cached_compliance_overview(None, "t1") == {"build": 1}
+    clock[0] += compliance.COMPLIANCE_CACHE_SECONDS - 1
+    assert cached_compliance_overview(None, "t1") == {"build": 1}
+    assert cached_compliance_overview(None, "t2") == {"build": 2}  # cached per trainer
+    assert cached_compliance_overview(None, "t1", refresh=True) == {"build": 3}
+
+    clock[0] += compliance.COMPLIANCE_CACHE_SECONDS
+    assert cached_compliance_overview(None, "t1") == {"build": 4}
+    assert builds == ["t1", "t2", "t1", "t1"]
+
+    clear_compliance_cache()
+    assert cached_compliance_overview(None, "t2") == {"build": 5}
@@ -0,0 +1,83 @@
+from datetime import date, datetime, timezone
+
+from app.models import (
+    Attendance, FinanceDailyTotal, Membership, Message, Payment, Trainee, Trainer, TrainerDocument, TrainerLeave,
+    User, UserRole, Workout,
+)
+from app.services.erasure import erase_users
+from app.services.finance_ledger import ledger_day
+
+
+def _ledger_amount(db, day):
+    return float(db.query(FinanceDailyTotal.amount).filter(
+        FinanceDailyTotal.day == day, FinanceDailyTotal.status == "completed",
+        FinanceDailyTotal.payment_mode == "erasure-test", FinanceDailyTotal.provider == "cash",
+    ).scalar() or 0)
+
+
+def test_erase_users_cascades_and_adjusts_ledger(db):
+    now = datetime.now(timezone.utc)
+    admin = User(name="Admin", email="erasure-admin@example.com", password_hash="x", role=UserRole.ADMIN)
+    coach = User(name="Coach", email="erasure-coach@example.com", password_hash="x", role=UserRole.TRAINER)
+    member = User(name="Member", email="erasure-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add_all([admin, coach, member])
+    db.flush()
+    trainer = Trainer(user_id=coach.id)
+    db.add(trainer)
+    db.flush()
+    db.add_all([
+        Trainee(user_id=member.id, trainer_id=trainer.id),
+        Workout(trainee_id=member.id, exercise_type="run", duration_minutes=30, calories_burned=300),
+        Attendance(trainee_id=member.id, check_in_time=now),
+        Membership(trainee_id=member.id, membership_type="erasure", price=100, status="active",
+                   start_date=now, end_date=now),
+        Message(sender_id=admin.id, receiver_id=member.id, message="hi"),
+        Payment(trainee_id=member.id, amount=250, status="completed", payment_mode="erasure-test", provider="cash",
+                created_at=now),
+    ])
+    db.commit()
+    assert _ledger_amount(db, ledger_day(now)) == 250
+
+    admin_id, coach_id, member_id = admin.id, coach.id, member.id
+    result = erase_users(db, [member_id, coach_id, admin_id, 987654321])
+    db.commit()
+
+    assert result == {
+        "deleted": sorted([member_id, coach_id]),
+        "not_found": [987654321],
+        "skipped_admins": [admin_id],
+    }
+    for model, column in ((Trainee, Trainee.user_id), (Workout, Workout.trainee_id),
+                          (Attendance, Attendance.trainee_id), (Membership, Membership.trainee_id),
+                          (Message, Message.receiver_id), (Payment, Payment.trainee_id),
+                          (Trainer, Trainer.user_id)):
+        assert db.query(model).filter(column.in_([member_id, coach_id])).count() == 0
+    assert db.query(User).filter(User.id == admin_id).count() == 1
+    assert _ledger_amount(db, ledger_day(now)) == 0
+
+
+def test_erasing_a_trainer_removes_their_documents_and_leaves(db):
+    coaches = [User(name=f"Coach {i}", email=f"erasure-doc-coach-{i}@example.com", password_hash="x",
+                    role=UserRole.TRAINER) for i in range(2)]
+    db.add_all(coaches)
+    db.flush()
+    trainers = [Trainer(user_id=coach.id) for coach in coaches]
+    db.add_all(trainers)
+    db.flush()
+    for trainer in trainers:
+        db.add_all([
+            TrainerDocument(trainer_id=str(trainer.id), document_type="certificate", document_name="cert.pdf",
+                            file_path="uploads/cert.pdf"),
+            TrainerLeave(trainer_id=str(trainer.id), leave_type="sick", start_date=date(2024, 5, 1),
+                         end_date=date(2024, 5, 2), reason="flu"),
+        ])
+    db.commit()
+
+    coach_id = coaches[0].id
+    erased, kept = (str(trainer.id) for trainer in trainers)
+    assert erase_users(db, [coach_id])["deleted"] == [coach_id]
+    db.commit()
+
+    for model in (TrainerDocument, TrainerLeave):
+        assert db.query(model).filter(model.trainer_id == erased).count() == 0
+        assert db.query(model).filter(model.trainer_id == kept).count() == 1
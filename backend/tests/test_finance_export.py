@@ -0,0 +1,53 @@
+import csv
+import io
+import zipfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from xml.etree import ElementTree as ET
+
+from app.services.finance_export import EXPORT_COLUMNS, iter_csv, iter_xlsx
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+class RowsQuery:
+    """Stands in for a Query: export writers only call yield_per()."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def yield_per(self, size):
+        return iter(self.rows)
+
+
+def _rows(n):
+    return [
+        SimpleNamespace(
+            id=i, created_at=datetime(2026, 1, 1, tzinfo=timezone.utc), receipt_number=f"R<{i}>&",
+            trainee_email="a@example.com", amount=10.5, status="completed", payment_mode="cash",
+            provider="cash", is_refund=False, refund_amount=None,
+        )
+        for i in range(n)
+    ]
+
+
+def test_csv_export():
+    text = "".join(iter_csv(RowsQuery(_rows(3))))
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == 4
+    assert rows[1][2] == "R<0>&"
+
+
+def test_xlsx_export_is_a_valid_workbook():
+    data = b"".join(iter_xlsx(RowsQuery(_rows(5))))
+    archive = zipfile.ZipFile(io.BytesIO(data))
+    assert archive.testzip() is None
+    assert "xl/workbook.xml" in archive.namelist()
+
+    sheet = ET.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+    rows = sheet.findall("x:sheetData/x:row", NS)
+    assert len(rows) == 6
+    first = rows[1].findall("x:c", NS)
+    assert first[0].find("x:v", NS).text == "0"
+    assert first[2].find("x:is/x:t", NS).text == "R<0>&"
@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.models import FinanceDailyTotal, Payment, User, UserRole
+from app.services.finance_ledger import finance_summary, reconcile_finance_ledger
+
+DAY = date(2001, 3, 14)
+
+
+def ledger_rows(db):
+    return {
+        (row.status, row.payment_mode): (row.payment_count, row.amount, row.refund_count, row.refund_amount)
+        for row in db.query(FinanceDailyTotal).filter(FinanceDailyTotal.day == DAY)
+        if row.payment_count
+    }
+
+
+def test_ledger_follows_payment_changes(db):
+    member = User(name="Ledger", email="ledger-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+    at = datetime(2001, 3, 14, 9, 30, tzinfo=timezone.utc)
+    cash = Payment(trainee_id=member.id, amount=500, provider="manual", payment_mode="cash", created_at=at)
+    card = Payment(trainee_id=member.id, amount=1200, provider="razorpay", payment_mode="card",
+                   status="completed", created_at=at)
+    db.add_all([cash, card])
+    db.flush()
+    assert ledger_rows(db) == {("pending", "cash"): (1, 500, 0, 0), ("completed", "card"): (1, 1200, 0, 0)}
+
+    cash.status = "completed"
+    card.refund_amount = 200
+    card.is_refund = True
+    db.flush()
+    assert ledger_rows(db) == {("completed", "cash"): (1, 500, 0, 0), ("completed", "card"): (1, 1200, 1, 200)}
+
+    db.delete(cash)
+    db.flush()
+    assert ledger_rows(db) == {("completed", "card"): (1, 1200, 1, 200)}
+
+    summary = finance_summary(db, today=DAY)
+    assert summary["today_revenue"] == 1200
+
+
+def test_reconcile_repairs_writes_that_bypass_the_session(db):
+    member = User(name="Drift", email="ledger-drift@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+    payment = Payment(trainee_id=member.id, amount=800, provider="manual", payment_mode="upi",
+                      status="completed", created_at=datetime(2001, 3, 14, 12, 0, tzinfo=timezone.utc))
+    db.add(payment)
+    db.flush()
+
+    db.query(Payment).filter(Payment.id == payment.id).update({"amount": 900}, synchronize_session=False)
+    result = reconcile_finance_ledger(db, repair=True)
+    drifted = [d for d in result["details"] if d["day"] == DAY.isoformat()]
+    assert len(drifted) == 1 and drifted[0]["actual"]["amount"] == 900
+    assert ledger_rows(db) == {("completed", "upi"): (1, 900, 0, 0)}
+
+    assert not [d for d in reconcile_finance_ledger(db, repair=False)["details"] if d["day"] == DAY.isoformat()]
+
+
+def test_reconcile_window_only_checks_recent_days(db):
+    member = User(name="Window", email="ledger-window@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+    payment = Payment(trainee_id=member.id, amount=300, provider="manual", payment_mode="window",
+                      status="completed", created_at=datetime(2001, 3, 14, 23, 30, tzinfo=timezone.utc))
+    db.add(payment)
+    db.flush()
+    db.query(Payment).filter(Payment.id == payment.id).update({"amount": 350}, synchronize_session=False)
+
+    def drifted(**window):
+        result = reconcile_finance_ledger(db, repair=False, **window)
+        return [d for d in result["details"] if d["payment_mode"] == "window"]
+
+    assert drifted(days=3, today=date(2001, 3, 17)) == []  # 15th to 17th
+    assert len(drifted(days=3, today=date(2001, 3, 16))) == 1  # 14th to 16th
+    assert len(drifted()) == 1
+
+
+def test_concurrent_edits_of_one_payment_keep_the_ledger_exact(schema):
+    day = date(2001, 3, 15)
+    setup = Session(bind=schema)
+    member = User(name="Race", email="ledger-race@example.com", password_hash="x", role=UserRole.TRAINEE)
+    setup.add(member)
+    setup.flush()
+    payment = Payment(trainee_id=member.id, amount=100, provider="manual", payment_mode="race",
+                      created_at=datetime(2001, 3, 15, 8, 0, tzinfo=timezone.utc))
+    setup.add(payment)
+    setup.commit()
+    member_id, payment_id = member.id, payment.id
+
+    first, second = Session(bind=schema), Session(bind=schema)
+    try:
+        first.get(Payment, payment_id).status = "completed"
+        first.flush()  # holds the payment row lock until commit
+
+        stale = second.get(Payment, payment_id)  # still reads status "pending"
+        stale.amount = 300
+        writer = threading.Thread(target=second.commit)
+        writer.start()
+        time.sleep(0.3)
+        assert writer.is_alive()  # waiting in before_flush for the row lock
+        first.commit()
+        writer.join(10)
+        assert not writer.is_alive()
+
+        rows = {
+            (row.status, row.payment_count, row.amount)
+            for row in setup.query(FinanceDailyTotal).filter(
+                FinanceDailyTotal.day == day, FinanceDailyTotal.payment_mode == "race"
+            )
+            if row.payment_count or row.amount
+        }
+        assert rows == {("completed", 1, 300)}
+    finally:
+        first.close()
+        second.close()
+        setup.rollback()
+        setup.query(Payment).filter(Payment.trainee_id == member_id).delete(synchronize_session=False)
+        setup.query(User).filter(User.id == member_id).delete(synchronize_session=False)
+        setup.query(FinanceDailyTotal).filter(FinanceDailyTotal.day == day).delete(synchronize_session=False)
+        setup.commit()
+        setup.close()
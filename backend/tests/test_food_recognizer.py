@@ -0,0 +1,47 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.services.food_recognizer import FoodRecognizer, HeuristicRecognizer, MicroBatcher, create_recognizer
+
+
+class CountingRecognizer(HeuristicRecognizer):
+    def __init__(self):
+        self.batch_sizes = []
+
+    def recognize_batch(self, images):
+        self.batch_sizes.append(len(images))
+        return super().recognize_batch(images)
+
+
+def _green_plate():
+    img = np.full((256, 256, 3), 248, dtype=np.uint8)
+    img[40:200, 40:200] = (40, 140, 50)
+    return img
+
+
+def test_falls_back_to_heuristics_without_model(monkeypatch):
+    monkeypatch.setenv("FOOD_MODEL_PATH", "/nonexistent/food.onnx")
+    assert isinstance(create_recognizer(), HeuristicRecognizer)
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    recognizer = CountingRecognizer()
+    batcher = MicroBatcher(recognizer, window_ms=50, max_batch=8)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        futures = [pool.submit(lambda: batcher.submit(_green_plate()).result(timeout=5)) for _ in range(16)]
+        results = [f.result() for f in futures]
+
+    assert sum(recognizer.batch_sizes) == 16
+    assert len(recognizer.batch_sizes) < 16
+    assert all(r[0]["food"] == "broccoli" for r in results)
+
+
+def test_recognizer_without_recognize_batch_fails_at_construction():
+    class Unfinished(FoodRecognizer):
+        name = "unfinished"
+
+    with pytest.raises(TypeError):
+        Unfinished()
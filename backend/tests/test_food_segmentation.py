@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.services.food_segmentation import (
+    rgb_to_hsv,
+    segment_food_regions,
+    segment_food_regions_batch,
+)
+
+
+def _plate(*patches):
+    """White 256px plate with solid colour patches: (rows, cols, rgb)."""
+    img = np.full((256, 256, 3), 248, dtype=np.uint8)
+    for rows, cols, rgb in patches:
+        img[rows, cols] = rgb
+    return img
+
+
+def test_rgb_to_hsv_primaries():
+    hsv = rgb_to_hsv(np.array([[255, 0, 0], [0, 255, 0], [0, 0, 255], [128, 128, 128]]))
+    assert np.allclose(hsv[:, 0], [0, 120, 240, 0])
+    assert np.allclose(hsv[:, 1], [1, 1, 1, 0])
+    assert np.allclose(hsv[3, 2], 128 / 255)
+
+
+def test_two_regions_split_by_area():
+    img = _plate(
+        (slice(40, 200), slice(30, 128), (40, 140, 50)),
+        (slice(40, 200), slice(128, 220), (220, 40, 30)),
+    )
+    regions = segment_food_regions(img)
+    foods = {r["food"]: r for r in regions}
+
+    assert set(foods) == {"broccoli", "tomato"}
+    assert abs(foods["broccoli"]["area_fraction"] - 0.52) < 0.05
+    assert abs(foods["tomato"]["area_fraction"] - 0.48) < 0.05
+    assert foods["broccoli"]["portion_grams"] > foods["tomato"]["portion_grams"]
+
+
+def test_empty_plate_has_no_regions():
+    assert segment_food_regions(_plate()) == []
+
+
+def test_batch_matches_single_image():
+    images = np.stack([
+        _plate((slice(50, 210), slice(50, 210), (200, 140, 80))),
+        _plate((slice(60, 200), slice(60, 200), (225, 215, 195))),
+    ])
+    batch = segment_food_regions_batch(images)
+    assert [r["food"] for r in batch[0]] == [r["food"] for r in segment_food_regions(images[0])]
+    assert [r["food"] for r in batch[1]] == ["rice"]
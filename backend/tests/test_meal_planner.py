@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.meal_planner import PLANNER_FOODS, plan_meals, suggest_meals
+
+GOALS = {"calories": 2400, "protein": 160, "carbs": 260, "fats": 75}
+SLOTS = ("breakfast", "lunch", "dinner", "snack")
+
+
+def test_plan_hits_daily_targets_within_tolerance():
+    plan = plan_meals(GOALS, days=7)
+
+    assert len(plan) == 7
+    for day in plan:
+        assert all(day[slot]["within_tolerance"] for slot in SLOTS)
+        calories = sum(day[slot]["cal"] for slot in SLOTS)
+        assert abs(calories - GOALS["calories"]) / GOALS["calories"] < 0.10
+
+
+def test_plan_varies_main_protein_across_days():
+    plan = plan_meals(GOALS, days=7)
+    lunches = {day["lunch"]["items"][0]["food"] for day in plan}
+    assert len(lunches) >= 3
+
+
+def test_vegan_plan_only_uses_vegan_foods():
+    plan = plan_meals(GOALS, days=3, diet="vegan", exclude=["tofu"])
+    foods = {item["food"] for day in plan for slot in SLOTS for item in day[slot]["items"]}
+    assert "tofu" not in foods
+    assert all(PLANNER_FOODS[food][1] == 0 for food in foods)
+
+
+def test_unknown_diet_rejected():
+    with pytest.raises(ValueError):
+        plan_meals(GOALS, diet="keto")
+
+
+def test_suggestions_use_different_proteins():
+    suggestions = suggest_meals(150, 250, 70)
+    assert len(suggestions) == 3
+    assert len({s["items"][0]["food"] for s in suggestions}) == 3
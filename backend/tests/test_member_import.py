@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+from app.auth_util import verify_password
+from app.models import Membership, MembershipPlan, Trainee, User, UserRole
+from app.services.member_import import import_members, report_csv
+
+
+def test_import_loads_valid_rows_and_reports_the_rest(db):
+    plan = MembershipPlan(name="Import Plan", membership_type="import-basic", price=499, duration_months=1)
+    db.add_all([plan, User(name="Existing", email="import-existing@example.com", password_hash="x",
+                           role=UserRole.TRAINEE)])
+    db.commit()
+
+    csv_file = io.StringIO(
+        "Name,Email,Phone,Password,Membership_Plan_Id,Date_Of_Birth\n"
+        f"Asha Rao,Import-Asha@Example.com,9876543210,,{plan.id},1992-05-17\n"
+        "Ravi Kumar,import-ravi@example.com,,hunter22,,\n"
+        "Dup,import-ravi@example.com,,,,\n"
+        "Existing,import-existing@example.com,,,,\n"
+        "Bad Phone,import-bad@example.com,12ab,,,\n"
+        "No Plan,import-noplan@example.com,,,424242,\n"
+    )
+    report = import_members(db, csv_file, batch_size=4)
+
+    assert (report["total_rows"], report["created"], report["failed"]) == (6, 2, 4)
+    assert [error["row"] for error in report["errors"]] == [4, 5, 6, 7]
+    asha, ravi = report["members"]
+    assert asha["temp_password"] and asha["membership_created"]
+    assert ravi["temp_password"] is None
+
+    user = db.query(User).filter(User.email == "import-asha@example.com").one()
+    assert verify_password(asha["temp_password"], user.password_hash)
+    assert db.query(Trainee).filter(Trainee.user_id == user.id).one().date_of_birth.isoformat() == "1992-05-17"
+    assert db.query(Membership).filter(Membership.trainee_id == user.id).one().membership_type == "import-basic"
+    assert report_csv(report).count("\n") == 7
+
+
+def test_import_requires_name_and_email_columns(db):
+    with pytest.raises(ValueError):
+        import_members(db, io.StringIO("name,phone\nA,123\n"))
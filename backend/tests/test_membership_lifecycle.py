@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models import Membership, Notification, User, UserRole
+from app.services.membership_lifecycle import run_membership_lifecycle
+
+
+def test_lifecycle_expires_flags_and_reminds_once(db):
+    now = datetime.now(timezone.utc)
+    member = User(name="Lifecycle", email="lifecycle-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+
+    def membership(days_left, **extra):
+        return Membership(trainee_id=member.id, membership_type="basic", price=999, status="active",
+                          start_date=now - timedelta(days=30), end_date=now + timedelta(days=days_left), **extra)
+
+    lapsed = membership(-1)
+    ending = membership(3)
+    renewed = membership(60, expiring_soon=True, expiry_reminder_sent_at=now - timedelta(days=2))
+    db.add_all([lapsed, ending, renewed])
+    db.commit()
+
+    result = run_membership_lifecycle(db, now=now)
+    assert result["expired"] >= 1 and result["reminded"] >= 1
+    db.expire_all()
+    assert (lapsed.status, lapsed.expiring_soon) == ("expired", False)
+    assert (ending.status, ending.expiring_soon) == ("active", True)
+    assert ending.expiry_reminder_sent_at is not None
+    assert (renewed.expiring_soon, renewed.expiry_reminder_sent_at) == (False, None)
+
+    run_membership_lifecycle(db, now=now)
+    reminders = db.query(Notification).filter(
+        Notification.user_id == member.id, Notification.notification_type == "membership"
+    ).count()
+    assert reminders == 1
@@ -0,0 +1,93 @@
+import threading
+import time
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.models import NutritionGoal, Trainee, User, UserRole
+from app.services.nutrition_goals import get_trainee_goals, inputs_to_dict, refresh_nutrition_goals
+
+
+def _member(db, email, **profile):
+    user = User(name=email.split("@")[0], email=email, password_hash="x", role=UserRole.TRAINEE)
+    db.add(user)
+    db.flush()
+    trainee = Trainee(user_id=user.id, **profile)
+    db.add(trainee)
+    db.flush()
+    return user, trainee
+
+
+def test_first_read_creates_the_row_from_defaults(db):
+    user, _ = _member(db, "goals-defaults@example.com")
+    assert db.query(NutritionGoal).filter(NutritionGoal.trainee_id == user.id).count() == 0
+
+    row = get_trainee_goals(db, user.id)
+    assert inputs_to_dict(row) == {
+        "weight": 70, "height": 170, "age": 30, "gender": "M", "activity_level": "moderate", "fitness_goal": "maintain",
+    }
+    assert row.calories > 0 and row.user_set_fields == []
+    assert get_trainee_goals(db, user.id).id == row.id
+    assert db.query(NutritionGoal).filter(NutritionGoal.trainee_id == user.id).count() == 1
+
+
+def test_profile_fills_inputs_the_trainee_has_not_set(db):
+    user, trainee = _member(db, "goals-profile@example.com", goal="Muscle gain", weight=64, height=175,
+                            gender="female", date_of_birth=date(date.today().year - 25, 1, 1))
+    row = refresh_nutrition_goals(db, user.id, trainee)
+    assert inputs_to_dict(row) == {
+        "weight": 64, "height": 175, "age": 25, "gender": "F", "activity_level": "moderate", "fitness_goal": "gain",
+    }
+
+
+def test_explicit_inputs_win_over_later_profile_updates(db):
+    user, trainee = _member(db, "goals-explicit@example.com", goal="Weight loss", weight=80, height=180)
+
+    # POST /api/nutrition/goals: the route copies weight/height onto the profile too
+    trainee.weight = 82
+    row = refresh_nutrition_goals(db, user.id, trainee, weight=82, height=180, age=40,
+                                  activity_level="high", fitness_goal="gain")
+    db.commit()
+    calories = row.calories
+    assert row.user_set_fields == ["activity_level", "age", "fitness_goal", "height", "weight"]
+
+    # Profile update changing only the goal text and date of birth
+    trainee.goal = "Fat loss"
+    trainee.date_of_birth = date(1990, 6, 1)
+    row = refresh_nutrition_goals(db, user.id, trainee)
+    assert (row.fitness_goal, row.activity_level, row.age, row.weight) == ("gain", "high", 40, 82)
+    assert row.calories == calories
+
+    # Profile update editing the weight: an explicit value again
+    trainee.weight = 78
+    row = refresh_nutrition_goals(db, user.id, trainee, weight=78)
+    assert (row.weight, row.fitness_goal) == (78, "gain")
+
+
+def test_concurrent_first_reads_share_one_row(schema):
+    setup = Session(bind=schema)
+    user, _ = _member(setup, "goals-race@example.com")
+    setup.commit()
+    user_id = user.id
+
+    first, second = Session(bind=schema), Session(bind=schema)
+    results = []
+    try:
+        refresh_nutrition_goals(first, user_id)  # inserted, not committed yet
+
+        reader = threading.Thread(target=lambda: results.append(get_trainee_goals(second, user_id).id))
+        reader.start()
+        time.sleep(0.3)
+        assert reader.is_alive()  # its INSERT waits on the uncommitted row
+        first.commit()
+        reader.join(10)
+        assert not reader.is_alive()
+
+        assert results == [setup.query(NutritionGoal.id).filter(NutritionGoal.trainee_id == user_id).scalar()]
+    finally:
+        first.close()
+        second.close()
+        setup.rollback()
+        setup.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+        setup.commit()
+        setup.close()
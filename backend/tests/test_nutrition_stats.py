@@ -0,0 +1,12 @@
+from app.services.nutrition_stats import macro_columns
+
+
+def test_macro_columns_coerces_payload():
+    assert macro_columns({"protein": 10.5, "carbs": "20", "fats": None, "meal_type": "lunch"}) == {
+        "protein": 10.5, "carbs": 20.0, "fats": 0.0, "fiber": 0.0,
+    }
+
+
+def test_macro_columns_ignores_bad_values():
+    assert macro_columns({"protein": "lots"})["protein"] == 0.0
+    assert macro_columns(None) == {"protein": 0.0, "carbs": 0.0, "fats": 0.0, "fiber": 0.0}
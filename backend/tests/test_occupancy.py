@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from app.services.occupancy import MemoryOccupancyCounter, OccupancyCounter
+
+
+def test_try_enter_respects_capacity():
+    counter = MemoryOccupancyCounter()
+    assert counter.try_enter(2) and counter.try_enter(2)
+    assert not counter.try_enter(2)
+    counter.leave()
+    assert counter.try_enter(2)
+    assert counter.value() == 2
+
+
+def test_unlimited_capacity_and_floor_at_zero():
+    counter = MemoryOccupancyCounter()
+    assert all(counter.try_enter(0) for _ in range(5))
+    for _ in range(10):
+        counter.leave()
+    assert counter.value() == 0
+
+
+def test_concurrent_check_ins_never_exceed_capacity():
+    counter = MemoryOccupancyCounter()
+    admitted = []
+
+    def enter():
+        if counter.try_enter(25):
+            admitted.append(1)
+
+    threads = [threading.Thread(target=enter) for _ in range(200)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(admitted) == counter.value() == 25
+
+
+def test_incomplete_counter_fails_at_construction():
+    class NoReset(OccupancyCounter):
+        def value(self):
+            return 0
+
+        def try_enter(self, capacity=0):
+            return True
+
+        def leave(self):
+            pass
+
+    with pytest.raises(TypeError):
+        NoReset()
@@ -0,0 +1,72 @@
+import pytest
+
+from app.models import Membership, MembershipPlan, Payment, User, UserRole
+from app.services.fake_razorpay import FakeRazorpayClient
+from app.services.payment_finalization import DAYS_PER_PLAN_MONTH, PaymentMismatchError, finalize_payment
+
+
+def test_fake_client_signatures_verify():
+    client = FakeRazorpayClient()
+    order = client.order.create({"amount": 100, "currency": "INR"})
+    checkout = client.pay(order["id"])
+    assert client.utility.verify_payment_signature(checkout)
+    with pytest.raises(Exception):
+        client.utility.verify_payment_signature({**checkout, "razorpay_signature": "0" * 64})
+
+
+def test_finalize_is_idempotent_per_order(db):
+    member = User(name="Payer", email="finalize-payer@example.com", password_hash="x", role=UserRole.TRAINEE)
+    other = User(name="Other", email="finalize-other@example.com", password_hash="x", role=UserRole.TRAINEE)
+    plan = MembershipPlan(name="Monthly", membership_type="basic", price=999, duration_months=1)
+    db.add_all([member, other, plan])
+    db.flush()
+    db.add(Payment(trainee_id=member.id, amount=999, provider="razorpay", status="pending", transaction_id="order_A",
+                   plan_id=plan.id))
+    db.commit()  # finalize_payment rolls back on errors; keep the fixtures out of that
+
+    with pytest.raises(PermissionError):
+        finalize_payment(db, other.id, "order_A", "pay_A", plan.id)
+
+    first, replayed = finalize_payment(db, member.id, "order_A", "pay_A", plan.id)
+    assert replayed is False
+    again, replayed = finalize_payment(db, member.id, "order_A", "pay_A", plan.id)
+    assert replayed is True
+    assert again == first
+
+    memberships = db.query(Membership).filter(Membership.trainee_id == member.id).all()
+    assert len(memberships) == 1
+    assert (memberships[0].end_date - memberships[0].start_date).days == DAYS_PER_PLAN_MONTH
+    assert db.query(Payment).filter(Payment.transaction_id == "pay_A").one().status == "completed"
+
+    with pytest.raises(LookupError):
+        finalize_payment(db, member.id, "order_missing", "pay_missing", plan.id)
+
+
+def test_finalize_applies_only_the_plan_the_order_was_created_for(db):
+    member = User(name="Swapper", email="finalize-swapper@example.com", password_hash="x", role=UserRole.TRAINEE)
+    cheap = MembershipPlan(name="Cheap", membership_type="cheap", price=1, duration_months=1)
+    premium = MembershipPlan(name="Premium", membership_type="premium", price=9999, duration_months=12)
+    retired = MembershipPlan(name="Retired", membership_type="retired", price=500, duration_months=1, is_active=False)
+    db.add_all([member, cheap, premium, retired])
+    db.flush()
+    db.add_all([
+        Payment(trainee_id=member.id, amount=1, provider="razorpay", status="pending", transaction_id="order_cheap",
+                plan_id=cheap.id),
+        Payment(trainee_id=member.id, amount=1, provider="razorpay", status="pending", transaction_id="order_plain"),
+        Payment(trainee_id=member.id, amount=1, provider="razorpay", status="pending", transaction_id="order_under",
+                plan_id=premium.id),
+        Payment(trainee_id=member.id, amount=500, provider="razorpay", status="pending", transaction_id="order_old",
+                plan_id=retired.id),
+    ])
+    db.commit()
+
+    for order_id, plan_id in (("order_cheap", premium.id), ("order_plain", premium.id),
+                              ("order_under", premium.id), ("order_old", retired.id)):
+        with pytest.raises(PaymentMismatchError):
+            finalize_payment(db, member.id, order_id, f"pay_{order_id}", plan_id)
+    assert db.query(Membership).filter(Membership.trainee_id == member.id).count() == 0
+    assert db.query(Payment).filter(Payment.trainee_id == member.id, Payment.status == "pending").count() == 4
+
+    # Without a plan_id the stored plan is applied
+    finalize_payment(db, member.id, "order_cheap", "pay_order_cheap")
+    assert db.query(Membership).filter(Membership.trainee_id == member.id).one().membership_type == "cheap"
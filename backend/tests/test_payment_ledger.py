@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models import Payment, Trainer, TrainerRevenue, User, UserRole
+from app.services.payment_ledger import decode_cursor, encode_cursor, ledger_page, ledger_select
+
+
+def _sql(query):
+    return str(query.compile(dialect=postgresql.dialect()))
+
+
+def test_cursor_round_trip():
+    ts = datetime(2026, 2, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(ts, 1, 42)) == (ts, 1, 42)
+
+
+def test_invalid_cursor_and_type():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    with pytest.raises(ValueError):
+        ledger_select(entry_type="refund")
+
+
+def test_ledger_is_one_union_with_keyset():
+    cursor = encode_cursor(datetime(2026, 2, 1, tzinfo=timezone.utc), 0, 7)
+    sql = _sql(ledger_select(search="anna", cursor=cursor))
+    assert "UNION ALL" in sql
+    assert "(ledger.timestamp, ledger.source, ledger.id) <" in sql
+    assert "ORDER BY ledger.timestamp DESC, ledger.source DESC, ledger.id DESC" in sql
+
+
+def test_type_filter_selects_single_branch():
+    sql = _sql(ledger_select(entry_type="trainer_payout"))
+    assert "UNION" not in sql
+    assert "payments" not in sql
+
+
+def test_keyset_pages_cover_mixed_entries_once(db):
+    member = User(name="Member", email="pledger-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    coach = User(name="Coach", email="pledger-coach@example.com", password_hash="x", role=UserRole.TRAINER)
+    db.add_all([member, coach])
+    db.flush()
+    trainer = Trainer(user_id=coach.id)
+    db.add(trainer)
+    db.flush()
+
+    at = datetime(2026, 2, 1, 12, 0, tzinfo=timezone.utc)
+    naive = at.replace(tzinfo=None)  # payouts store naive UTC
+    payments = [Payment(trainee_id=member.id, amount=100, provider="cash", created_at=created)
+                for created in (at, at, at - timedelta(hours=1), at)]
+    payouts = [TrainerRevenue(trainer_id=trainer.id, amount=50, paid_at=naive, created_at=created)
+               for created in (naive, naive, naive - timedelta(hours=2), naive)]
+    db.add_all(payments + payouts)
+    db.flush()
+    # Missing timestamps (the column defaults fill them on insert): payout 2
+    # falls back to created_at, payment 3 and payout 3 have none at all
+    db.query(Payment).filter(Payment.id == payments[3].id).update({"created_at": None}, synchronize_session=False)
+    db.query(TrainerRevenue).filter(TrainerRevenue.id == payouts[2].id).update(
+        {"paid_at": None}, synchronize_session=False)
+    db.query(TrainerRevenue).filter(TrainerRevenue.id == payouts[3].id).update(
+        {"created_at": None, "paid_at": None}, synchronize_session=False)
+
+    # (timestamp, source, id) descending: payments before payouts at the same instant
+    expected = (
+        [("trainee_payment", p.id) for p in sorted(payments[:2], key=lambda p: -p.id)]
+        + [("trainer_payout", p.id) for p in sorted(payouts[:2], key=lambda p: -p.id)]
+        + [("trainee_payment", payments[2].id), ("trainer_payout", payouts[2].id)]
+        + [("trainee_payment", payments[3].id), ("trainer_payout", payouts[3].id)]
+    )
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = ledger_page(db, 3, cursor=cursor, search="pledger-")
+        seen += page["payments"]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert [(entry["type"], entry["id"]) for entry in seen] == expected
+    assert pages == 3
+    assert seen[0]["created_at"] == at.isoformat() and seen[2]["paid_at"] == at.isoformat()
+    assert seen[6]["created_at"] is None and seen[7]["paid_at"] is None
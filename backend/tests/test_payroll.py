@@ -0,0 +1,54 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.models import PTSession, Trainee, Trainer, TrainerRevenue, TrainerSalary, User, UserRole
+from app.services.payroll import earnings_breakdown, payroll_source, run_payroll
+
+
+def _config(model):
+    return SimpleNamespace(salary_model=model, base_salary=1000, commission_per_trainee=100, commission_per_session=10)
+
+
+def test_earnings_breakdown_by_model():
+    assert earnings_breakdown(_config("fixed"), 5, 7)["total"] == 1000
+    assert earnings_breakdown(_config("per_trainee"), 5, 7)["total"] == 1500
+    assert earnings_breakdown(_config("per_session"), 5, 7)["total"] == 1070
+    assert earnings_breakdown(_config("hybrid"), 5, 7)["total"] == 1570
+    assert earnings_breakdown(None, 5, 7)["total"] == 0
+
+
+def test_run_payroll_writes_once_per_month(db):
+    coach = User(name="Coach P", email="payroll-coach@example.com", password_hash="x", role=UserRole.TRAINER)
+    member = User(name="Member P", email="payroll-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add_all([coach, member])
+    db.flush()
+    trainer = Trainer(user_id=coach.id)
+    db.add(trainer)
+    db.flush()
+    db.add_all([
+        TrainerSalary(trainer_id=trainer.id, salary_model="hybrid", base_salary=1000,
+                      commission_per_trainee=100, commission_per_session=10, is_active=True),
+        Trainee(user_id=member.id, trainer_id=trainer.id),
+        PTSession(trainer_id=trainer.id, trainee_id=member.id, session_date=datetime(2026, 3, 10), status="completed"),
+        PTSession(trainer_id=trainer.id, trainee_id=member.id, session_date=datetime(2026, 3, 11), status="cancelled"),
+        PTSession(trainer_id=trainer.id, trainee_id=member.id, session_date=datetime(2026, 4, 1), status="completed"),
+    ])
+    db.flush()
+
+    def recorded():
+        return db.query(TrainerRevenue).filter(
+            TrainerRevenue.trainer_id == trainer.id,
+            TrainerRevenue.source == payroll_source(2026, 3)
+        ).all()
+
+    preview = run_payroll(db, 2026, 3, dry_run=True)
+    entry = next(e for e in preview["payroll"] if e["trainer_id"] == str(trainer.id))
+    assert (entry["trainee_count"], entry["session_count"], entry["total"]) == (1, 1, 1110)
+    assert recorded() == []
+
+    run_payroll(db, 2026, 3)
+    assert [r.amount for r in recorded()] == [1110]
+
+    again = run_payroll(db, 2026, 3)
+    assert again["already_paid"] >= 1
+    assert len(recorded()) == 1
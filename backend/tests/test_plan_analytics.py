@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from app.models import Membership, MembershipPlan, Payment, User, UserRole
+from app.services.plan_analytics import build_plan_analytics
+
+
+def test_plan_analytics_in_constant_queries(db):
+    now = datetime.now(timezone.utc)
+    member = User(name="Analytics", email="plan-analytics@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    plans = [
+        MembershipPlan(name=f"Plan {i}", membership_type=f"analytics-{i}", price=100 * (i + 1), duration_months=1)
+        for i in range(20)
+    ]
+    db.add_all(plans)
+    db.flush()
+    for status, days in (("active", 10), ("expired", 30), ("cancelled", 20), ("active", 40)):
+        db.add(Membership(trainee_id=member.id, membership_type="analytics-3", price=400, status=status,
+                          start_date=now - timedelta(days=days), end_date=now + timedelta(days=30 - days)))
+    # Five purchases of plan 3 (renewals extend a membership in place), one
+    # partly refunded; pending payments and payments without a plan don't count
+    for amount, status, refund in ((400, "completed", None), (400, "completed", None), (400, "completed", 100),
+                                   (400, "completed", None), (400, "completed", None), (400, "pending", None)):
+        db.add(Payment(trainee_id=member.id, plan_id=plans[3].id, amount=amount, status=status, provider="razorpay",
+                       is_refund=refund is not None, refund_amount=refund))
+    db.add(Payment(trainee_id=member.id, amount=999, status="completed", provider="Manual by Admin"))
+    db.flush()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.connection(), "before_cursor_execute", listener)
+    try:
+        analytics = {entry["membership_type"]: entry for entry in build_plan_analytics(db)}
+    finally:
+        event.remove(db.connection(), "before_cursor_execute", listener)
+
+    assert len(statements) == 3
+    plan = analytics["analytics-3"]
+    assert (plan["purchase_count"], plan["active_count"], plan["revenue"]) == (5, 2, 1900.0)
+    assert (plan["renewal_rate"], plan["churn_rate"]) == (0.5, 0.5)
+    # Tenures 10, 30, 20 and 30 days (the last capped at its end date)
+    assert plan["avg_tenure_days"] == pytest.approx(22.5, abs=0.1)
+    assert analytics["analytics-0"]["purchase_count"] == 0
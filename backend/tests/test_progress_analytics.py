@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.progress_analytics import (
+    analyze_series,
+    lttb_indices,
+    rolling_mean,
+    trend_slope,
+    weekly_means,
+)
+
+
+def test_rolling_mean_uses_trailing_time_window():
+    t = np.array([0.0, 1.0, 2.0, 10.0])
+    v = np.array([1.0, 2.0, 3.0, 10.0])
+    assert np.allclose(rolling_mean(t, v, window_days=2), [1.0, 1.5, 2.5, 10.0])
+
+
+def test_weekly_means_bucket_by_monday():
+    monday = date(2024, 1, 1)
+    days = [monday, monday + timedelta(days=6), monday + timedelta(days=7)]
+    t = np.array([d.toordinal() for d in days], dtype=float)
+    weeks, means, counts = weekly_means(t, np.array([70.0, 72.0, 80.0]))
+    assert [date.fromordinal(int(w)) for w in weeks] == [monday, monday + timedelta(days=7)]
+    assert means.tolist() == [71.0, 80.0]
+    assert counts.tolist() == [2, 1]
+
+
+def test_trend_slope_matches_linear_series():
+    t = np.arange(10, dtype=float)
+    assert abs(trend_slope(t, 80 - 0.1 * t) + 0.1) < 1e-9
+    assert trend_slope(t[:1], t[:1]) is None
+
+
+def test_lttb_keeps_endpoints_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[500] = 5.0
+    keep = lttb_indices(x, y, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert 500 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_analyze_series_bounds_payload():
+    start = date(2020, 1, 1)
+    dates = [start + timedelta(days=i) for i in range(3 * 365)]
+    values = [80 - i * 0.01 if i % 10 else None for i in range(len(dates))]
+    result = analyze_series(dates, values, points=100)
+    assert len(result["points"]) == 100
+    assert result["count"] == sum(v is not None for v in values)
+    assert result["slope_per_week"] < 0
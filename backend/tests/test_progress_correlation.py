@@ -0,0 +1,43 @@
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+from app.services.progress_correlation import correlate_progress
+
+Measurement = namedtuple("Measurement", "date weight body_fat muscle_mass")
+
+
+def _history(weeks=12):
+    start = date(2024, 1, 1)
+    measurements, workouts = [], []
+    weight = 90.0
+    for week in range(weeks):
+        sessions = week % 4  # 0..3 workouts per week
+        for s in range(sessions):
+            workouts.append((datetime.combine(start + timedelta(days=week * 7 + s), datetime.min.time()), 45))
+        for d in range(7):
+            measurements.append(Measurement(start + timedelta(days=week * 7 + d), weight, None, None))
+            weight -= 0.05 * sessions
+    return start, start + timedelta(days=weeks * 7 - 1), measurements, workouts
+
+
+def test_timeline_counts_workouts_per_measurement_day():
+    start, end, measurements, workouts = _history()
+    result = correlate_progress(measurements, workouts, start, end)
+    expected = [sum(1 for w, _ in workouts if w.date() == m.date) for m in measurements]
+    assert result["timeline_workouts"] == expected
+
+
+def test_more_weekly_volume_means_more_weight_loss():
+    start, end, measurements, workouts = _history()
+    weight = correlate_progress(measurements, workouts, start, end)["metrics"]["weight"]
+    assert weight["weekly_volume_correlation"]["r"] < -0.9
+    assert weight["weekly_volume_correlation"]["change_per_workout"] < 0
+    assert weight["trend_per_week"] < 0
+    assert all(entry["pairs"] > 0 for entry in weight["lagged_correlation"])
+
+
+def test_missing_fields_are_reported_as_none():
+    start, end, measurements, workouts = _history()
+    body_fat = correlate_progress(measurements, workouts, start, end)["metrics"]["body_fat"]
+    assert body_fat["change"] is None
+    assert body_fat["weekly_volume_correlation"]["r"] is None
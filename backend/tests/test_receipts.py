@@ -0,0 +1,67 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from app.models import Payment, User, UserRole
+from app.services.receipts import RangeNotSatisfiable, _parse_range, render_receipt_pdf, store_receipt
+
+CONTEXT = {
+    "payment_id": 7, "receipt_number": "REC-7", "created_at": datetime(2026, 1, 5, 10, 30),
+    "status": "completed", "amount": 1500.0, "provider": "Manual by Admin", "payment_mode": "upi",
+    "name": "Asha", "email": "asha@example.com", "phone": "",
+}
+
+
+def test_rendering_is_deterministic_and_content_addressed(tmp_path):
+    first = render_receipt_pdf(CONTEXT)
+    assert first.startswith(b"%PDF")
+    assert render_receipt_pdf(dict(CONTEXT)) == first
+
+    path = store_receipt(first, str(tmp_path))
+    assert store_receipt(first, str(tmp_path)) == path
+    assert os.path.basename(os.path.dirname(path)) == os.path.basename(path)[:2]
+    with open(path, "rb") as f:
+        assert f.read() == first
+
+    other = store_receipt(render_receipt_pdf({**CONTEXT, "amount": 10.0}), str(tmp_path))
+    assert other != path
+    refunded = render_receipt_pdf({**CONTEXT, "refund_amount": 500.0, "refund_reason": "injury"})
+    assert refunded != first
+
+
+def test_parse_range():
+    assert _parse_range("bytes=0-99", 1000) == (0, 99)
+    assert _parse_range("bytes=900-", 1000) == (900, 999)
+    assert _parse_range("bytes=-100", 1000) == (900, 999)
+    assert _parse_range("bytes=950-2000", 1000) == (950, 999)
+    # Ignored: the full body is sent
+    for header in ("bytes=0-1,5-6", "items=0-1", "bytes=abc", "bytes=-", "bytes=5-2", "bytes=+1-2", "bytes 0-1"):
+        assert _parse_range(header, 1000) is None, header
+    # Valid but outside the file: 416
+    for header in ("bytes=1000-", "bytes=2000-3000", "bytes=-0"):
+        with pytest.raises(RangeNotSatisfiable):
+            _parse_range(header, 1000)
+
+
+def test_changing_a_printed_column_clears_the_stored_receipt(db):
+    member = User(name="Receipt", email="receipt-member@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+    payment = Payment(trainee_id=member.id, amount=1500, status="completed", provider="cash",
+                      receipt_pdf_url="receipts/ab/first.pdf")
+    db.add(payment)
+    db.commit()
+
+    payment.notes = "called about the invoice"
+    db.commit()
+    assert payment.receipt_pdf_url == "receipts/ab/first.pdf"
+
+    payment.is_refund, payment.refund_amount = True, 500
+    db.commit()
+    assert payment.receipt_pdf_url is None
+
+    # A receipt rendered in the same flush as the change is kept
+    payment.status, payment.receipt_pdf_url = "refunded", "receipts/cd/second.pdf"
+    db.commit()
+    assert payment.receipt_pdf_url == "receipts/cd/second.pdf"
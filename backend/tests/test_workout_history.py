@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.workout_history import DEFAULT_FIELDS, decode_cursor, encode_cursor, parse_fields
+
+
+def test_cursor_round_trip_keeps_timezone_and_microseconds():
+    start = datetime(2024, 3, 1, 7, 30, 15, 123456, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(start, 42)) == (start, 42)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_parse_fields_validates_and_dedupes():
+    assert parse_fields(None) == DEFAULT_FIELDS
+    assert parse_fields("id, total_reps,id") == ["id", "total_reps"]
+    with pytest.raises(ValueError):
+        parse_fields("id,password")
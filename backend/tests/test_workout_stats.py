@@ -0,0 +1,40 @@
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from app.models import User, UserRole, Workout
+from app.services.workout_stats import weekly_workout_counts
+
+# Year boundaries where 1 January is a Monday (2018, 2024), a Sunday (2017,
+# 2023) or mid-week, plus leap-year 31 Decembers (doy 366) and the last
+# second of a Sunday next to the first second of a Monday.
+TIMES = [
+    datetime(2016, 12, 31, 12, 0), datetime(2017, 1, 1, 23, 59, 59), datetime(2017, 1, 2, 0, 0),
+    datetime(2017, 12, 31, 23, 59, 59), datetime(2018, 1, 1, 0, 0), datetime(2018, 1, 7, 23, 59, 59),
+    datetime(2018, 1, 8, 0, 0), datetime(2020, 12, 31, 18, 0), datetime(2021, 1, 1, 6, 0),
+    datetime(2021, 1, 3, 23, 59, 59), datetime(2021, 1, 4, 0, 0), datetime(2022, 1, 1, 9, 0),
+    datetime(2022, 1, 2, 9, 0), datetime(2022, 12, 31, 23, 59, 59), datetime(2023, 1, 1, 0, 0),
+    datetime(2023, 1, 2, 0, 0), datetime(2023, 12, 31, 23, 59, 59), datetime(2024, 1, 1, 0, 0),
+    datetime(2024, 12, 29, 23, 59, 59), datetime(2024, 12, 30, 0, 0), datetime(2024, 12, 31, 23, 0),
+    datetime(2025, 1, 1, 0, 30),
+]
+
+
+def test_weekly_counts_match_strftime_week_numbers(db):
+    member = User(name="Weeks", email="workout-weeks@example.com", password_hash="x", role=UserRole.TRAINEE)
+    db.add(member)
+    db.flush()
+    db.add_all([
+        Workout(trainee_id=member.id, exercise_type="run", start_time=start.replace(tzinfo=timezone.utc))
+        for start in TIMES
+    ])
+    db.flush()
+
+    # The previous implementation: strftime("%Y-W%W") on the loaded timestamps
+    loaded = db.query(Workout.start_time).filter(Workout.trainee_id == member.id).all()
+    expected = Counter(start_time.strftime("%Y-W%W") for (start_time,) in loaded)
+
+    since = min(TIMES).replace(tzinfo=timezone.utc) - timedelta(days=1)
+    weekly = weekly_workout_counts(db, member.id, since)
+    assert weekly == [{"week": week, "count": count} for week, count in sorted(expected.items())]
+    assert {"week": "2023-W00", "count": 1} in weekly
+    assert {"week": "2024-W01", "count": 1} in weekly